@@ -3,15 +3,19 @@ from __future__ import annotations
 import collections
 import functools
 import logging
+import multiprocessing
+import operator
 import random
 import secrets
+import threading
+import traceback
 import warnings
 from argparse import Namespace
 from collections import Counter, deque, defaultdict
 from collections.abc import Collection, MutableSequence
 from enum import IntEnum, IntFlag
 from typing import (AbstractSet, Any, Callable, ClassVar, Dict, Iterable, Iterator, List, Literal, Mapping, NamedTuple,
-                    Optional, Protocol, Set, Tuple, Union, TYPE_CHECKING, Literal, overload)
+                    Optional, Protocol, Set, Tuple, TypeVar, Union, TYPE_CHECKING, Literal, overload)
 import dataclasses
 
 from typing_extensions import NotRequired, TypedDict
@@ -19,9 +23,11 @@ from typing_extensions import NotRequired, TypedDict
 import NetUtils
 import Options
 import Utils
+from profiling import profile_span
 
 if TYPE_CHECKING:
     from entrance_rando import ERPlacementState
+    from profiling import GenerationProfile
     from worlds import AutoWorld
 
 
@@ -98,6 +104,16 @@ class MultiWorld():
 
     game: Dict[int, str]
 
+    sweep_processes: int = 0
+    """Number of worker processes large sweeps may use to test location reachability in parallel, 0 to disable."""
+
+    final_placement: bool = False
+    """Set once items are not going to be moved anymore, which makes `sphere_analysis` available."""
+    _sphere_analysis: Optional[SphereAnalysis] = None
+    _sphere_analysis_lock: threading.Lock
+    profile: Optional[GenerationProfile] = None
+    """Timing of the generation phases and worlds, if it is being profiled."""
+
     random: random.Random
     per_slot_randoms: Utils.DeprecateDict[int, random.Random]
     """Deprecated. Please use `self.random` instead."""
@@ -179,6 +195,25 @@ class MultiWorld():
         self.per_slot_randoms = Utils.DeprecateDict("Using per_slot_randoms is now deprecated. Please use the "
                                                     "world's random object instead (usually self.random)", True)
         self.plando_options = PlandoOptions.none
+        self._sphere_analysis_lock = threading.Lock()
+
+    @property
+    def sphere_analysis(self) -> Optional[SphereAnalysis]:
+        """
+        Spheres of the final item placement, None until `final_placement` is set. They are analysed on first use, which
+        other threads using them wait for. Used by get_spheres, fulfills_accessibility and the spoiler playthrough.
+        """
+        if self._sphere_analysis is None and self.final_placement:
+            with self._sphere_analysis_lock:
+                if self._sphere_analysis is None:
+                    logging.info("Calculating spheres.")
+                    with profile_span(self, "spheres"):
+                        self._sphere_analysis = SphereAnalysis(self)
+        return self._sphere_analysis
+
+    @sphere_analysis.setter
+    def sphere_analysis(self, sphere_analysis: Optional[SphereAnalysis]) -> None:
+        self._sphere_analysis = sphere_analysis
 
     def get_all_ids(self) -> Tuple[int, ...]:
         return self.player_ids + tuple(self.groups)
@@ -589,6 +624,10 @@ class MultiWorld():
         locations is followed by an empty set, and then a set of all of the
         unreachable locations.
         """
+        if self.sphere_analysis:
+            yield from self.sphere_analysis.get_spheres()
+            return
+
         state = CollectionState(self)
         locations = set(self.get_filled_locations())
 
@@ -615,45 +654,16 @@ class MultiWorld():
         If there are unreachable locations, the last sphere of reachable locations is followed by an empty set,
         and then a set of all of the unreachable locations.
         """
-        state = CollectionState(self)
-        locations: Set[Location] = set()
-        events: Set[Location] = set()
-        for location in self.get_filled_locations():
-            if type(location.item.code) is int and type(location.address) is int:
-                locations.add(location)
-            else:
-                events.add(location)
-
-        while locations:
-            sphere: Set[Location] = set()
-
-            # cull events out
-            done_events: Set[Union[Location, None]] = {None}
-            while done_events:
-                done_events = set()
-                for event in events:
-                    if event.can_reach(state):
-                        state.collect(event.item, True, event)
-                        done_events.add(event)
-                events -= done_events
-
-            for location in locations:
-                if location.can_reach(state):
-                    sphere.add(location)
-
-            yield sphere
-            if not sphere:
-                if locations:
-                    yield locations  # unreachable locations
-                break
-
-            for location in sphere:
-                state.collect(location.item, True, location)
-            locations -= sphere
+        if self.sphere_analysis:
+            yield from self.sphere_analysis.sendable_spheres
+        else:
+            yield from SphereAnalysis.walk_sendable_spheres(self)
 
     def fulfills_accessibility(self, state: Optional[CollectionState] = None):
         """Check if accessibility rules are fulfilled with current or supplied state."""
         if not state:
+            if self.sphere_analysis:
+                return self.sphere_analysis.fulfills_accessibility()
             state = CollectionState(self)
         players: Dict[str, Set[int]] = {
             "minimal": set(),
@@ -718,16 +728,281 @@ class MultiWorld():
 PathValue = Tuple[str, Optional["PathValue"]]
 
 
-class CollectionState():
+class _ReadRecordingCounter:
+    """
+    Read-only stand-in for a player's `CollectionState.prog_items` Counter, used while testing an Entrance in
+    incremental reachability mode. Item name lookups are recorded in `reads`, any other kind of access (iteration,
+    `total()`, ...) can't be attributed to item names and sets `untracked` instead.
+    """
+    __slots__ = ("counter", "reads", "untracked")
+
+    counter: Counter[str]
+    reads: Set[str]
+    untracked: bool
+
+    def __init__(self, counter: Counter[str]) -> None:
+        self.counter = counter
+        self.reads = set()
+        self.untracked = False
+
+    def __getitem__(self, item: str) -> int:
+        self.reads.add(item)
+        return self.counter[item]
+
+    def __contains__(self, item: str) -> bool:
+        self.reads.add(item)
+        return item in self.counter
+
+    def get(self, item: str, default: Any = None) -> Any:
+        self.reads.add(item)
+        return self.counter.get(item, default)
+
+    def __iter__(self) -> Iterator[str]:
+        self.untracked = True
+        return iter(self.counter)
+
+    def __len__(self) -> int:
+        self.untracked = True
+        return len(self.counter)
+
+    def __bool__(self) -> bool:
+        self.untracked = True
+        return bool(self.counter)
+
+    def __getattr__(self, name: str) -> Any:
+        self.untracked = True
+        return getattr(self.counter, name)
+
+
+class _ReadRecordingProgItems:
+    """
+    Read-only stand-in for `CollectionState.prog_items`, used while testing an Entrance of `player` in incremental
+    reachability mode. Looking up the player's Counter returns `recorder`, anything else reads items of other players,
+    which can't be attributed to item names of the player and sets `recorder.untracked` instead.
+    """
+    __slots__ = ("prog_items", "player", "recorder")
+
     prog_items: Dict[int, Counter[str]]
+    player: int
+    recorder: _ReadRecordingCounter
+
+    def __init__(self, prog_items: Dict[int, Counter[str]], player: int, recorder: _ReadRecordingCounter) -> None:
+        self.prog_items = prog_items
+        self.player = player
+        self.recorder = recorder
+
+    def __getitem__(self, player: int) -> Any:
+        if player == self.player:
+            return self.recorder
+        self.recorder.untracked = True
+        return self.prog_items[player]
+
+    def __contains__(self, player: int) -> bool:
+        return player in self.prog_items
+
+    def get(self, player: int, default: Any = None) -> Any:
+        return self[player] if player in self.prog_items else default
+
+    def __iter__(self) -> Iterator[int]:
+        self.recorder.untracked = True
+        return iter(self.prog_items)
+
+    def __len__(self) -> int:
+        return len(self.prog_items)
+
+    @property
+    def current(self) -> _ReadRecordingProgItems:
+        """Stands in for `_CopyOnWriteDict.current`, so that reads of CollectionState.has() and co. are recorded."""
+        return self
+
+    def __getattr__(self, name: str) -> Any:
+        self.recorder.untracked = True
+        return getattr(self.prog_items, name)
+
+
+_T = TypeVar("_T")
+
+
+def _copy_dependent_connections(dependents: Dict[Optional[str], Set[Entrance]]) -> Dict[Optional[str], Set[Entrance]]:
+    return {item: entrance_set.copy() for item, entrance_set in dependents.items()}
+
+
+class _CopyOnWriteDict(Dict[int, _T]):
+    """
+    Per-player containers of a CollectionState, which are shared with the states it was copied to or from until they
+    get changed. `current` has the containers of all players, for reading them. Looking a player up in the dict itself
+    copies its container first if it's shared, as the caller might change it, and is a plain dict lookup afterward.
+    """
+    __slots__ = ("current", "copy_value")
+
+    current: Dict[int, _T]
+    copy_value: Callable[[_T], _T]
+
+    def __init__(self, current: Dict[int, _T], copy_value: Callable[[_T], _T], shared: bool = False) -> None:
+        super().__init__(() if shared else current)
+        self.current = current
+        self.copy_value = copy_value
+
+    def __missing__(self, player: int) -> _T:
+        value = self.copy_value(self.current[player])
+        dict.__setitem__(self, player, value)
+        self.current[player] = value
+        return value
+
+    def share(self) -> _CopyOnWriteDict[_T]:
+        """Returns a copy sharing all containers with this one, after which both copy a container before handing it
+        out for changes. Containers taken out of this one before must not be changed anymore."""
+        dict.clear(self)
+        return _CopyOnWriteDict(self.current.copy(), self.copy_value, shared=True)
+
+    def _own_all(self) -> None:
+        for player in self.current.keys() - dict.keys(self):
+            self.__missing__(player)
+
+    def __setitem__(self, player: int, value: _T) -> None:
+        dict.__setitem__(self, player, value)
+        self.current[player] = value
+
+    def __delitem__(self, player: int) -> None:
+        del self.current[player]
+        dict.pop(self, player, None)
+
+    def __contains__(self, player: object) -> bool:
+        return player in self.current
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self.current)
+
+    def __len__(self) -> int:
+        return len(self.current)
+
+    def __repr__(self) -> str:
+        return repr(self.current)
+
+    def __eq__(self, other: object) -> bool:
+        return self.current == (other.current if isinstance(other, _CopyOnWriteDict) else other)
+
+    def __ne__(self, other: object) -> bool:
+        return not self == other
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        return _CopyOnWriteDict, (dict(self.current), self.copy_value)
+
+    def get(self, player: int, default: Any = None) -> Any:
+        return self[player] if player in self.current else default
+
+    def setdefault(self, player: int, default: Any = None) -> Any:
+        if player in self.current:
+            return self[player]
+        self[player] = default
+        return default
+
+    def pop(self, player: int, *default: Any) -> Any:
+        dict.pop(self, player, None)
+        return self.current.pop(player, *default)
+
+    def popitem(self) -> Tuple[int, _T]:
+        player, value = self.current.popitem()
+        dict.pop(self, player, None)
+        return player, value
+
+    def clear(self) -> None:
+        dict.clear(self)
+        self.current.clear()
+
+    def update(self, *args: Any, **kwargs: Any) -> None:
+        for player, value in dict(*args, **kwargs).items():
+            self[player] = value
+
+    def keys(self):
+        return self.current.keys()
+
+    def values(self):
+        self._own_all()
+        return self.current.values()
+
+    def items(self):
+        self._own_all()
+        return self.current.items()
+
+    def copy(self) -> Dict[int, _T]:
+        self._own_all()
+        return self.current.copy()
+
+
+def _copy_on_write_property(attribute: str, copy_value: Callable[[Any], Any]) -> Any:
+    """Property of a CollectionState storing a _CopyOnWriteDict in `attribute`, into which assigned dicts get wrapped."""
+    def set_value(state: CollectionState, value: Dict[int, Any]) -> None:
+        if not isinstance(value, _CopyOnWriteDict):
+            value = _CopyOnWriteDict(value, copy_value)
+        setattr(state, attribute, value)
+
+    return property(operator.attrgetter(attribute), set_value)
+
+
+def _parallel_sweep_worker(state: CollectionState, advancements_per_player: List[Tuple[int, List[Location]]],
+                           connection: "multiprocessing.connection.Connection") -> None:
+    """
+    Runs in a process forked by CollectionState._sweep_for_advancements_parallel_impl. Receives the locations
+    collected by the sweeping process since the last message along with the players to check, and answers with the
+    names of the newly reachable locations per checked player of this worker's share.
+    """
+    pending = dict(advancements_per_player)
+    multiworld = state.multiworld
+    try:
+        while True:
+            message = connection.recv()
+            if message is None:
+                break
+            collected, players_to_check = message
+            for player, location_name in collected:
+                location = multiworld.get_location(location_name, player)
+                state.collect(location.item, True, location)
+            reachable_per_player: Dict[int, List[str]] = {}
+            for player, locations in pending.items():
+                if player not in players_to_check:
+                    continue
+                reachable: List[str] = []
+                unreachable: List[Location] = []
+                for location in locations:
+                    if location.can_reach(state):
+                        reachable.append(location.name)
+                    else:
+                        unreachable.append(location)
+                pending[player] = unreachable
+                if reachable:
+                    reachable_per_player[player] = reachable
+            connection.send(reachable_per_player)
+    except Exception:
+        connection.send(traceback.format_exc())
+    finally:
+        connection.close()
+
+
+class CollectionState():
+    prog_items: Dict[int, Counter[str]] = _copy_on_write_property("_prog_items", Counter.copy)
     multiworld: MultiWorld
-    reachable_regions: Dict[int, Set[Region]]
-    blocked_connections: Dict[int, Set[Entrance]]
+    reachable_regions: Dict[int, Set[Region]] = _copy_on_write_property("_reachable_regions", set.copy)
+    blocked_connections: Dict[int, Set[Entrance]] = _copy_on_write_property("_blocked_connections", set.copy)
+    dependent_connections: Dict[int, Dict[Optional[str], Set[Entrance]]] = _copy_on_write_property(
+        "_dependent_connections", _copy_dependent_connections)
+    """Only has players with incremental reachability, from their first region update on. Maps item names to the
+    blocked connections whose access rule read that item name the last time it failed. Connections stored under None
+    are retested on every update."""
+    updated_prog_items: Dict[int, Counter[str]] = _copy_on_write_property("_updated_prog_items", Counter.copy)
+    """Only has players with incremental reachability, from their first region update on. Copy of each player's
+    `prog_items` at its last region update, to find the item names that changed since then, no matter how they were
+    changed."""
     advancements: Set[Location]
     path: Dict[Union[Region, Entrance], PathValue]
     locations_checked: Set[Location]
     stale: Dict[int, bool]
     allow_partial_entrances: bool
+    _prog_items: Union[_CopyOnWriteDict[Counter[str]], _ReadRecordingProgItems]
+    _reachable_regions: _CopyOnWriteDict[Set[Region]]
+    _blocked_connections: _CopyOnWriteDict[Set[Entrance]]
+    _dependent_connections: _CopyOnWriteDict[Dict[Optional[str], Set[Entrance]]]
+    _updated_prog_items: _CopyOnWriteDict[Counter[str]]
     additional_init_functions: List[Callable[[CollectionState, MultiWorld], None]] = []
     additional_copy_functions: List[Callable[[CollectionState, CollectionState], CollectionState]] = []
 
@@ -737,6 +1012,8 @@ class CollectionState():
         self.multiworld = parent
         self.reachable_regions = {player: set() for player in parent.get_all_ids()}
         self.blocked_connections = {player: set() for player in parent.get_all_ids()}
+        self.dependent_connections = {}
+        self.updated_prog_items = {}
         self.advancements = set()
         self.path = {}
         self.locations_checked = set()
@@ -751,48 +1028,65 @@ class CollectionState():
     def update_reachable_regions(self, player: int):
         self.stale[player] = False
         world: AutoWorld.World = self.multiworld.worlds[player]
-        reachable_regions = self.reachable_regions[player]
-        queue = deque(self.blocked_connections[player])
+        incremental = world.explicit_indirect_conditions and world.incremental_reachability
+        queue = deque() if incremental else deque(self._blocked_connections.current[player])
         start: Region = world.get_region(world.origin_region_name)
 
         # init on first call - this can't be done on construction since the regions don't exist yet
-        if start not in reachable_regions:
-            reachable_regions.add(start)
+        if start not in self._reachable_regions.current[player]:
+            self.reachable_regions[player].add(start)
             self.blocked_connections[player].update(start.exits)
             queue.extend(start.exits)
 
-        if world.explicit_indirect_conditions:
+        if incremental:
+            self._update_reachable_regions_incremental(player, queue)
+        elif world.explicit_indirect_conditions:
             self._update_reachable_regions_explicit_indirect_conditions(player, queue)
         else:
             self._update_reachable_regions_auto_indirect_conditions(player, queue)
 
+    def block_connections(self, player: int, connections: Iterable[Entrance]) -> None:
+        """
+        Adds connections to the blocked connections of a player, so that they get tested on the next region update.
+        Use this instead of modifying `blocked_connections` directly, so that incremental reachability sees them.
+        """
+        connections = set(connections)
+        self.blocked_connections[player] |= connections
+        dependent_connections = self.dependent_connections.get(player)
+        if dependent_connections is not None:
+            dependent_connections.setdefault(None, set()).update(connections)
+
     def _update_reachable_regions_explicit_indirect_conditions(self, player: int, queue: deque):
-        reachable_regions = self.reachable_regions[player]
-        blocked_connections = self.blocked_connections[player]
+        # the player's containers are looked up for every change, as access rules might copy the state, after which
+        # they are shared with the copy. Only reading them doesn't copy them.
+        reachable_regions = self._reachable_regions
+        blocked_connections = self._blocked_connections
         # run BFS on all connections, and keep track of those blocked by missing items
         while queue:
             connection = queue.popleft()
             new_region = connection.connected_region
-            if new_region in reachable_regions:
-                blocked_connections.remove(connection)
+            if new_region in reachable_regions.current[player]:
+                blocked_connections[player].remove(connection)
             elif connection.can_reach(self):
                 if self.allow_partial_entrances and not new_region:
                     continue
                 assert new_region, f"tried to search through an Entrance \"{connection}\" with no connected Region"
-                reachable_regions.add(new_region)
-                blocked_connections.remove(connection)
-                blocked_connections.update(new_region.exits)
+                reachable_regions[player].add(new_region)
+                player_blocked_connections = blocked_connections[player]
+                player_blocked_connections.remove(connection)
+                player_blocked_connections.update(new_region.exits)
                 queue.extend(new_region.exits)
                 self.path[new_region] = (new_region.name, self.path.get(connection, None))
 
                 # Retry connections if the new region can unblock them
                 for new_entrance in self.multiworld.indirect_connections.get(new_region, set()):
-                    if new_entrance in blocked_connections and new_entrance not in queue:
+                    if new_entrance in player_blocked_connections and new_entrance not in queue:
                         queue.append(new_entrance)
 
     def _update_reachable_regions_auto_indirect_conditions(self, player: int, queue: deque):
-        reachable_regions = self.reachable_regions[player]
-        blocked_connections = self.blocked_connections[player]
+        # the player's containers are looked up for every change, like in the update with explicit indirect conditions
+        reachable_regions = self._reachable_regions
+        blocked_connections = self._blocked_connections
         new_connection: bool = True
         # run BFS on all connections, and keep track of those blocked by missing items
         while new_connection:
@@ -800,31 +1094,110 @@ class CollectionState():
             while queue:
                 connection = queue.popleft()
                 new_region = connection.connected_region
-                if new_region in reachable_regions:
-                    blocked_connections.remove(connection)
+                if new_region in reachable_regions.current[player]:
+                    blocked_connections[player].remove(connection)
                 elif connection.can_reach(self):
                     if self.allow_partial_entrances and not new_region:
                         continue
                     assert new_region, f"tried to search through an Entrance \"{connection}\" with no connected Region"
-                    reachable_regions.add(new_region)
-                    blocked_connections.remove(connection)
-                    blocked_connections.update(new_region.exits)
+                    reachable_regions[player].add(new_region)
+                    player_blocked_connections = blocked_connections[player]
+                    player_blocked_connections.remove(connection)
+                    player_blocked_connections.update(new_region.exits)
                     queue.extend(new_region.exits)
                     self.path[new_region] = (new_region.name, self.path.get(connection, None))
                     new_connection = True
             # sweep for indirect connections, mostly Entrance.can_reach(unrelated_Region)
-            queue.extend(blocked_connections)
+            queue.extend(blocked_connections.current[player])
+
+    def _update_reachable_regions_incremental(self, player: int, queue: deque):
+        # the player's containers are looked up for every change, like in the update with explicit indirect conditions
+        reachable_regions = self._reachable_regions
+        blocked_connections = self._blocked_connections
+        dependent_connections = self._dependent_connections
+        if player not in dependent_connections:
+            # first incremental update of this player, nothing is known about its blocked connections yet
+            dependent_connections[player] = {None: blocked_connections.current[player].copy()}
+            self.updated_prog_items[player] = Counter()
+        # only retest blocked connections that read one of the changed items, or that could not be tracked at all.
+        # Entries for connections that got unblocked in the meantime are cleaned up lazily here.
+        # this might be nested in the update of another player, whose rule then depends on items of this player
+        prog_items = self._prog_items
+        counter = prog_items.current[player]
+        updated_counter = self._updated_prog_items.current[player]
+        player_dependent_connections = dependent_connections[player]
+        retest = player_dependent_connections.pop(None, set())
+        for item in counter.keys() | updated_counter.keys():
+            if counter[item] != updated_counter[item]:
+                retest.update(player_dependent_connections.pop(item, ()))
+        queue.extend((retest & blocked_connections.current[player]).difference(queue))
+        self.updated_prog_items[player] = counter.copy()
+
+        recorder = _ReadRecordingCounter(counter)
+        recording_prog_items = _ReadRecordingProgItems(prog_items, player, recorder)
+        while queue:
+            connection = queue.popleft()
+            new_region = connection.connected_region
+            if new_region in reachable_regions.current[player]:
+                blocked_connections[player].discard(connection)
+                continue
+            recorder.reads = set()
+            recorder.untracked = False
+            self._prog_items = recording_prog_items
+            try:
+                can_reach = connection.can_reach(self)
+            finally:
+                self._prog_items = prog_items
+            if can_reach:
+                if self.allow_partial_entrances and not new_region:
+                    dependent_connections[player].setdefault(None, set()).add(connection)
+                    continue
+                assert new_region, f"tried to search through an Entrance \"{connection}\" with no connected Region"
+                reachable_regions[player].add(new_region)
+                player_blocked_connections = blocked_connections[player]
+                player_blocked_connections.discard(connection)
+                player_blocked_connections.update(new_region.exits)
+                queue.extend(new_region.exits)
+                self.path[new_region] = (new_region.name, self.path.get(connection, None))
+
+                # Retry connections if the new region can unblock them
+                for new_entrance in self.multiworld.indirect_connections.get(new_region, set()):
+                    if new_entrance in player_blocked_connections and new_entrance not in queue:
+                        queue.append(new_entrance)
+            elif recorder.untracked or not recorder.reads:
+                # the rule read items of other players or failed without reading any item, so it could change its mind
+                # without any item of this player changing
+                dependent_connections[player].setdefault(None, set()).add(connection)
+            else:
+                # the rule returned False based on the recorded item counts alone, so it can only change its mind once
+                # one of them changes, or through an indirect condition.
+                player_dependent_connections = dependent_connections[player]
+                for item in recorder.reads:
+                    player_dependent_connections.setdefault(item, set()).add(connection)
 
     def copy(self) -> CollectionState:
-        ret = CollectionState(self.multiworld)
-        ret.prog_items = {player: counter.copy() for player, counter in self.prog_items.items()}
-        ret.reachable_regions = {player: region_set.copy() for player, region_set in
-                                 self.reachable_regions.items()}
-        ret.blocked_connections = {player: entrance_set.copy() for player, entrance_set in
-                                   self.blocked_connections.items()}
+        """
+        Returns a copy of this state. The per-player containers are shared between both states until a player's
+        container gets changed through one of them, so copying only costs as much as the players changed afterward.
+        Containers taken out of this state before copying it have to be looked up again to change them.
+        """
+        ret = CollectionState.__new__(CollectionState)
+        ret.multiworld = self.multiworld
+        for function in self.additional_init_functions:
+            function(ret, self.multiworld)
+        ret._prog_items = self._prog_items.share()
+        ret._reachable_regions = self._reachable_regions.share()
+        ret._blocked_connections = self._blocked_connections.share()
+        ret._dependent_connections = self._dependent_connections.share()
+        ret._updated_prog_items = self._updated_prog_items.share()
+        # advancements, path and locations_checked are not per player, so they would be copied on their first change
+        # anyway, which happens in almost every use of a copy
         ret.advancements = self.advancements.copy()
         ret.path = self.path.copy()
         ret.locations_checked = self.locations_checked.copy()
+        # things changed in containers of this state without going through collect() or remove(), like in fake states,
+        # only get picked up by updating the regions
+        ret.stale = {player: True for player in self.stale}
         ret.allow_partial_entrances = self.allow_partial_entrances
         for function in self.additional_copy_functions:
             ret = function(self, ret)
@@ -933,6 +1306,97 @@ class CollectionState():
             if yield_each_sweep:
                 yield
 
+    parallel_sweep_min_locations: ClassVar[int] = 20000
+    """Smallest number of locations to sweep through for which starting worker processes is considered worthwhile."""
+
+    def _use_parallel_sweep(self, advancements_per_player: List[Tuple[int, List[Location]]]) -> bool:
+        processes = self.multiworld.sweep_processes
+        return (processes > 1 and len(advancements_per_player) > 1
+                and sum(len(locations) for _, locations in advancements_per_player) >= self.parallel_sweep_min_locations
+                # workers are forked to inherit the multiworld, which is not safe while other threads are running
+                and "fork" in multiprocessing.get_all_start_methods() and threading.active_count() == 1)
+
+    def _sweep_for_advancements_parallel_impl(self, advancements_per_player: List[Tuple[int, List[Location]]],
+                                              yield_each_sweep: bool) -> Iterator[None]:
+        """
+        Like _sweep_for_advancements_impl, but the reachability of each player's locations is tested in forked worker
+        processes, which each own a fixed share of the players and mirror this state by collecting the same items.
+        All checked players of a sweep iteration are tested against the state at the start of that iteration, the
+        items are then collected here in player order, and sent to the workers with the next iteration.
+        """
+        processes = min(self.multiworld.sweep_processes, len(advancements_per_player))
+        # distribute players over the workers, balancing the number of locations to test
+        shares: List[List[Tuple[int, List[Location]]]] = [[] for _ in range(processes)]
+        share_sizes = [0] * processes
+        for player, locations in sorted(advancements_per_player, key=lambda entry: len(entry[1]), reverse=True):
+            smallest = share_sizes.index(min(share_sizes))
+            shares[smallest].append((player, locations))
+            share_sizes[smallest] += len(locations)
+        player_order = {player: index for index, (player, _) in enumerate(advancements_per_player)}
+
+        context = multiprocessing.get_context("fork")
+        connections = []
+        workers = []
+        try:
+            for share in shares:
+                connection, worker_connection = context.Pipe()
+                worker = context.Process(target=_parallel_sweep_worker, args=(self, share, worker_connection),
+                                         name="SweepWorker", daemon=True)
+                worker.start()
+                worker_connection.close()
+                connections.append(connection)
+                workers.append(worker)
+
+            all_players = set(player_order)
+            players_to_check = all_players
+            checking_if_finished = False
+            collected: List[Tuple[int, str]] = []
+            while players_to_check:
+                for connection in connections:
+                    connection.send((collected, players_to_check))
+                reachable_per_player: Dict[int, List[str]] = {}
+                for connection in connections:
+                    result = connection.recv()
+                    if isinstance(result, str):
+                        raise RuntimeError(f"Sweep worker failed:\n{result}")
+                    reachable_per_player.update(result)
+
+                collected = []
+                next_players_to_check = set()
+                for player in sorted(reachable_per_player, key=player_order.__getitem__):
+                    for location_name in reachable_per_player[player]:
+                        advancement = self.multiworld.get_location(location_name, player)
+                        self.advancements.add(advancement)
+                        item = advancement.item
+                        assert isinstance(item, Item), "tried to collect advancement Location with no Item"
+                        collected.append((player, location_name))
+                        if self.collect(item, True, advancement):
+                            next_players_to_check.add(item.player)
+
+                # same check for a finished sweep as in _sweep_for_advancements_impl
+                if not next_players_to_check:
+                    if not checking_if_finished:
+                        checking_if_finished = True
+                        next_players_to_check = all_players
+                else:
+                    checking_if_finished = False
+
+                players_to_check = next_players_to_check
+
+                if yield_each_sweep:
+                    yield
+        finally:
+            for connection in connections:
+                try:
+                    connection.send(None)
+                except OSError:
+                    pass
+                connection.close()
+            for worker in workers:
+                worker.join(1)
+                if worker.is_alive():
+                    worker.terminate()
+
     @overload
     def sweep_for_advancements(self, locations: Optional[Iterable[Location]] = None, *,
                                yield_each_sweep: Literal[True],
@@ -978,26 +1442,31 @@ class CollectionState():
             advancements_per_player = list(advancements_per_player_dict.items())
             del advancements_per_player_dict
 
+        if self._use_parallel_sweep(advancements_per_player):
+            sweep_impl = self._sweep_for_advancements_parallel_impl
+        else:
+            sweep_impl = self._sweep_for_advancements_impl
+
         if yield_each_sweep:
             # Return a generator that will yield at the end of each sweep iteration.
-            return self._sweep_for_advancements_impl(advancements_per_player, True)
+            return sweep_impl(advancements_per_player, True)
         else:
             # Create the generator, but tell it not to yield anything, so it will run to completion in zero iterations
             # once started, then start and exhaust the generator by attempting to iterate it.
-            for _ in self._sweep_for_advancements_impl(advancements_per_player, False):
+            for _ in sweep_impl(advancements_per_player, False):
                 assert False, "Generator yielded when it should have run to completion without yielding"
             return None
 
     # item name related
     def has(self, item: str, player: int, count: int = 1) -> bool:
-        return self.prog_items[player][item] >= count
+        return self._prog_items.current[player][item] >= count
 
     # for loops are specifically used in all/any/count methods, instead of all()/any()/sum(), to avoid the overhead of
     # creating and iterating generator instances. In `return all(player_prog_items[item] for item in items)`, the
     # argument to all() would be a new generator instance, for example.
     def has_all(self, items: Iterable[str], player: int) -> bool:
         """Returns True if each item name of items is in state at least once."""
-        player_prog_items = self.prog_items[player]
+        player_prog_items = self._prog_items.current[player]
         for item in items:
             if not player_prog_items[item]:
                 return False
@@ -1005,7 +1474,7 @@ class CollectionState():
 
     def has_any(self, items: Iterable[str], player: int) -> bool:
         """Returns True if at least one item name of items is in state at least once."""
-        player_prog_items = self.prog_items[player]
+        player_prog_items = self._prog_items.current[player]
         for item in items:
             if player_prog_items[item]:
                 return True
@@ -1013,7 +1482,7 @@ class CollectionState():
 
     def has_all_counts(self, item_counts: Mapping[str, int], player: int) -> bool:
         """Returns True if each item name is in the state at least as many times as specified."""
-        player_prog_items = self.prog_items[player]
+        player_prog_items = self._prog_items.current[player]
         for item, count in item_counts.items():
             if player_prog_items[item] < count:
                 return False
@@ -1021,19 +1490,19 @@ class CollectionState():
 
     def has_any_count(self, item_counts: Mapping[str, int], player: int) -> bool:
         """Returns True if at least one item name is in the state at least as many times as specified."""
-        player_prog_items = self.prog_items[player]
+        player_prog_items = self._prog_items.current[player]
         for item, count in item_counts.items():
             if player_prog_items[item] >= count:
                 return True
         return False
 
     def count(self, item: str, player: int) -> int:
-        return self.prog_items[player][item]
+        return self._prog_items.current[player][item]
 
     def has_from_list(self, items: Iterable[str], player: int, count: int) -> bool:
         """Returns True if the state contains at least `count` items matching any of the item names from a list."""
         found: int = 0
-        player_prog_items = self.prog_items[player]
+        player_prog_items = self._prog_items.current[player]
         for item_name in items:
             found += player_prog_items[item_name]
             if found >= count:
@@ -1044,7 +1513,7 @@ class CollectionState():
         """Returns True if the state contains at least `count` items matching any of the item names from a list.
         Ignores duplicates of the same item."""
         found: int = 0
-        player_prog_items = self.prog_items[player]
+        player_prog_items = self._prog_items.current[player]
         for item_name in items:
             found += player_prog_items[item_name] > 0
             if found >= count:
@@ -1053,7 +1522,7 @@ class CollectionState():
 
     def count_from_list(self, items: Iterable[str], player: int) -> int:
         """Returns the cumulative count of items from a list present in state."""
-        player_prog_items = self.prog_items[player]
+        player_prog_items = self._prog_items.current[player]
         total = 0
         for item_name in items:
             total += player_prog_items[item_name]
@@ -1061,7 +1530,7 @@ class CollectionState():
 
     def count_from_list_unique(self, items: Iterable[str], player: int) -> int:
         """Returns the cumulative count of items from a list present in state. Ignores duplicates of the same item."""
-        player_prog_items = self.prog_items[player]
+        player_prog_items = self._prog_items.current[player]
         total = 0
         for item_name in items:
             if player_prog_items[item_name] > 0:
@@ -1072,7 +1541,7 @@ class CollectionState():
     def has_group(self, item_name_group: str, player: int, count: int = 1) -> bool:
         """Returns True if the state contains at least `count` items present in a specified item group."""
         found: int = 0
-        player_prog_items = self.prog_items[player]
+        player_prog_items = self._prog_items.current[player]
         for item_name in self.multiworld.worlds[player].item_name_groups[item_name_group]:
             found += player_prog_items[item_name]
             if found >= count:
@@ -1084,7 +1553,7 @@ class CollectionState():
         Ignores duplicates of the same item.
         """
         found: int = 0
-        player_prog_items = self.prog_items[player]
+        player_prog_items = self._prog_items.current[player]
         for item_name in self.multiworld.worlds[player].item_name_groups[item_name_group]:
             found += player_prog_items[item_name] > 0
             if found >= count:
@@ -1093,7 +1562,7 @@ class CollectionState():
 
     def count_group(self, item_name_group: str, player: int) -> int:
         """Returns the cumulative count of items from an item group present in state."""
-        player_prog_items = self.prog_items[player]
+        player_prog_items = self._prog_items.current[player]
         return sum(
             player_prog_items[item_name]
             for item_name in self.multiworld.worlds[player].item_name_groups[item_name_group]
@@ -1102,7 +1571,7 @@ class CollectionState():
     def count_group_unique(self, item_name_group: str, player: int) -> int:
         """Returns the cumulative count of items from an item group present in state.
         Ignores duplicates of the same item."""
-        player_prog_items = self.prog_items[player]
+        player_prog_items = self._prog_items.current[player]
         return sum(
             player_prog_items[item_name] > 0
             for item_name in self.multiworld.worlds[player].item_name_groups[item_name_group]
@@ -1139,8 +1608,20 @@ class CollectionState():
             # invalidate caches, nothing can be trusted anymore now
             self.reachable_regions[item.player] = set()
             self.blocked_connections[item.player] = set()
+            self.dependent_connections.pop(item.player, None)
             self.stale[item.player] = True
 
+    def restore_reachable_regions(self, player: int, state: CollectionState) -> None:
+        """
+        Replaces the reachable regions of a player with those of state, which must not have any item this state doesn't
+        have, so that the next region update continues from them instead of from scratch after remove().
+        """
+        self.reachable_regions[player] = state._reachable_regions.current[player].copy()
+        self.blocked_connections[player] = state._blocked_connections.current[player].copy()
+        # the items read by the blocked connections might differ from those of state, so they all get retested
+        self.dependent_connections.pop(player, None)
+        self.stale[player] = True
+
     def remove_item(self, item: str, player: int, count: int = 1) -> None:
         """
         Removes the item from state.
@@ -1169,6 +1650,138 @@ class CollectionState():
             self.prog_items[player][item] = count
 
 
+class SphereAnalysis:
+    """
+    Logical spheres of a multiworld's final item placement, computed once after fill and progression balancing and
+    shared by the accessibility check, the multidata spheres, the spoiler playthrough and worlds, through
+    `MultiWorld.sphere_analysis`. Items must not be moved anymore once it has been created.
+    """
+    multiworld: MultiWorld
+    spheres: List[Set[Location]]
+    """All reachable locations, filled or not, for each logical sphere."""
+    location_sphere: Dict[Location, int]
+    """Index into spheres for each reachable location."""
+    unreachable: Set[Location]
+    state: CollectionState
+    """State with the items of all reachable locations collected."""
+
+    _sendable_spheres: Optional[List[Set[Location]]] = None
+    _sendable_spheres_lock: threading.Lock
+
+    def __init__(self, multiworld: MultiWorld) -> None:
+        self.multiworld = multiworld
+        self.spheres = []
+        self.location_sphere = {}
+        self._sendable_spheres_lock = threading.Lock()
+        state = CollectionState(multiworld)
+        locations = set(multiworld.get_locations())
+        while locations:
+            sphere = {location for location in locations if location.can_reach(state)}
+            if not sphere:
+                break
+            for location in sphere:
+                self.location_sphere[location] = len(self.spheres)
+                if location.item:
+                    state.collect(location.item, True, location)
+            self.spheres.append(sphere)
+            locations -= sphere
+        self.unreachable = locations
+        self.state = state
+
+    @property
+    def beatable(self) -> bool:
+        return self.multiworld.has_beaten_game(self.state)
+
+    def get_spheres(self) -> Iterator[Set[Location]]:
+        """Same as `MultiWorld.get_spheres`, yields a set of filled locations for each logical sphere."""
+        for sphere in self.spheres:
+            filled_sphere = {location for location in sphere if location.item}
+            if not filled_sphere:
+                # only unfilled locations were left, which don't unlock anything
+                break
+            yield filled_sphere
+        unreachable = {location for location in self.unreachable if location.item}
+        if unreachable:
+            yield set()
+            yield unreachable
+
+    @property
+    def sendable_spheres(self) -> List[Set[Location]]:
+        """Result of `MultiWorld.get_sendable_spheres`, computed on first use."""
+        with self._sendable_spheres_lock:
+            if self._sendable_spheres is None:
+                self._sendable_spheres = list(self.walk_sendable_spheres(self.multiworld))
+            return self._sendable_spheres
+
+    @staticmethod
+    def walk_sendable_spheres(multiworld: MultiWorld) -> Iterator[Set[Location]]:
+        """
+        Walks the spheres of multiserver sendable locations, collecting events as soon as they are reachable.
+        See `MultiWorld.get_sendable_spheres`.
+        """
+        state = CollectionState(multiworld)
+        locations: Set[Location] = set()
+        events: Set[Location] = set()
+        for location in multiworld.get_filled_locations():
+            if type(location.item.code) is int and type(location.address) is int:
+                locations.add(location)
+            else:
+                events.add(location)
+
+        while locations:
+            sphere: Set[Location] = set()
+
+            # cull events out
+            done_events: Set[Union[Location, None]] = {None}
+            while done_events:
+                done_events = set()
+                for event in events:
+                    if event.can_reach(state):
+                        state.collect(event.item, True, event)
+                        done_events.add(event)
+                events -= done_events
+
+            for location in locations:
+                if location.can_reach(state):
+                    sphere.add(location)
+
+            yield sphere
+            if not sphere:
+                if locations:
+                    yield locations  # unreachable locations
+                break
+
+            for location in sphere:
+                state.collect(location.item, True, location)
+            locations -= sphere
+
+    def fulfills_accessibility(self) -> bool:
+        """Same as `MultiWorld.fulfills_accessibility` without a supplied state."""
+        multiworld = self.multiworld
+        minimal_players = {player for player, world in multiworld.worlds.items()
+                           if world.options.accessibility.current_key == "minimal"}
+        full_players = {player for player, world in multiworld.worlds.items()
+                        if world.options.accessibility.current_key == "full"}
+
+        # unreachable locations that are relevant, in the same way as in `MultiWorld.fulfills_accessibility`
+        missing = [location for location in self.unreachable
+                   if location.player in full_players or location.advancement]
+        if not missing:
+            return self.beatable
+        if self.beatable and not any(location.player in full_players or location.item.player not in minimal_players
+                                     for location in missing):
+            return True
+        if __debug__:
+            from Fill import FillError
+            raise FillError(
+                f"Could not access required locations for accessibility check. Missing: {missing}",
+                multiworld=multiworld,
+            )
+        logging.warning(f"Could not access required locations for accessibility check."
+                        f" Missing: {missing}")
+        return False
+
+
 class EntranceType(IntEnum):
     ONE_WAY = 1
     TWO_WAY = 2
@@ -1333,7 +1946,7 @@ class Region:
     def can_reach(self, state: CollectionState) -> bool:
         if state.stale[self.player]:
             state.update_reachable_regions(self.player)
-        return self in state.reachable_regions[self.player]
+        return self in state._reachable_regions.current[self.player]
 
     @property
     def hint_text(self) -> str:
@@ -1699,13 +2312,18 @@ class Spoiler:
         collection_spheres: List[Set[Location]] = []
         state = CollectionState(multiworld)
         sphere_candidates = set(prog_locations)
+        # spheres of the final placement are already known, if they have been analysed
+        analysed_spheres = iter(multiworld.sphere_analysis.spheres) if multiworld.sphere_analysis else None
         logging.debug('Building up collection spheres.')
         while sphere_candidates:
 
             # build up spheres of collection radius.
             # Everything in each sphere is independent from each other in dependencies and only depends on lower spheres
 
-            sphere = {location for location in sphere_candidates if state.can_reach(location)}
+            if analysed_spheres:
+                sphere = sphere_candidates.intersection(next(analysed_spheres, ()))
+            else:
+                sphere = {location for location in sphere_candidates if state.can_reach(location)}
 
             for location in sphere:
                 state.collect(location.item, True, location)
@@ -1733,17 +2351,7 @@ class Spoiler:
         # reducing each range of influence to the bare minimum required inside it
         required_locations = {location for sphere in collection_spheres for location in sphere}
         for num, sphere in reversed(tuple(enumerate(collection_spheres))):
-            to_delete: Set[Location] = set()
-            for location in sphere:
-                # we remove the location from required_locations to sweep from, and check if the game is still beatable
-                logging.debug('Checking if %s (Player %d) is required to beat the game.', location.item.name,
-                              location.item.player)
-                required_locations.remove(location)
-                if multiworld.can_beat_game(state_cache[num], required_locations):
-                    to_delete.add(location)
-                else:
-                    # still required, got to keep it around
-                    required_locations.add(location)
+            to_delete = self.cull_locations(state_cache[num], list(sphere), required_locations)
 
             # cull entries in spheres for spoiler walkthrough at end
             sphere -= to_delete
@@ -1805,6 +2413,49 @@ class Spoiler:
         for item in removed_precollected:
             multiworld.push_precollected(item)
 
+    def cull_locations(self, state: Optional[CollectionState], locations: List[Location],
+                       required_locations: Set[Location]) -> Set[Location]:
+        """
+        Finds the locations that are not required to beat the game from state, when only required_locations can be
+        swept, and removes them from required_locations.
+
+        The result is the same as removing each location in order and checking whether the game is still beatable,
+        but instead of sweeping from state for each location, locations are split in halves recursively, and each half
+        is checked from a state that was already swept through everything but that half. Halves that are not required
+        as a whole are removed at once.
+        """
+        multiworld = self.multiworld
+        to_delete: Set[Location] = set()
+
+        def sweep(swept_state: CollectionState, candidates: List[Location]) -> CollectionState:
+            """Continues sweeping through required_locations other than candidates, until the game is beaten."""
+            swept_state = swept_state.copy()
+            for _ in swept_state.sweep_for_advancements(required_locations.difference(candidates),
+                                                        yield_each_sweep=True,
+                                                        checked_locations=swept_state.locations_checked):
+                if multiworld.has_beaten_game(swept_state):
+                    break
+            return swept_state
+
+        def cull(swept_state: CollectionState, candidates: List[Location]) -> None:
+            """swept_state has been swept through all required_locations other than candidates."""
+            if multiworld.has_beaten_game(swept_state):
+                logging.debug('%s are not required to beat the game.',
+                              [f"{location.item.name} (Player {location.item.player})" for location in candidates])
+                required_locations.difference_update(candidates)
+                to_delete.update(candidates)
+            elif len(candidates) > 1:
+                # candidates of the first half that turn out not to be required are not swept for the second half
+                first, second = candidates[:len(candidates) // 2], candidates[len(candidates) // 2:]
+                cull(sweep(swept_state, first), first)
+                cull(sweep(swept_state, second), second)
+
+        if state is None:
+            state = CollectionState(multiworld)
+        if locations:
+            cull(sweep(state, locations), locations)
+        return to_delete
+
     def create_paths(self, state: CollectionState, collection_spheres: List[Set[Location]]) -> None:
         from itertools import zip_longest
         multiworld = self.multiworld
@@ -9,6 +9,7 @@ from Options import Accessibility
 
 from worlds.AutoWorld import call_all
 from worlds.generic.Rules import add_item_rule
+from profiling import profile_span
 
 
 class FillError(RuntimeError):
@@ -33,6 +34,113 @@ def sweep_from_pool(base_state: CollectionState, itempool: typing.Sequence[Item]
     return new_state
 
 
+class _FillLocationIndex:
+    """
+    Index over the unfilled locations of a fill_restrictive call, used to find the first location in `locations` that
+    can hold an item, without testing every location before it again for every item.
+
+    Locations are bucketed by player for single player placement, in `locations` order, for the whole fill. Filled
+    locations are only marked as such and skipped, buckets drop them once they make up half of a bucket, and
+    `locations` drops them on `compact()`. For the current maximum exploration state, each bucket remembers how far its
+    locations have been tested for reachability, and keeps the ones that were reachable, in order. Locations that were
+    unreachable are skipped until the state changes, as their item doesn't matter.
+
+    Reachability can't be kept from one maximum exploration state to the next, as items placed in a batch get swept
+    for the next one and items that failed to be placed are collected again, which can make locations reachable again.
+    """
+    def __init__(self, locations: typing.List[Location], single_player_placement: bool) -> None:
+        self.locations = locations
+        self.single_player_placement = single_player_placement
+        self.filled: typing.Set[Location] = set()
+        self.orders: typing.Dict[typing.Optional[int], typing.List[Location]] = {}
+        self.filled_in_order: typing.Dict[typing.Optional[int], int] = {}
+        self.scanned: typing.Dict[typing.Optional[int], int] = {}
+        self.candidates: typing.Dict[typing.Optional[int], typing.List[Location]] = {}
+        self.state: typing.Optional[CollectionState] = None
+
+    def __len__(self) -> int:
+        """Number of locations that are not filled yet."""
+        return len(self.locations) - len(self.filled)
+
+    def _order(self, key: typing.Optional[int]) -> typing.List[Location]:
+        order = self.orders.get(key)
+        if order is None:
+            filled = self.filled
+            order = self.orders[key] = [location for location in self.locations
+                                        if (key is None or location.player == key) and location not in filled]
+            self.filled_in_order[key] = 0
+        return order
+
+    def set_state(self, state: CollectionState) -> None:
+        """Invalidate reachability information, if the maximum exploration state changed."""
+        if state is self.state:
+            return
+        self.state = state
+        filled = self.filled
+        for key, order in self.orders.items():
+            if self.filled_in_order[key] * 2 > len(order):
+                self.orders[key] = [location for location in order if location not in filled]
+                self.filled_in_order[key] = 0
+        self.scanned.clear()
+        self.candidates.clear()
+
+    def take(self, location: Location) -> None:
+        """Marks a location as getting filled, it is removed from `locations` by `compact()`."""
+        self.filled.add(location)
+        for key in (None, location.player):
+            if key in self.filled_in_order:
+                self.filled_in_order[key] += 1
+
+    def compact(self) -> None:
+        """Removes the filled locations from `locations`."""
+        if self.filled:
+            filled = self.filled
+            self.locations[:] = [location for location in self.locations if location not in filled]
+            self.filled = set()
+            self.orders.clear()
+            self.filled_in_order.clear()
+            self.scanned.clear()
+            self.candidates.clear()
+
+    def find(self, item: Item, perform_access_check: bool) -> typing.Optional[Location]:
+        """Returns the first location in `locations` order that can be filled with item, or None."""
+        state = self.state
+        key = item.player if self.single_player_placement else None
+        order = self._order(key)
+        filled = self.filled
+        if not perform_access_check:
+            for location in order:
+                if location not in filled and location.can_fill(state, item, False):
+                    return location
+            return None
+
+        candidates = self.candidates.setdefault(key, [])
+        for location in candidates:
+            if location not in filled and location.can_fill(state, item,
+                                                            location.always_allow is not Location.always_allow):
+                return location
+        # test more locations for reachability, until one of them can take the item
+        scanned = self.scanned.get(key, 0)
+        try:
+            while scanned < len(order):
+                location = order[scanned]
+                scanned += 1
+                if location in filled:
+                    continue
+                if location.always_allow is not Location.always_allow:
+                    # might be filled even while unreachable, so it has to be tested for every item
+                    candidates.append(location)
+                    if location.can_fill(state, item, True):
+                        return location
+                elif location.can_reach(state):
+                    candidates.append(location)
+                    if location.can_fill(state, item, False):
+                        return location
+        finally:
+            self.scanned[key] = scanned
+        return None
+
+
 def fill_restrictive(multiworld: MultiWorld, base_state: CollectionState, locations: typing.List[Location],
                      item_pool: typing.List[Item], single_player_placement: bool = False, lock: bool = False,
                      swap: bool = True, on_place: typing.Optional[typing.Callable[[Location], None]] = None,
@@ -62,8 +170,17 @@ def fill_restrictive(multiworld: MultiWorld, base_state: CollectionState, locati
     # for progress logging
     total = min(len(item_pool), len(locations))
     placed = 0
-
-    while any(reachable_items.values()) and locations:
+    swaps = 0
+    sweeps = 0
+    fill_span = profile_span(multiworld, f"fill_restrictive {name}", "fill",
+                             items=len(item_pool), locations=len(locations))
+    location_index = _FillLocationIndex(locations, single_player_placement)
+    # base_state swept through the filled locations, kept up to date for every batch. Reachability only grows with more
+    # items and filled locations, so it is a lower bound of every maximum exploration state to come, which can be swept
+    # from it, instead of sweeping all filled locations from base_state again. Swapping items invalidates it.
+    swept_base_state: typing.Optional[CollectionState] = None
+
+    while any(reachable_items.values()) and location_index:
         if one_item_per_player:
             # grab one item per player
             items_to_place = [items.pop()
@@ -82,15 +199,19 @@ def fill_restrictive(multiworld: MultiWorld, base_state: CollectionState, locati
                     del item_pool[-p]
                     break
 
-        maximum_exploration_state = sweep_from_pool(
-            base_state, item_pool + unplaced_items, multiworld.get_filled_locations(item.player)
-            if single_player_placement else None)
+        sweep_locations = multiworld.get_filled_locations(item.player) if single_player_placement else None
+        if swept_base_state is None:
+            swept_base_state = base_state.copy()
+        swept_base_state.sweep_for_advancements(locations=sweep_locations)
+        maximum_exploration_state = sweep_from_pool(swept_base_state, item_pool + unplaced_items, sweep_locations)
+        sweeps += 1
 
         has_beaten_game = multiworld.has_beaten_game(maximum_exploration_state)
+        location_index.set_state(maximum_exploration_state)
 
         while items_to_place:
             # if we have run out of locations to fill,break out of this loop
-            if not locations:
+            if not location_index:
                 unplaced_items += items_to_place
                 break
             item_to_place = items_to_place.pop(0)
@@ -105,14 +226,9 @@ def fill_restrictive(multiworld: MultiWorld, base_state: CollectionState, locati
             else:
                 perform_access_check = True
 
-            for i, location in enumerate(locations):
-                if (not single_player_placement or location.player == item_to_place.player) \
-                        and location.can_fill(maximum_exploration_state, item_to_place, perform_access_check):
-                    # popping by index is faster than removing by content,
-                    spot_to_fill = locations.pop(i)
-                    # skipping a scan for the element
-                    break
-
+            spot_to_fill = location_index.find(item_to_place, perform_access_check)
+            if spot_to_fill:
+                location_index.take(spot_to_fill)
             else:
                 # we filled all reachable spots.
                 if swap:
@@ -152,12 +268,14 @@ def fill_restrictive(multiworld: MultiWorld, base_state: CollectionState, locati
                                 swap_state = sweep_from_pool(previous_safe_swap_state, (placed_item,) if unsafe else (),
                                                              multiworld.get_filled_locations(item.player)
                                                              if single_player_placement else None)
+                                sweeps += 1
                                 break
                         else:
                             # No previous swap_state was usable as a base state to sweep from, so create a new one.
                             swap_state = sweep_from_pool(base_state, [placed_item, *item_pool] if unsafe else item_pool,
                                                          multiworld.get_filled_locations(item.player)
                                                          if single_player_placement else None)
+                            sweeps += 1
                             # Unsafe states should not be added to the cache because they have collected `placed_item`.
                             if not unsafe:
                                 if len(previous_safe_swap_state_cache) >= max_swap_base_state_cache_length:
@@ -176,10 +294,12 @@ def fill_restrictive(multiworld: MultiWorld, base_state: CollectionState, locati
 
                             swap_count += 1
                             swapped_items[placed_item.player, placed_item.name, unsafe] = swap_count
+                            swaps += 1
 
                             reachable_items[placed_item.player].appendleft(
                                 placed_item)
                             item_pool.append(placed_item)
+                            swept_base_state = None
 
                             # cleanup at the end to hopefully get better errors
                             cleanup_required = True
@@ -209,11 +329,14 @@ def fill_restrictive(multiworld: MultiWorld, base_state: CollectionState, locati
     if total > 1000:
         _log_fill_progress(name, placed, total)
 
+    location_index.compact()
+
     if cleanup_required:
         # validate all placements and remove invalid ones
         state = sweep_from_pool(
             base_state, [], multiworld.get_filled_locations(item.player)
             if single_player_placement else None)
+        sweeps += 1
         for placement in placements:
             if multiworld.worlds[placement.item.player].options.accessibility != "minimal" and not placement.can_reach(state):
                 placement.item.location = None
@@ -221,6 +344,8 @@ def fill_restrictive(multiworld: MultiWorld, base_state: CollectionState, locati
                 placement.item = None
                 locations.append(placement)
 
+    fill_span.end(placed=placed, unplaced=len(unplaced_items), swaps=swaps, sweeps=sweeps)
+
     if allow_excluded:
         # check if partial fill is the result of excluded locations, in which case retry
         excluded_locations = [
@@ -265,6 +390,8 @@ def remaining_fill(multiworld: MultiWorld,
     swapped_items: typing.Counter[typing.Tuple[int, str]] = Counter()
     total = min(len(itempool), len(locations))
     placed = 0
+    fill_span = profile_span(multiworld, f"remaining_fill {name}", "fill",
+                             items=len(itempool), locations=len(locations))
 
     # Optimisation: Decide whether to do full location.can_fill check (respect excluded), or only check the item rule
     if check_location_can_fill:
@@ -332,6 +459,8 @@ def remaining_fill(multiworld: MultiWorld,
     if total > 1000:
         _log_fill_progress(name, placed, total)
 
+    fill_span.end(placed=placed, unplaced=len(unplaced_items), swaps=sum(swapped_items.values()))
+
     if unplaced_items and locations:
         # There are leftover unplaceable items and locations that won't accept them
         if move_unplaceable_to_start_inventory:
@@ -768,6 +897,9 @@ def balance_multiworld_progression(multiworld: MultiWorld) -> None:
         }
         sphere_num: int = 1
         moved_item_count: int = 0
+        # Spheres following the current one, as found while balancing. They stay valid until items get moved, so the
+        # main loop and later balancing passes don't have to search unchecked_locations for them again.
+        future_spheres: typing.List[typing.Set[Location]] = []
 
         def get_sphere_locations(sphere_state: CollectionState,
                                  locations: typing.Set[Location]) -> typing.Set[Location]:
@@ -784,7 +916,10 @@ def balance_multiworld_progression(multiworld: MultiWorld) -> None:
             # Gather non-locked locations.
             # This ensures that only shuffled locations get counted for progression balancing,
             #   i.e. the items the players will be checking.
-            sphere_locations = get_sphere_locations(state, unchecked_locations)
+            if future_spheres:
+                sphere_locations = future_spheres.pop(0)
+            else:
+                sphere_locations = get_sphere_locations(state, unchecked_locations)
             for location in sphere_locations:
                 unchecked_locations.remove(location)
                 if not location.locked:
@@ -819,6 +954,7 @@ def balance_multiworld_progression(multiworld: MultiWorld) -> None:
                     balancing_reachables = reachable_locations_count.copy()
                     balancing_sphere = sphere_locations.copy()
                     candidate_items: typing.Dict[int, typing.Set[Location]] = collections.defaultdict(set)
+                    balancing_sphere_num = 0
                     while True:
                         # Check locations in the current sphere and gather progression items to swap earlier
                         for location in balancing_sphere:
@@ -832,7 +968,12 @@ def balance_multiworld_progression(multiworld: MultiWorld) -> None:
                                         location.progress_type != LocationProgressType.PRIORITY):
                                     candidate_items[player].add(location)
                                     logging.debug(f"Candidate item: {location.name}, {location.item.name}")
-                        balancing_sphere = get_sphere_locations(balancing_state, balancing_unchecked_locations)
+                        if balancing_sphere_num < len(future_spheres):
+                            balancing_sphere = future_spheres[balancing_sphere_num]
+                        else:
+                            balancing_sphere = get_sphere_locations(balancing_state, balancing_unchecked_locations)
+                            future_spheres.append(balancing_sphere)
+                        balancing_sphere_num += 1
                         for location in balancing_sphere:
                             balancing_unchecked_locations.remove(location)
                             if not location.locked:
@@ -855,25 +996,34 @@ def balance_multiworld_progression(multiworld: MultiWorld) -> None:
                         items_to_test = list(candidate_items[player])
                         items_to_test.sort()
                         multiworld.random.shuffle(items_to_test)
+                        # state with all candidates collected that are either still to be tested or to be replaced,
+                        # without sweeping, from which each tested candidate is removed
+                        candidates_state = state.copy()
+                        for location in itertools.chain((
+                                l for l in items_to_replace
+                                if l.item.player == player
+                        ), items_to_test):
+                            candidates_state.collect(location.item, True, location)
                         while items_to_test:
                             testing = items_to_test.pop()
-                            reducing_state = state.copy()
-                            for location in itertools.chain((
-                                    l for l in items_to_replace
-                                    if l.item.player == player
-                            ), items_to_test):
-                                reducing_state.collect(location.item, True, location)
+                            candidates_state.remove(testing.item)
+                            # state has none of the candidates, so its regions are still reachable without testing
+                            candidates_state.restore_reachable_regions(testing.item.player, state)
+                            candidates_state.locations_checked.discard(testing)
+                            reducing_state = candidates_state.copy()
 
                             reducing_state.sweep_for_advancements(locations=locations_to_test)
 
                             if multiworld.has_beaten_game(balancing_state):
                                 if not multiworld.has_beaten_game(reducing_state):
                                     items_to_replace.append(testing)
+                                    candidates_state.collect(testing.item, True, testing)
                             else:
                                 reduced_sphere = get_sphere_locations(reducing_state, locations_to_test)
                                 p = item_percentage(player, reachable_locations_count[player] + len(reduced_sphere))
                                 if p < threshold_percentages[player]:
                                     items_to_replace.append(testing)
+                                    candidates_state.collect(testing.item, True, testing)
 
                     old_moved_item_count = moved_item_count
 
@@ -902,6 +1052,7 @@ def balance_multiworld_progression(multiworld: MultiWorld) -> None:
 
                     if old_moved_item_count < moved_item_count:
                         logging.debug(f"Moved {moved_item_count} items so far\n")
+                        future_spheres.clear()
                         unlocked = {fresh for player in balancing_players for fresh in unlocked_locations[player]}
                         for location in get_sphere_locations(state, unlocked):
                             unchecked_locations.remove(location)
@@ -51,6 +51,11 @@ def mystery_argparse(argv: list[str] | None = None):
                         help="List of options that can be set manually. Can be combined, for example \"bosses, items\"")
     parser.add_argument("--skip_prog_balancing", action="store_true",
                         help="Skip progression balancing step during generation.")
+    parser.add_argument("--sweep_processes", type=int, default=defaults.sweep_processes,
+                        help="Number of worker processes large sweeps may use to test reachability in parallel.")
+    parser.add_argument("--profile", action="store_true",
+                        help="Write a timing profile of the generation phases and worlds as a Chrome trace event "
+                             "JSON file next to the output, which can be opened in flamegraph tools like Perfetto.")
     parser.add_argument("--skip_output", action="store_true",
                         help="Skips generation assertion and output stages and skips multidata and spoiler output. "
                              "Intended for debugging and testing purposes.")
@@ -16,6 +16,7 @@ from Fill import FillError, balance_multiworld_progression, distribute_items_res
 from NetUtils import convert_to_base_types
 from Options import StartInventoryPool
 from Utils import __version__, output_path, restricted_dumps, version_tuple
+from profiling import GenerationProfile, profile_span, profiled
 from settings import get_settings
 from worlds import AutoWorld
 from worlds.generic.Rules import exclusion_rules, locality_rules
@@ -35,9 +36,21 @@ def main(args, seed=None, baked_server_options: dict[str, object] | None = None)
     # initialize the multiworld
     multiworld = MultiWorld(args.multi)
 
-    logger = logging.getLogger()
     multiworld.set_seed(seed, args.race, str(args.outputname) if args.outputname else None)
     multiworld.plando_options = args.plando
+    multiworld.sweep_processes = args.sweep_processes
+    if args.profile:
+        multiworld.profile = GenerationProfile()
+    try:
+        with profile_span(multiworld, "Main.main", "main", seed=multiworld.seed_name, players=multiworld.players):
+            return generate(multiworld, args, start, baked_server_options)
+    finally:
+        # also write the profile of a failed generation, to see where it failed
+        write_profile(multiworld)
+
+
+def generate(multiworld: MultiWorld, args, start: float, baked_server_options: dict[str, object]) -> MultiWorld:
+    logger = logging.getLogger()
     multiworld.game = args.game.copy()
     multiworld.player_name = args.name.copy()
     multiworld.sprite = args.sprite.copy()
@@ -185,9 +198,10 @@ def main(args, seed=None, baked_server_options: dict[str, object] | None = None)
         multiworld._all_state = None
 
     logger.info("Running Item Plando.")
-    resolve_early_locations_for_planned(multiworld)
-    distribute_planned_blocks(multiworld, [x for player in multiworld.plando_item_blocks
-                                           for x in multiworld.plando_item_blocks[player]])
+    with profile_span(multiworld, "item plando"):
+        resolve_early_locations_for_planned(multiworld)
+        distribute_planned_blocks(multiworld, [x for player in multiworld.plando_item_blocks
+                                               for x in multiworld.plando_item_blocks[player]])
 
     logger.info('Running Pre Main Fill.')
 
@@ -195,15 +209,17 @@ def main(args, seed=None, baked_server_options: dict[str, object] | None = None)
 
     logger.info(f'Filling the multiworld with {len(multiworld.itempool)} items.')
 
-    if multiworld.algorithm == 'flood':
-        flood_items(multiworld)  # different algo, biased towards early game progress items
-    elif multiworld.algorithm == 'balanced':
-        distribute_items_restrictive(multiworld, get_settings().generator.panic_method)
+    with profile_span(multiworld, "main fill", algorithm=multiworld.algorithm):
+        if multiworld.algorithm == 'flood':
+            flood_items(multiworld)  # different algo, biased towards early game progress items
+        elif multiworld.algorithm == 'balanced':
+            distribute_items_restrictive(multiworld, get_settings().generator.panic_method)
 
     AutoWorld.call_all(multiworld, 'post_fill')
 
     if multiworld.players > 1 and not args.skip_prog_balancing:
-        balance_multiworld_progression(multiworld)
+        with profile_span(multiworld, "progression balancing"):
+            balance_multiworld_progression(multiworld)
     else:
         logger.info("Progression balancing skipped.")
 
@@ -217,10 +233,14 @@ def main(args, seed=None, baked_server_options: dict[str, object] | None = None)
     logger.info(f'Beginning output...')
     outfilebase = 'AP_' + multiworld.seed_name
 
+    # the spheres are only analysed once an output needs them, which a spoiler without playthrough doesn't
+    multiworld.final_placement = True
+
     if args.spoiler_only:
         if args.spoiler > 1:
             logger.info('Calculating playthrough.')
-            multiworld.spoiler.create_playthrough(create_paths=args.spoiler > 2)
+            with profile_span(multiworld, "playthrough"):
+                multiworld.spoiler.create_playthrough(create_paths=args.spoiler > 2)
 
         multiworld.spoiler.to_file(output_path('%s_Spoiler.txt' % outfilebase))
         logger.info('Done. Skipped multidata modification. Total time: %s', time.perf_counter() - start)
@@ -231,7 +251,8 @@ def main(args, seed=None, baked_server_options: dict[str, object] | None = None)
         output_players = [player for player in multiworld.player_ids if AutoWorld.World.generate_output.__code__
                           is not multiworld.worlds[player].generate_output.__code__]
         with concurrent.futures.ThreadPoolExecutor(len(output_players) + 2) as pool:
-            check_accessibility_task = pool.submit(multiworld.fulfills_accessibility)
+            check_accessibility_task = pool.submit(profiled(multiworld, "accessibility check", "output",
+                                                            multiworld.fulfills_accessibility))
 
             output_file_futures = [pool.submit(AutoWorld.call_stage, multiworld, "generate_output", temp_dir)]
             for player in output_players:
@@ -356,7 +377,8 @@ def main(args, seed=None, baked_server_options: dict[str, object] | None = None)
                     f.write(bytes([3]))  # version of format
                     f.write(serialized_multidata)
 
-            output_file_futures.append(pool.submit(write_multidata))
+            output_file_futures.append(pool.submit(profiled(multiworld, "write_multidata", "output",
+                                                            write_multidata)))
             if not check_accessibility_task.result():
                 if not multiworld.can_beat_game():
                     raise FillError("Game appears as unbeatable. Aborting.", multiworld=multiworld)
@@ -371,17 +393,27 @@ def main(args, seed=None, baked_server_options: dict[str, object] | None = None)
 
         if args.spoiler > 1:
             logger.info('Calculating playthrough.')
-            multiworld.spoiler.create_playthrough(create_paths=args.spoiler > 2)
+            with profile_span(multiworld, "playthrough"):
+                multiworld.spoiler.create_playthrough(create_paths=args.spoiler > 2)
 
         if args.spoiler:
-            multiworld.spoiler.to_file(os.path.join(temp_dir, '%s_Spoiler.txt' % outfilebase))
+            with profile_span(multiworld, "spoiler"):
+                multiworld.spoiler.to_file(os.path.join(temp_dir, '%s_Spoiler.txt' % outfilebase))
 
         zipfilename = output_path(f"AP_{multiworld.seed_name}.zip")
         logger.info(f"Creating final archive at {zipfilename}")
-        with zipfile.ZipFile(zipfilename, mode="w", compression=zipfile.ZIP_DEFLATED,
-                             compresslevel=9) as zf:
+        with profile_span(multiworld, "zip"), \
+                zipfile.ZipFile(zipfilename, mode="w", compression=zipfile.ZIP_DEFLATED, compresslevel=9) as zf:
             for file in os.scandir(temp_dir):
                 zf.write(file.path, arcname=file.name)
 
     logger.info('Done. Enjoy. Total Time: %s', time.perf_counter() - start)
     return multiworld
+
+
+def write_profile(multiworld: MultiWorld) -> None:
+    """Writes the profile of a generation next to its output, if it was profiled."""
+    if multiworld.profile:
+        path = output_path(f"AP_{multiworld.seed_name}_profile.json")
+        multiworld.profile.write(path)
+        logging.info(f"Wrote generation profile to {path}, it can be opened in https://ui.perfetto.dev")
@@ -13,6 +13,7 @@ import itertools
 import logging
 import math
 import operator
+import os
 import pickle
 import random
 import shlex
@@ -139,6 +140,58 @@ def get_saving_second(seed_name: str, interval: int = 60) -> int:
     return int(hashlib.sha256(seed_name.encode()).hexdigest(), 16) % interval
 
 
+save_delta_keys = frozenset(("save_generation", "received_items", "location_checks", "hints", "stored_data"))
+"""Keys of a save delta that only hold changes. All other keys are copied into the save as they are."""
+
+
+def index_spheres(spheres: typing.List[typing.Dict[int, typing.Set[int]]]) -> typing.Dict[int, typing.Dict[int, int]]:
+    """Sphere number of each location of the multidata's spheres, by player and location id."""
+    location_spheres: typing.Dict[int, typing.Dict[int, int]] = {}
+    for number in reversed(range(len(spheres))):  # the first sphere of a location wins
+        for player, locations in spheres[number].items():
+            location_spheres.setdefault(player, {}).update(dict.fromkeys(locations, number))
+    return location_spheres
+
+
+def apply_save_journal(savedata: typing.Dict[str, typing.Any],
+                       journal: typing.Iterable[typing.Dict[str, typing.Any]]) -> int:
+    """Applies journaled save deltas, in order, to the save they were made for.
+    Deltas of other snapshots, which are already included in a newer snapshot, are skipped.
+    Returns how many deltas were applied."""
+    applied = 0
+    for delta in journal:
+        if delta["save_generation"] != savedata.get("save_generation", 0):
+            continue
+        for key, (start, items) in delta["received_items"].items():
+            savedata["received_items"].setdefault(key, [])[start:] = items
+        for team_slot, locations in delta["location_checks"].items():
+            savedata["location_checks"].setdefault(team_slot, set()).update(locations)
+        savedata["hints"].update(delta["hints"])
+        savedata["stored_data"].update(delta["stored_data"])
+        for key, value in delta.items():
+            if key not in save_delta_keys:
+                savedata[key] = value
+        applied += 1
+    return applied
+
+
+def read_save_journal(filename: str) -> typing.Iterator[typing.Dict[str, typing.Any]]:
+    """Reads the save deltas of a journal file, ignoring an entry that was cut off while being written."""
+    try:
+        with open(filename, "rb") as f:
+            data = f.read()
+    except FileNotFoundError:
+        return
+    position = 0
+    while position + 4 <= len(data):
+        length = int.from_bytes(data[position:position + 4], "big")
+        position += 4
+        if position + length > len(data):
+            break
+        yield restricted_loads(zlib.decompress(data[position:position + length]))
+        position += length
+
+
 class Client(Endpoint):
     __slots__ = (
         "__weakref__",
@@ -212,6 +265,61 @@ class Client(Endpoint):
 team_slot = typing.Tuple[int, int]
 
 
+class LazyGameTables(dict):
+    """Tables of data of games, each built on the first access of its game."""
+
+    def __init__(self, build: typing.Callable[[str], typing.Any], games: typing.Container[str]) -> None:
+        super().__init__()
+        self.build = build
+        self.games = games
+
+    def __missing__(self, game: str) -> typing.Any:
+        table = self[game] = self.build(game)
+        return table
+
+    def __contains__(self, game: object) -> bool:
+        return super().__contains__(game) or game in self.games
+
+
+class SeedData(typing.NamedTuple):
+    """Parts of a multidata that don't change while it's hosted, which Contexts hosting the same seed can share.
+    Must not be modified."""
+    multidata: MultiData  # without its locations
+    locations: LocationStore
+    er_hint_data: typing.Dict[int, typing.Dict[int, str]]
+    location_spheres: typing.Dict[int, typing.Dict[int, int]]
+    data_packages: typing.Dict[str, typing.Dict[str, typing.Any]]  # embedded data packages without their groups
+    item_name_groups: typing.Dict[str, typing.Dict[str, typing.Any]]
+    location_name_groups: typing.Dict[str, typing.Dict[str, typing.Any]]
+
+    @classmethod
+    def parse(cls, decoded_obj: MultiData, game_data_packages: typing.Dict[str, typing.Any]) -> SeedData:
+        """Parses a decoded multidata, using the given data packages instead of the embedded ones of their games."""
+        data_packages = {}
+        item_name_groups = {}
+        location_name_groups = {}
+        for game_name, data in decoded_obj.get("datapackage", {}).items():
+            if game_name in game_data_packages:
+                data = game_data_packages[game_name]
+            item_name_groups[game_name] = data["item_name_groups"]
+            if "location_name_groups" in data:
+                location_name_groups[game_name] = data["location_name_groups"]
+            # remove groups from data package, but keep them in the name groups
+            data_packages[game_name] = {key: value for key, value in data.items()
+                                        if key not in ("item_name_groups", "location_name_groups")}
+
+        return cls(
+            decoded_obj,
+            LocationStore(decoded_obj.pop("locations")),  # pre-emptively free memory
+            {int(player): {int(address): name for address, name in loc_data.items()}
+             for player, loc_data in decoded_obj["er_hint_data"].items()},
+            index_spheres(decoded_obj.get("spheres", [])),
+            data_packages,
+            item_name_groups,
+            location_name_groups,
+        )
+
+
 class Context:
     dumper = staticmethod(encode)
     loader = staticmethod(decode)
@@ -225,7 +333,8 @@ class Context:
                       "collect_mode": str,
                       "countdown_mode": str,
                       "item_cheat": bool,
-                      "compatibility": int}
+                      "compatibility": int,
+                      "set_reply_delay": int}
     # team -> slot id -> list of clients authenticated to slot.
     clients: typing.Dict[int, typing.Dict[int, typing.List[Client]]]
     endpoints: list[Client]
@@ -234,6 +343,8 @@ class Context:
     hints_used: typing.Dict[typing.Tuple[int, int], int]
     groups: typing.Dict[int, typing.Set[int]]
     save_version = 2
+    save_journal_length: int = 30
+    """Journal entries that are written between full snapshots of the save."""
     stored_data: typing.Dict[str, object]
     read_data: typing.Dict[str, object]
     stored_data_notification_clients: typing.Dict[str, typing.Set[Client]]
@@ -249,18 +360,28 @@ class Context:
     non_hintable_names: typing.Dict[str, typing.AbstractSet[str]]
     spheres: typing.List[typing.Dict[int, typing.Set[int]]]
     """ each sphere is { player: { location_id, ... } } """
+    location_spheres: typing.Dict[int, typing.Dict[int, int]]
+    """ sphere number by player and location_id, see index_spheres """
+    encoded_game_packages: typing.Dict[str, str]
+    """Encoded data packages of games by checksum, may be shared by contexts hosting the same seed."""
     logger: logging.Logger
 
     def __init__(self, host: str, port: int, server_password: str, password: str, location_check_points: int,
                  hint_cost: int, item_cheat: bool, release_mode: str = "disabled", collect_mode="disabled",
                  countdown_mode: str = "auto", remaining_mode: str = "disabled", auto_shutdown: typing.SupportsFloat = 0, 
-                 compatibility: int = 2, log_network: bool = False, logger: logging.Logger = logging.getLogger()):
+                 compatibility: int = 2, log_network: bool = False, logger: logging.Logger = logging.getLogger(),
+                 set_reply_delay: int = 0):
         self.logger = logger
         super(Context, self).__init__()
         self.slot_info = {}
         self.log_network = log_network
         self.endpoints = []
         self.clients = {}
+        # connected clients by team and tag and by team and game, to resolve the recipients of bounces
+        self.team_tag_clients: typing.Dict[typing.Tuple[int, str], typing.Set[Client]] = \
+            collections.defaultdict(set)
+        self.team_game_clients: typing.Dict[typing.Tuple[int, str], typing.Set[Client]] = \
+            collections.defaultdict(set)
         self.compatibility: int = compatibility
         self.shutdown_task = None
         self.data_filename = None
@@ -277,13 +398,23 @@ class Context:
         self.server = None
         self.countdown_timer = 0
         self.received_items = {}
+        self.new_item_slots: typing.Set[team_slot] = set()  # slots with received items not yet sent to clients
+        self.send_new_items_handle: typing.Optional[asyncio.Handle] = None
         self.start_inventory = {}
         self.name_aliases: typing.Dict[team_slot, str] = {}
+        # encoded once and spliced into Connected and RoomUpdate, players is reset when aliases change
+        self.encoded_players: typing.Optional[str] = None
+        self.encoded_slot_info: typing.Optional[str] = None
+        self.encoded_slot_data: typing.Dict[int, str] = {}
+        self.encoded_game_packages = {}
         self.location_checks = collections.defaultdict(set)
         self.hint_cost = hint_cost
         self.location_check_points = location_check_points
         self.hints_used = collections.defaultdict(int)
         self.hints: typing.Dict[team_slot, typing.Set[Hint]] = collections.defaultdict(set)
+        # hints by team, finding player and location, so that checks only recheck the hints of their locations
+        self.location_hints: typing.Dict[typing.Tuple[int, int, int], typing.Set[Hint]] = \
+            collections.defaultdict(set)
         self.release_mode: str = release_mode
         self.remaining_mode: str = remaining_mode
         self.collect_mode: str = collect_mode
@@ -303,6 +434,13 @@ class Context:
         self.auto_save_interval = 60  # in seconds
         self.auto_saver_thread: typing.Optional[threading.Thread] = None
         self.save_dirty = False
+        self.save_generation = 0  # increased with each snapshot, journal entries belong to one snapshot
+        self.save_journal_entries = self.save_journal_length  # start with a snapshot
+        # changes since the last save, to write journal entries of only what changed
+        self.saved_received_items: typing.Dict[typing.Tuple[int, int, bool], int] = {}
+        self.unsaved_location_checks: typing.Dict[team_slot, typing.Set[int]] = collections.defaultdict(set)
+        self.unsaved_hints: typing.Set[team_slot] = set()
+        self.unsaved_stored_data: typing.Set[str] = set()
         self.tags = ['AP']
         self.games: typing.Dict[int, str] = {}
         self.minimum_client_versions: typing.Dict[int, Version] = {}
@@ -312,20 +450,23 @@ class Context:
         self.random = random.Random()
         self.stored_data = {}
         self.stored_data_notification_clients = collections.defaultdict(weakref.WeakSet)
+        # milliseconds for which SetReplies to subscribers of a key are held back to be coalesced, 0 to disable
+        self.set_reply_delay = set_reply_delay
+        self.pending_set_replies: typing.Dict[str, dict] = {}
+        # per key accounting of the data storage for admins, see /datastore
+        self.stored_data_sets: typing.Counter[str] = collections.Counter()
+        self.stored_data_replies: typing.Counter[str] = collections.Counter()
+        self.stored_data_counted_since = time.monotonic()
         self.read_data = {}
         self.spheres = []
+        self.location_spheres = {}
 
         # init empty to satisfy linter, I suppose
         self.gamespackage = {}
         self.checksums = {}
         self.item_name_groups = {}
         self.location_name_groups = {}
-        self.all_item_and_group_names = {}
-        self.all_location_and_group_names = {}
-        self.item_names = collections.defaultdict(
-            lambda: Utils.KeyedDefaultDict(lambda code: f'Unknown item (ID:{code})'))
-        self.location_names = collections.defaultdict(
-            lambda: Utils.KeyedDefaultDict(lambda code: f'Unknown location (ID:{code})'))
+        self._init_name_tables()
         self.non_hintable_names = collections.defaultdict(frozenset)
 
         self._load_game_data()
@@ -344,28 +485,37 @@ class Context:
 
         for game_package in self.gamespackage.values():
             # remove groups from data sent to clients
-            del game_package["item_name_groups"]
-            del game_package["location_name_groups"]
+            game_package.pop("item_name_groups", None)
+            game_package.pop("location_name_groups", None)
 
     def _init_game_data(self):
         for game_name, game_package in self.gamespackage.items():
             if "checksum" in game_package:
                 self.checksums[game_name] = game_package["checksum"]
-            for item_name, item_id in game_package["item_name_to_id"].items():
-                self.item_names[game_name][item_id] = item_name
-            for location_name, location_id in game_package["location_name_to_id"].items():
-                self.location_names[game_name][location_id] = location_name
-            self.all_item_and_group_names[game_name] = \
-                set(game_package["item_name_to_id"]) | set(self.item_name_groups[game_name])
-            self.all_location_and_group_names[game_name] = \
-                set(game_package["location_name_to_id"]) | set(self.location_name_groups.get(game_name, []))
-
-        archipelago_item_names = self.item_names["Archipelago"]
-        archipelago_location_names = self.location_names["Archipelago"]
-        for game in [game_name for game_name in self.gamespackage if game_name != "Archipelago"]:
+        self._init_name_tables()
+
+    def _init_name_tables(self):
+        # most games of the data package aren't in the multiworld, so the tables of a game are built on first use
+        self.item_names = LazyGameTables(
+            functools.partial(self._build_names, "item", "Unknown item (ID:{})"), self.gamespackage)
+        self.location_names = LazyGameTables(
+            functools.partial(self._build_names, "location", "Unknown location (ID:{})"), self.gamespackage)
+        self.all_item_and_group_names = LazyGameTables(
+            lambda game: set(self.gamespackage[game]["item_name_to_id"]) | set(self.item_name_groups.get(game, [])),
+            self.gamespackage)
+        self.all_location_and_group_names = LazyGameTables(
+            lambda game: set(self.gamespackage[game]["location_name_to_id"]) |
+            set(self.location_name_groups.get(game, [])),
+            self.gamespackage)
+
+    def _build_names(self, kind: str, unknown_name: str, game: str) -> typing.Dict[int, str]:
+        names = Utils.KeyedDefaultDict(unknown_name.format)
+        if game in self.gamespackage:
+            names.update((code, name) for name, code in self.gamespackage[game][f"{kind}_name_to_id"].items())
+        if game != "Archipelago":
             # Add Archipelago items and locations to each data package.
-            self.item_names[game].update(archipelago_item_names)
-            self.location_names[game].update(archipelago_location_names)
+            names.update(getattr(self, f"{kind}_names")["Archipelago"])
+        return names
 
     def item_names_for_game(self, game: str) -> typing.Optional[typing.Dict[str, int]]:
         return self.gamespackage[game]["item_name_to_id"] if game in self.gamespackage else None
@@ -446,9 +596,27 @@ class Context:
         msgs = self.dumper(msgs)
         async_start(self.broadcast_send_encoded_msgs(endpoints, msgs))
 
+    def index_client(self, client: Client) -> None:
+        """Adds a connected client to the bounce indexes of its team, tags and game."""
+        for tag in set(client.tags):
+            self.team_tag_clients[client.team, tag].add(client)
+        self.team_game_clients[client.team, self.games[client.slot]].add(client)
+
+    def unindex_client(self, client: Client) -> None:
+        """Removes a client from the bounce indexes, before its team, slot or tags change."""
+        for index, key in [(self.team_tag_clients, (client.team, tag)) for tag in set(client.tags)] + \
+                          [(self.team_game_clients, (client.team, self.games.get(client.slot)))]:
+            clients = index.get(key)
+            if clients is not None:
+                clients.discard(client)
+                if not clients:
+                    del index[key]
+
     async def disconnect(self, endpoint: Client):
         if endpoint in self.endpoints:
             self.endpoints.remove(endpoint)
+        if endpoint.team is not None:
+            self.unindex_client(endpoint)
         if endpoint.slot and endpoint in self.clients[endpoint.team][endpoint.slot]:
             self.clients[endpoint.team][endpoint.slot].remove(endpoint)
         await on_client_disconnected(self, endpoint)
@@ -493,7 +661,10 @@ class Context:
 
     def _load(self, decoded_obj: MultiData, game_data_packages: typing.Dict[str, typing.Any],
               use_embedded_server_options: bool):
+        self._load_seed_data(SeedData.parse(decoded_obj, game_data_packages), use_embedded_server_options)
 
+    def _load_seed_data(self, seed_data: SeedData, use_embedded_server_options: bool):
+        decoded_obj = seed_data.multidata
         self.read_data = {}
         # there might be a better place to put this.
         self.read_data["race_mode"] = lambda: decoded_obj.get("race_mode", 0)
@@ -525,20 +696,22 @@ class Context:
             team_0[slot_id] = []
             self.player_names[0, slot_id] = slot_info.name
             self.player_name_lookup[slot_info.name] = 0, slot_id
+            # hints are rechecked as their locations are checked, so they are always up to date
             self.read_data[f"hints_{0}_{slot_id}"] = lambda local_team=0, local_player=slot_id: \
-                list(self.get_rechecked_hints(local_team, local_player))
+                list(self.hints[local_team, local_player])
             self.read_data[f"client_status_{0}_{slot_id}"] = lambda local_team=0, local_player=slot_id: \
                 self.client_game_state[local_team, local_player]
 
         self.seed_name = decoded_obj["seed_name"]
         self.random.seed(self.seed_name)
         self.connect_names = decoded_obj['connect_names']
-        self.locations = LocationStore(decoded_obj.pop("locations"))  # pre-emptively free memory
+        self.locations = seed_data.locations
         self.slot_data = decoded_obj['slot_data']
+        self.encoded_slot_info = None
+        self.encoded_slot_data = {}
         for slot, data in self.slot_data.items():
             self.read_data[f"slot_data_{slot}"] = lambda data=data: data
-        self.er_hint_data = {int(player): {int(address): name for address, name in loc_data.items()}
-                             for player, loc_data in decoded_obj["er_hint_data"].items()}
+        self.er_hint_data = seed_data.er_hint_data
 
         # load start inventory:
         for slot, item_codes in decoded_obj["precollected_items"].items():
@@ -546,6 +719,7 @@ class Context:
 
         for slot, hints in decoded_obj["precollected_hints"].items():
             self.hints[0, slot].update(hints)
+        self.index_hints()
 
         # declare slots that aren't players as done
         for slot, slot_info in self.slot_info.items():
@@ -558,16 +732,12 @@ class Context:
             self._set_options(server_options)
 
         # embedded data package
-        for game_name, data in decoded_obj.get("datapackage", {}).items():
-            if game_name in game_data_packages:
-                data = game_data_packages[game_name]
+        for game_name, data in seed_data.data_packages.items():
             self.logger.info(f"Loading embedded data package for game {game_name}")
             self.gamespackage[game_name] = data
-            self.item_name_groups[game_name] = data["item_name_groups"]
-            if "location_name_groups" in data:
-                self.location_name_groups[game_name] = data["location_name_groups"]
-                del data["location_name_groups"]
-            del data["item_name_groups"]  # remove from data package, but keep in self.item_name_groups
+            self.item_name_groups[game_name] = seed_data.item_name_groups[game_name]
+            if game_name in seed_data.location_name_groups:
+                self.location_name_groups[game_name] = seed_data.location_name_groups[game_name]
         self._init_game_data()
         for game_name, data in self.item_name_groups.items():
             self.read_data[f"item_name_groups_{game_name}"] = lambda lgame=game_name: self.item_name_groups[lgame]
@@ -576,6 +746,7 @@ class Context:
 
         # sorted access spheres
         self.spheres = decoded_obj.get("spheres", [])
+        self.location_spheres = seed_data.location_spheres
 
     # saving
 
@@ -592,16 +763,45 @@ class Context:
 
     def _save(self, exit_save: bool = False) -> bool:
         try:
-            # Does not use Utils.restricted_dumps because we'd rather make a save than not make one
-            encoded_save = pickle.dumps(self.get_save())
-            with open(self.save_filename, "wb") as f:
-                f.write(zlib.compress(encoded_save))
+            self._save_journaled(exit_save)
         except Exception as e:
             self.logger.exception(e)
             return False
         else:
             return True
 
+    def _save_journaled(self, exit_save: bool = False) -> None:
+        """Writes a snapshot of the whole save every save_journal_length saves and on exit,
+        and in between writes journal entries of the changes since the last save."""
+        if exit_save or self.save_journal_entries >= self.save_journal_length:
+            self.save_generation += 1
+            self.reset_save_delta()
+            self.save_journal_entries = self.save_journal_length  # retry the snapshot if this one fails
+            self._write_save_snapshot(self.get_save())
+            self.save_journal_entries = 0
+        else:
+            journal_entries = self.save_journal_entries
+            self.save_journal_entries = self.save_journal_length  # changes would be lost if this entry fails
+            self._write_save_journal_entry(self.get_save_delta())
+            self.save_journal_entries = journal_entries + 1
+
+    @property
+    def save_journal_filename(self) -> str:
+        return self.save_filename + ".journal"
+
+    def _write_save_snapshot(self, savedata: typing.Dict[str, typing.Any]) -> None:
+        # Does not use Utils.restricted_dumps because we'd rather make a save than not make one
+        encoded_save = zlib.compress(pickle.dumps(savedata))
+        with open(self.save_filename + ".tmp", "wb") as f:
+            f.write(encoded_save)
+        os.replace(self.save_filename + ".tmp", self.save_filename)
+        open(self.save_journal_filename, "wb").close()
+
+    def _write_save_journal_entry(self, delta: typing.Dict[str, typing.Any]) -> None:
+        encoded_delta = zlib.compress(pickle.dumps(delta))
+        with open(self.save_journal_filename, "ab") as f:
+            f.write(len(encoded_delta).to_bytes(4, "big") + encoded_delta)
+
     def init_save(self, enabled: bool = True):
         self.saving = enabled
         if self.saving:
@@ -613,7 +813,9 @@ class Context:
             try:
                 with open(self.save_filename, 'rb') as f:
                     save_data = restricted_loads(zlib.decompress(f.read()))
-                    self.set_save(save_data)
+                journal_entries = apply_save_journal(save_data, read_save_journal(self.save_journal_filename))
+                self.set_save(save_data)
+                self.save_journal_entries = journal_entries
             except FileNotFoundError:
                 self.logger.error('No save data found, starting a new game')
             except Exception as e:
@@ -651,16 +853,25 @@ class Context:
                 import atexit
                 atexit.register(self._save, True)  # make sure we save on exit too
 
-    def get_save(self) -> dict:
-        self.recheck_hints()
+    def get_save(self) -> typing.Dict[str, typing.Any]:
         d = {
             "version": self.save_version,
+            "save_generation": self.save_generation,
             "connect_names": self.connect_names,
             "received_items": self.received_items,
-            "hints_used": dict(self.hints_used),
             "hints": dict(self.hints),
             "location_checks": dict(self.location_checks),
-            "name_aliases": self.name_aliases,
+            "stored_data": self.stored_data,
+            **self.get_save_states(),
+        }
+
+        return d
+
+    def get_save_states(self) -> typing.Dict[str, typing.Any]:
+        """Parts of the save that are small enough to be written whole into every journal entry."""
+        return {
+            "hints_used": dict(self.hints_used),
+            "name_aliases": dict(self.name_aliases),
             "client_game_state": dict(self.client_game_state),
             "client_activity_timers": tuple(
                 (key, value.timestamp()) for key, value in self.client_activity_timers.items()),
@@ -668,19 +879,42 @@ class Context:
                 (key, value.timestamp()) for key, value in self.client_connection_timers.items()),
             "random_state": self.random.getstate(),
             "group_collected": dict(self.group_collected),
-            "stored_data": self.stored_data,
             "game_options": {"hint_cost": self.hint_cost, "location_check_points": self.location_check_points,
                              "server_password": self.server_password, "password": self.password,
                              "release_mode": self.release_mode,
                              "remaining_mode": self.remaining_mode, "collect_mode": self.collect_mode,
                              "countdown_mode": self.countdown_mode,
                              "item_cheat": self.item_cheat, "compatibility": self.compatibility}
+        }
 
+    def get_save_delta(self) -> typing.Dict[str, typing.Any]:
+        """Changes of the save since the last snapshot or delta, see apply_save_journal."""
+        received_items = {}
+        for key, items in list(self.received_items.items()):
+            saved = self.saved_received_items.get(key, 0)
+            if len(items) > saved:
+                received_items[key] = (saved, items[saved:])
+                self.saved_received_items[key] = len(items)
+        location_checks, self.unsaved_location_checks = self.unsaved_location_checks, collections.defaultdict(set)
+        hint_slots, self.unsaved_hints = self.unsaved_hints, set()
+        stored_data_keys, self.unsaved_stored_data = self.unsaved_stored_data, set()
+        return {
+            "save_generation": self.save_generation,
+            "received_items": received_items,
+            "location_checks": dict(location_checks),
+            "hints": {team_slot: set(self.hints[team_slot]) for team_slot in hint_slots},
+            "stored_data": {key: self.stored_data[key] for key in stored_data_keys},
+            **self.get_save_states(),
         }
 
-        return d
+    def reset_save_delta(self) -> None:
+        """Marks the current state as saved."""
+        self.saved_received_items = {key: len(items) for key, items in list(self.received_items.items())}
+        self.unsaved_location_checks = collections.defaultdict(set)
+        self.unsaved_hints = set()
+        self.unsaved_stored_data = set()
 
-    def set_save(self, savedata: dict):
+    def set_save(self, savedata: typing.Dict[str, typing.Any]):
         if self.connect_names != savedata["connect_names"]:
             raise Exception("This savegame does not appear to match the loaded multiworld.")
         if savedata["version"] > self.save_version:
@@ -690,6 +924,7 @@ class Context:
         self.hints.update(savedata["hints"])
 
         self.name_aliases.update(savedata["name_aliases"])
+        self.encoded_players = None
         self.client_game_state.update(savedata["client_game_state"])
         self.client_connection_timers.update(
             {tuple(key): datetime.datetime.fromtimestamp(value, datetime.timezone.utc) for key, value
@@ -698,6 +933,8 @@ class Context:
             {tuple(key): datetime.datetime.fromtimestamp(value, datetime.timezone.utc) for key, value
              in savedata["client_activity_timers"]})
         self.location_checks.update(savedata["location_checks"])
+        self.index_hints()
+        self.recheck_hints()  # hints of older saves may not be up to date with their location checks
         self.random.setstate(savedata["random_state"])
 
         if "game_options" in savedata:
@@ -717,6 +954,8 @@ class Context:
 
         if "stored_data" in savedata:
             self.stored_data = savedata["stored_data"]
+        self.save_generation = savedata.get("save_generation", 0)
+        self.reset_save_delta()
         # count items and slots from lists for items_handling = remote
         self.logger.info(
             f'Loaded save file with {sum([len(v) for k, v in self.received_items.items() if k[2]])} received items '
@@ -746,6 +985,7 @@ class Context:
                 new_hints.add(new_hint)
                 if hint == new_hint:
                     continue
+                self.replace_location_hint(hint_team, hint, new_hint)
                 for player in self.slot_set(hint.receiving_player) | {hint.finding_player}:
                     if changed is not None:
                         changed.add((hint_team,player))
@@ -753,16 +993,37 @@ class Context:
                         self.replace_hint(hint_team, player, hint, new_hint)
             self.hints[hint_team, hint_slot] = new_hints
 
+    def recheck_location_hints(self, team: int, slot: int, locations: typing.Iterable[int],
+                               changed: typing.Optional[typing.Set[team_slot]] = None) -> None:
+        """Refreshes only the hints for the specified locations of team/slot, such as newly checked ones.
+        If a set is passed for 'changed', each (team,slot) pair that has at least one hint modified will be added."""
+        for location in locations:
+            for hint in list(self.location_hints.get((team, slot, location), ())):
+                new_hint = hint.re_check(self, team)
+                if hint == new_hint:
+                    continue
+                for player in self.slot_set(hint.receiving_player) | {hint.finding_player}:
+                    if changed is not None:
+                        changed.add((team, player))
+                    self.replace_hint(team, player, hint, new_hint)
+
     def get_rechecked_hints(self, team: int, slot: int):
         self.recheck_hints(team, slot)
         return self.hints[team, slot]
 
+    def index_hints(self) -> None:
+        """Rebuilds location_hints from hints."""
+        self.location_hints.clear()
+        for (team, _), hints in self.hints.items():
+            for hint in hints:
+                self.location_hints[team, hint.finding_player, hint.location].add(hint)
+
     def get_sphere(self, player: int, location_id: int) -> int:
         """Get sphere of a location, -1 if spheres are not available."""
         if self.spheres:
-            for i, sphere in enumerate(self.spheres):
-                if location_id in sphere.get(player, set()):
-                    return i
+            sphere = self.location_spheres.get(player, {}).get(location_id)
+            if sphere is not None:
+                return sphere
             raise KeyError(f"No Sphere found for location ID {location_id} belonging to player {player}. "
                            f"Location or player may not exist.")
         return -1
@@ -770,6 +1031,38 @@ class Context:
     def get_players_package(self):
         return [NetworkPlayer(t, p, self.get_aliased_name(t, p), n) for (t, p), n in self.player_names.items()]
 
+    def get_encoded_players(self) -> str:
+        if self.encoded_players is None:
+            self.encoded_players = self.dumper(self.get_players_package())
+        return self.encoded_players
+
+    def get_encoded_slot_info(self) -> str:
+        if self.encoded_slot_info is None:
+            self.encoded_slot_info = self.dumper(self.slot_info)
+        return self.encoded_slot_info
+
+    def get_encoded_slot_data(self, slot: int) -> str:
+        encoded = self.encoded_slot_data.get(slot)
+        if encoded is None:
+            encoded = self.encoded_slot_data[slot] = self.dumper(self.slot_data[slot])
+        return encoded
+
+    def get_encoded_game_package(self, game: str) -> str:
+        game_package = self.gamespackage[game]
+        checksum = game_package.get("checksum")
+        if checksum is None:
+            return self.dumper(game_package)
+        encoded = self.encoded_game_packages.get(checksum)
+        if encoded is None:
+            encoded = self.encoded_game_packages[checksum] = self.dumper(game_package)
+        return encoded
+
+    def get_encoded_data_package(self, games: typing.Iterable[str]) -> str:
+        """Encoded DataPackage message of games, spliced together from their cached encodings."""
+        games_package = NetUtils.splice_encoded("{}", {game: self.get_encoded_game_package(game) for game in games})
+        data = NetUtils.splice_encoded("{}", {"games": games_package})
+        return f"[{NetUtils.splice_encoded(self.dumper({'cmd': 'DataPackage'}), {'data': data})}]"
+
     def slot_set(self, slot) -> typing.Set[int]:
         """Returns the slot IDs that concern that slot,
         as in expands groups out and returns back the input for solo."""
@@ -823,6 +1116,7 @@ class Context:
                 # we can check once if hint already exists
                 if hint not in self.hints[team, hint.finding_player]:
                     self.hints[team, hint.finding_player].add(hint)
+                    self.location_hints[team, hint.finding_player, hint.location].add(hint)
                     new_hint_events.add(hint.finding_player)
                     for player in self.slot_set(hint.receiving_player):
                         self.hints[team, player].add(hint)
@@ -841,15 +1135,21 @@ class Context:
                     async_start(self.send_msgs(client, client_hints))
 
     def get_hint(self, team: int, finding_player: int, seeked_location: int) -> typing.Optional[Hint]:
-        for hint in self.hints[team, finding_player]:
-            if hint.location == seeked_location and hint.finding_player == finding_player:
-                return hint
+        for hint in self.location_hints.get((team, finding_player, seeked_location), ()):
+            return hint
         return None
     
     def replace_hint(self, team: int, slot: int, old_hint: Hint, new_hint: Hint) -> None:
         if old_hint in self.hints[team, slot]:
             self.hints[team, slot].remove(old_hint)
             self.hints[team, slot].add(new_hint)
+        self.replace_location_hint(team, old_hint, new_hint)
+
+    def replace_location_hint(self, team: int, old_hint: Hint, new_hint: Hint) -> None:
+        location_hints = self.location_hints.get((team, old_hint.finding_player, old_hint.location))
+        if location_hints and old_hint in location_hints:
+            location_hints.remove(old_hint)
+            location_hints.add(new_hint)
     
     # "events"
 
@@ -871,11 +1171,44 @@ class Context:
         }])
 
     def on_changed_hints(self, team: int, slot: int):
+        self.unsaved_hints.add((team, slot))
         key: str = f"_read_hints_{team}_{slot}"
         targets: typing.Set[Client] = set(self.stored_data_notification_clients[key])
         if targets:
             self.broadcast(targets, [{"cmd": "SetReply", "key": key, "value": self.hints[team, slot]}])
 
+    def notify_stored_data(self, args: dict, requester: typing.Optional[Client] = None) -> None:
+        """
+        Sends a SetReply to the subscribers of its key and to the client that requested it.
+        With a set_reply_delay, the replies to subscribers within the delay are coalesced into one with the latest
+        value and the original value of the first. Requested replies are never delayed.
+        """
+        key = args["key"]
+        targets = set(self.stored_data_notification_clients[key])
+        if self.set_reply_delay and requester:
+            self.stored_data_replies[key] += 1
+            self.broadcast((requester,), [args])
+        elif requester:
+            targets.add(requester)
+        pending = self.pending_set_replies.pop(key, None)
+        if pending:
+            args["original_value"] = pending["original_value"]
+        if self.set_reply_delay:
+            if not pending:
+                asyncio.get_running_loop().call_later(self.set_reply_delay / 1000, self.flush_set_reply, key)
+            self.pending_set_replies[key] = args
+        elif targets:
+            self.stored_data_replies[key] += len(targets)
+            self.broadcast(targets, [args])
+
+    def flush_set_reply(self, key: str) -> None:
+        args = self.pending_set_replies.pop(key, None)
+        if args:
+            targets = set(self.stored_data_notification_clients[key])
+            if targets:
+                self.stored_data_replies[key] += len(targets)
+                self.broadcast(targets, [args])
+
     def on_client_status_change(self, team: int, slot: int):
         key: str = f"_read_client_status_{team}_{slot}"
         targets: typing.Set[Client] = set(self.stored_data_notification_clients[key])
@@ -884,8 +1217,8 @@ class Context:
 
 
 def update_aliases(ctx: Context, team: int):
-    cmd = ctx.dumper([{"cmd": "RoomUpdate",
-                       "players": ctx.get_players_package()}])
+    ctx.encoded_players = None
+    cmd = f"[{NetUtils.splice_encoded(ctx.dumper({'cmd': 'RoomUpdate'}), {'players': ctx.get_encoded_players()})}]"
 
     for clients in ctx.clients[team].values():
         for client in clients:
@@ -1066,20 +1399,39 @@ def get_start_inventory(ctx: Context, player: int, remote_start_inventory: bool)
 
 
 def send_new_items(ctx: Context):
-    for team, clients in ctx.clients.items():
-        for slot, clients in clients.items():
-            for client in clients:
-                if client.no_items:
-                    continue
-                start_inventory = get_start_inventory(ctx, slot, client.remote_start_inventory)
-                items = get_received_items(ctx, team, slot, client.remote_items)
-                if len(start_inventory) + len(items) > client.send_index:
-                    first_new_item = max(0, client.send_index - len(start_inventory))
-                    async_start(ctx.send_msgs(client, [{
-                        "cmd": "ReceivedItems",
-                        "index": client.send_index,
-                        "items": start_inventory[client.send_index:] + items[first_new_item:]}]))
-                    client.send_index = len(start_inventory) + len(items)
+    """Send items received by slots since the last call to their clients.
+    Calls within the same event loop tick are batched into one ReceivedItems per client."""
+    if ctx.send_new_items_handle:
+        return
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:  # no running event loop to batch in
+        flush_new_items(ctx)
+    else:
+        ctx.send_new_items_handle = loop.call_soon(flush_new_items, ctx)
+
+
+def flush_new_items(ctx: Context, team_slots: typing.Optional[typing.Iterable[team_slot]] = None):
+    """Send the items batched by send_new_items to the clients of team_slots, or of all slots."""
+    if team_slots is None:
+        ctx.send_new_items_handle = None
+        new_item_slots, ctx.new_item_slots = ctx.new_item_slots, set()
+    else:
+        new_item_slots = ctx.new_item_slots.intersection(team_slots)
+        ctx.new_item_slots -= new_item_slots
+    for team, slot in new_item_slots:
+        for client in ctx.clients.get(team, {}).get(slot, ()):
+            if client.no_items:
+                continue
+            start_inventory = get_start_inventory(ctx, slot, client.remote_start_inventory)
+            items = get_received_items(ctx, team, slot, client.remote_items)
+            if len(start_inventory) + len(items) > client.send_index:
+                first_new_item = max(0, client.send_index - len(start_inventory))
+                async_start(ctx.send_msgs(client, [{
+                    "cmd": "ReceivedItems",
+                    "index": client.send_index,
+                    "items": start_inventory[client.send_index:] + items[first_new_item:]}]))
+                client.send_index = len(start_inventory) + len(items)
 
 
 def update_checked_locations(ctx: Context, team: int, slot: int):
@@ -1123,6 +1475,7 @@ def get_remaining(ctx: Context, team: int, slot: int) -> typing.List[typing.Tupl
 
 def send_items_to(ctx: Context, team: int, target_slot: int, *items: NetworkItem):
     for target in ctx.slot_set(target_slot):
+        ctx.new_item_slots.add((team, target))
         for item in items:
             if item.player != target_slot:
                 get_received_items(ctx, team, target, False).append(item)
@@ -1164,14 +1517,17 @@ def register_location_checks(ctx: Context, team: int, slot: int, locations: typi
         del sortable
 
         ctx.location_checks[team, slot] |= new_locations
+        ctx.unsaved_location_checks[team, slot] |= new_locations
         send_new_items(ctx)
+        # the checking slot gets the items it found itself before the RoomUpdate of the checks
+        flush_new_items(ctx, ((team, slot),))
         ctx.broadcast(ctx.clients[team][slot], [{
             "cmd": "RoomUpdate",
             "hint_points": get_slot_points(ctx, team, slot),
             "checked_locations": new_locations,  # send back new checks only
         }])
         updated_slots: typing.Set[tuple[int, int]] = set()
-        ctx.recheck_hints(team, slot, updated_slots)
+        ctx.recheck_location_hints(team, slot, new_locations, updated_slots)
         for hint_team, hint_slot in updated_slots:
             ctx.on_changed_hints(hint_team, hint_slot)
         ctx.save()
@@ -1663,6 +2019,7 @@ class ClientMessageProcessor(CommonCommandProcessor):
                 new_item = NetworkItem(names[item_name], -1, self.client.slot)
                 get_received_items(self.ctx, self.client.team, self.client.slot, False).append(new_item)
                 get_received_items(self.ctx, self.client.team, self.client.slot, True).append(new_item)
+                self.ctx.new_item_slots.add((self.client.team, self.client.slot))
                 self.ctx.broadcast_text_all(
                     'Cheat console: sending "' + item_name + '" to ' + self.ctx.get_aliased_name(self.client.team,
                                                                                                  self.client.slot),
@@ -1680,9 +2037,7 @@ class ClientMessageProcessor(CommonCommandProcessor):
         points_available = get_client_points(self.ctx, self.client)
         cost = self.ctx.get_hint_cost(self.client.slot)
         if not input_text:
-            hints = {hint.re_check(self.ctx, self.client.team) for hint in
-                     self.ctx.hints[self.client.team, self.client.slot]}
-            self.ctx.hints[self.client.team, self.client.slot] = hints
+            hints = self.ctx.hints[self.client.team, self.client.slot]
             self.ctx.notify_hints(self.client.team, list(hints), recipients=(self.client.slot,))
             self.output(f"A hint costs {self.ctx.get_hint_cost(self.client.slot)} points. "
                         f"You have {points_available} points.")
@@ -1840,7 +2195,7 @@ def get_slot_points(ctx: Context, team: int, slot: int) -> int:
             ctx.get_hint_cost(slot) * ctx.hints_used[team, slot])
 
 
-async def process_client_cmd(ctx: Context, client: Client, args: dict):
+async def process_client_cmd(ctx: Context, client: Client, args: typing.Dict[str, typing.Any]):
     try:
         cmd: str = args["cmd"]
     except:
@@ -1891,6 +2246,8 @@ async def process_client_cmd(ctx: Context, client: Client, args: dict):
             await ctx.send_msgs(client, [{"cmd": "ConnectionRefused", "errors": list(errors)}])
         else:
             team, slot = ctx.connect_names[args['name']]
+            if client.team is not None:
+                ctx.unindex_client(client)
             if client.auth and client.team is not None and client.slot in ctx.clients[client.team]:
                 ctx.clients[team][slot].remove(client)  # re-auth, remove old entry
                 if client.team != team or client.slot != slot:
@@ -1905,16 +2262,17 @@ async def process_client_cmd(ctx: Context, client: Client, args: dict):
             client.no_locations = bool(client.tags & _non_game_messages.keys())
             # set NoText for old PopTracker clients that predate the tag to save traffic
             client.no_text = "NoText" in client.tags or ("PopTracker" in client.tags and client.version < (0, 5, 1))
+            ctx.index_client(client)
             connected_packet = {
                 "cmd": "Connected",
                 "team": client.team, "slot": client.slot,
-                "players": ctx.get_players_package(),
                 "missing_locations": get_missing_checks(ctx, team, slot),
                 "checked_locations": get_checked_checks(ctx, team, slot),
-                "slot_info": ctx.slot_info,
                 "hint_points": get_slot_points(ctx, team, slot),
             }
-            reply = [connected_packet]
+            # the same for every connection, so these are encoded once and spliced in
+            encoded_members = {"players": ctx.get_encoded_players(), "slot_info": ctx.get_encoded_slot_info()}
+            reply = []
             start_inventory = get_start_inventory(ctx, slot, client.remote_start_inventory)
             items = get_received_items(ctx, client.team, client.slot, client.remote_items)
             if (start_inventory or items) and not client.no_items:
@@ -1924,29 +2282,23 @@ async def process_client_cmd(ctx: Context, client: Client, args: dict):
                 client.auth = True
                 await on_client_joined(ctx, client)
             if args.get("slot_data", True):
-                connected_packet["slot_data"] = ctx.slot_data[client.slot]
-            await ctx.send_msgs(client, reply)
+                encoded_members["slot_data"] = ctx.get_encoded_slot_data(client.slot)
+            encoded_reply = [NetUtils.splice_encoded(ctx.dumper(connected_packet), encoded_members)]
+            encoded_reply.extend(ctx.dumper(msg) for msg in reply)
+            await ctx.send_encoded_msgs(client, f"[{','.join(encoded_reply)}]")
 
     elif cmd == "GetDataPackage":
         exclusions = args.get("exclusions", [])
         if "games" in args:
-            games = {name: game_data for name, game_data in ctx.gamespackage.items()
-                     if name in set(args.get("games", []))}
-            await ctx.send_msgs(client, [{"cmd": "DataPackage",
-                                          "data": {"games": games}}])
+            requested_games = set(args.get("games", []))
+            games = [name for name in ctx.gamespackage if name in requested_games]
         # TODO: remove exclusions behaviour around 0.5.0
         elif exclusions:
             exclusions = set(exclusions)
-            games = {name: game_data for name, game_data in ctx.gamespackage.items()
-                     if name not in exclusions}
-
-            package = {"games": games}
-            await ctx.send_msgs(client, [{"cmd": "DataPackage",
-                                          "data": package}])
-
+            games = [name for name in ctx.gamespackage if name not in exclusions]
         else:
-            await ctx.send_msgs(client, [{"cmd": "DataPackage",
-                                          "data": {"games": ctx.gamespackage}}])
+            games = list(ctx.gamespackage)
+        await ctx.send_encoded_msgs(client, ctx.get_encoded_data_package(games))
 
     elif client.auth:
         if cmd == "ConnectUpdate":
@@ -1974,7 +2326,9 @@ async def process_client_cmd(ctx: Context, client: Client, args: dict):
 
             if "tags" in args:
                 old_tags = client.tags
+                ctx.unindex_client(client)
                 client.tags = args["tags"]
+                ctx.index_client(client)
                 if set(old_tags) != set(client.tags):
                     client.no_locations = bool(client.tags & _non_game_messages.keys())
                     client.no_text = "NoText" in client.tags or (
@@ -2141,11 +2495,15 @@ async def process_client_cmd(ctx: Context, client: Client, args: dict):
             args["cmd"] = "Bounced"
             msg = ctx.dumper([args])
 
-            for bounceclient in ctx.endpoints:
-                if client.team == bounceclient.team and (ctx.games[bounceclient.slot] in games or
-                                                         set(bounceclient.tags) & tags or
-                                                         bounceclient.slot in slots):
-                    await ctx.send_encoded_msgs(bounceclient, msg)
+            targets: typing.Set[Client] = set()
+            for game in games:
+                targets.update(ctx.team_game_clients.get((client.team, game), ()))
+            for tag in tags:
+                targets.update(ctx.team_tag_clients.get((client.team, tag), ()))
+            for slot in slots:
+                targets.update(ctx.clients[client.team].get(slot, ()))
+            if targets:
+                await ctx.broadcast_send_encoded_msgs(targets, msg)
 
         elif cmd == "Get":
             if "keys" not in args or type(args["keys"]) != list:
@@ -2175,11 +2533,9 @@ async def process_client_cmd(ctx: Context, client: Client, args: dict):
                 func = modify_functions[operation["operation"]]
                 value = func(value, operation["value"])
             ctx.stored_data[args["key"]] = args["value"] = value
-            targets = set(ctx.stored_data_notification_clients[args["key"]])
-            if args.get("want_reply", False):
-                targets.add(client)
-            if targets:
-                ctx.broadcast(targets, [args])
+            ctx.unsaved_stored_data.add(args["key"])
+            ctx.stored_data_sets[args["key"]] += 1
+            ctx.notify_stored_data(args, client if args.get("want_reply", False) else None)
             ctx.save()
 
         elif cmd == "SetNotify":
@@ -2533,13 +2889,17 @@ class ServerCommandProcessor(CommonCommandProcessor):
         return True
 
     def _cmd_datastore(self):
-        """Debug Tool: list writable datastorage keys and approximate the size of their values with pickle."""
+        """Debug Tool: list writable datastorage keys, approximate the size of their values with pickle
+        and show how often they were set and how many SetReplies they caused."""
         total: int = 0
         texts = []
-        for key, value in self.ctx.stored_data.items():
+        minutes = max(time.monotonic() - self.ctx.stored_data_counted_since, 1) / 60
+        for key, value in sorted(self.ctx.stored_data.items(), key=lambda item: -self.ctx.stored_data_sets[item[0]]):
             size = len(pickle.dumps(value))
             total += size
-            texts.append(f"Key: {key} | Size: {size}B")
+            sets = self.ctx.stored_data_sets[key]
+            texts.append(f"Key: {key} | Size: {size}B | Sets: {sets} ({sets / minutes:.1f}/min) | "
+                         f"SetReplies: {self.ctx.stored_data_replies[key]}")
         texts.insert(0, f"Found {len(self.ctx.stored_data)} keys, "
                         f"approximately totaling {Utils.format_SI_prefix(total, power=1024)}B")
         self.output("\n".join(texts))
@@ -2631,6 +2991,9 @@ def parse_args() -> argparse.Namespace:
     #0 -> recommended for tournaments to force a level playing field, only allow an exact version match
     """)
     parser.add_argument('--log_network', default=defaults["log_network"], action="store_true")
+    parser.add_argument('--set_reply_delay', default=defaults["set_reply_delay"], type=int,
+                        help="Milliseconds for which SetReplies to subscribers of a data storage key are held back "
+                             "to coalesce them, 0 to send them immediately.")
     args = parser.parse_args()
     return args
 
@@ -2677,7 +3040,8 @@ async def main(args: argparse.Namespace):
     ctx = Context(args.host, args.port, args.server_password, args.password, args.location_check_points,
                   args.hint_cost, not args.disable_item_cheat, args.release_mode, args.collect_mode,
                   args.countdown_mode, args.remaining_mode,
-                  args.auto_shutdown, args.compatibility, args.log_network)
+                  args.auto_shutdown, args.compatibility, args.log_network,
+                  set_reply_delay=args.set_reply_delay)
     data_filename = args.multidata
 
     if not data_filename:
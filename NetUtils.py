@@ -5,6 +5,7 @@ import typing
 import enum
 import warnings
 from json import JSONEncoder, JSONDecoder
+from json.encoder import encode_basestring
 
 if typing.TYPE_CHECKING:
     from websockets import WebSocketServerProtocol as ServerConnection
@@ -135,10 +136,133 @@ _encode = JSONEncoder(
 ).encode
 
 
-def encode(obj: typing.Any) -> str:
+def _encode_scanned(obj: typing.Any) -> str:
+    """Reference encoding, converting all TypedTuples to dicts before encoding. Fallback of encode."""
     return _encode(_scan_for_TypedTuples(obj))
 
 
+def _encode_float(obj: float) -> str:
+    if obj != obj:
+        return "NaN"
+    if obj == float("inf"):
+        return "Infinity"
+    if obj == -float("inf"):
+        return "-Infinity"
+    return float.__repr__(obj)
+
+
+_leaf_encoders: typing.Dict[type, typing.Callable[[typing.Any], str]] = {
+    str: encode_basestring,
+    int: int.__repr__,
+    bool: lambda obj: "true" if obj else "false",
+    type(None): lambda obj: "null",
+    float: _encode_float,
+}
+
+
+def _encode_member(obj: typing.Any) -> str:
+    """Encode a value of a TypedTuple. Like _scan_for_TypedTuples, TypedTuples within TypedTuples stay arrays."""
+    leaf_encoder = _leaf_encoders.get(type(obj))
+    if leaf_encoder:
+        return leaf_encoder(obj)
+    return _encode(obj)
+
+
+def _encode_key(key: typing.Any) -> str:
+    if isinstance(key, str):
+        return encode_basestring(key)
+    if key is True or key is False or key is None:
+        return f'"{_leaf_encoders[type(key)](key)}"'
+    if isinstance(key, int):
+        return f'"{int.__repr__(key)}"'
+    if isinstance(key, float):
+        return f'"{_encode_float(key)}"'
+    raise TypeError(f"keys must be str, int, float, bool or None, not {key.__class__.__name__}")
+
+
+def _encode_dict(obj: typing.Mapping[typing.Any, typing.Any]) -> str:
+    return "{" + ",".join([_encode_key(key) + ":" + _encode_fast(value) for key, value in obj.items()]) + "}"
+
+
+def _encode_array(obj: typing.Iterable[typing.Any]) -> str:
+    return "[" + ",".join([_encode_fast(value) for value in obj]) + "]"
+
+
+def _make_typed_tuple_encoder(cls: typing.Type[typing.NamedTuple]) -> typing.Callable[[typing.Any], str]:
+    prefixes = [f'"{field}":' for field in cls._fields]
+    suffix = f',"class":"{cls.__name__}"}}'
+
+    def encode_typed_tuple(obj: typing.NamedTuple) -> str:
+        return "{" + ",".join([prefix + _encode_member(value) for prefix, value in zip(prefixes, obj)]) + suffix
+
+    return encode_typed_tuple
+
+
+_encode_generic_network_item = _make_typed_tuple_encoder(NetworkItem)
+
+
+def _encode_network_item(obj: NetworkItem) -> str:
+    item, location, player, flags = obj
+    if type(item) is type(location) is type(player) is type(flags) is int:
+        return (f'{{"item":{item},"location":{location},"player":{player},"flags":{flags},'
+                f'"class":"NetworkItem"}}')
+    return _encode_generic_network_item(obj)
+
+
+custom_encoders: typing.Dict[type, typing.Callable[[typing.Any], str]] = {
+    NetworkItem: _encode_network_item,
+    NetworkPlayer: _make_typed_tuple_encoder(NetworkPlayer),
+    NetworkSlot: _make_typed_tuple_encoder(NetworkSlot),
+}
+"""Encoders of types that encode has to convert, by exact type. Filled with the encoders of other types on use."""
+
+
+def _get_encoder(cls: type) -> typing.Callable[[typing.Any], str]:
+    if issubclass(cls, tuple) and hasattr(cls, "_fields"):  # NamedTuple is not actually a parent class
+        return _make_typed_tuple_encoder(cls)
+    if issubclass(cls, dict):
+        return _encode_dict
+    if issubclass(cls, (list, tuple, set, frozenset)):
+        return _encode_array
+    if issubclass(cls, str):
+        return encode_basestring
+    if issubclass(cls, int):  # IntEnum and IntFlag, bool is a leaf
+        return int.__repr__
+    if issubclass(cls, float):
+        return _encode_float
+    return _encode_scanned  # let the JSONEncoder deal with, or complain about, anything else
+
+
+def _encode_fast(obj: typing.Any) -> str:
+    encoder = custom_encoders.get(type(obj))
+    if encoder is None:
+        encoder = custom_encoders[type(obj)] = _get_encoder(type(obj))
+    return encoder(obj)
+
+
+custom_encoders.update(_leaf_encoders)
+custom_encoders.update({dict: _encode_dict, list: _encode_array, tuple: _encode_array,
+                        set: _encode_array, frozenset: _encode_array})
+
+
+def encode(obj: typing.Any) -> str:
+    """
+    Encode obj to JSON, with TypedTuples such as NetworkItem as objects with their class name.
+    Produces the same result as converting the TypedTuples first and then encoding, without copying obj.
+    """
+    return _encode_fast(obj)
+
+
+def splice_encoded(encoded_obj: str, encoded_members: typing.Mapping[str, str]) -> str:
+    """Add already encoded values as members of an encoded JSON object, without decoding or encoding them again."""
+    if not encoded_members:
+        return encoded_obj
+    members = ",".join(f"{_encode(key)}:{value}" for key, value in encoded_members.items())
+    if encoded_obj == "{}":
+        return f"{{{members}}}"
+    return f"{encoded_obj[:-1]},{members}}}"
+
+
 def get_any_version(data: dict) -> Version:
     data = {key.lower(): value for key, value in data.items()}  # .NET version classes have capitalized keys
     return Version(int(data["major"]), int(data["minor"]), int(data["build"]))
@@ -162,6 +286,12 @@ def _object_hook(o: typing.Any) -> typing.Any:
             return hook(o)
         cls = allowlist.get(o.get("class", None), None)
         if cls:
+            fields = cls._fields
+            if len(o) == len(fields) + 1:  # usually exactly the fields and the class
+                try:
+                    return cls._make([o[field] for field in fields])
+                except KeyError:
+                    pass
             for key in tuple(o):
                 if key not in cls._fields:
                     del (o[key])
@@ -170,7 +300,15 @@ def _object_hook(o: typing.Any) -> typing.Any:
     return o
 
 
-decode = JSONDecoder(object_hook=_object_hook).decode
+_decode = JSONDecoder(object_hook=_object_hook).decode
+_decode_plain = JSONDecoder().decode
+
+
+def decode(s: str) -> typing.Any:
+    """Decode JSON, with objects of allowlisted or hooked classes converted to their types."""
+    if '"class"' in s or "\\u" in s:  # a class key may also be spelled with escapes
+        return _decode(s)
+    return _decode_plain(s)
 
 
 class Endpoint:
@@ -427,20 +565,30 @@ class _LocationStore(dict, typing.MutableMapping[int, typing.Dict[int, typing.Tu
         if len(self.get(0, {})):
             raise ValueError("Invalid player id 0 for location")
 
+        # receiving player -> item -> locations, so that hints and collect only visit the matching locations
+        # entries are in order of finding player and location, like the entries of _speedups.LocationStore
+        self._receivers: typing.Dict[int, typing.Dict[int, typing.List[typing.Tuple[int, int, int, int, int]]]] = {}
+        for finding_player, check_data in sorted(self.items()):
+            for location_id, (item_id, receiving_player, item_flags) in sorted(check_data.items()):
+                self._receivers.setdefault(receiving_player, {}).setdefault(item_id, []).append(
+                    (finding_player, location_id, item_id, receiving_player, item_flags))
+
     def find_item(self, slots: typing.Set[int], seeked_item_id: int
                   ) -> typing.Generator[typing.Tuple[int, int, int, int, int], None, None]:
-        for finding_player, check_data in self.items():
-            for location_id, (item_id, receiving_player, item_flags) in check_data.items():
-                if receiving_player in slots and item_id == seeked_item_id:
-                    yield finding_player, location_id, item_id, receiving_player, item_flags
+        if len(slots) == 1:
+            for slot in slots:
+                yield from self._receivers.get(slot, {}).get(seeked_item_id, ())
+        else:
+            # yield in entry order, like _speedups.LocationStore
+            yield from sorted(entry for slot in slots
+                              for entry in self._receivers.get(slot, {}).get(seeked_item_id, ()))
 
     def get_for_player(self, slot: int) -> typing.Dict[int, typing.Set[int]]:
         import collections
         all_locations: typing.Dict[int, typing.Set[int]] = collections.defaultdict(set)
-        for source_slot, location_data in self.items():
-            for location_id, values in location_data.items():
-                if values[1] == slot:
-                    all_locations[source_slot].add(location_id)
+        for item_locations in self._receivers.get(slot, {}).values():
+            for source_slot, location_id, *_ in item_locations:
+                all_locations[source_slot].add(location_id)
         return all_locations
 
     def get_checked(self, state: typing.Dict[typing.Tuple[int, int], typing.Set[int]], team: int, slot: int
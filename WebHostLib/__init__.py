@@ -40,6 +40,9 @@ app.config["HOSTERS"] = 8  # maximum concurrent room hosters
 app.config["SELFLAUNCH"] = True  # application process is in charge of launching Rooms.
 app.config["SELFLAUNCHCERT"] = None  # can point to a SSL Certificate to encrypt Room websocket connections
 app.config["SELFLAUNCHKEY"] = None  # can point to a SSL Certificate Key to encrypt Room websocket connections
+# seconds between checks for rooms to start, in case a request could not wake up autohost.
+# Rooms requested by web workers on the same machine as autohost start right away.
+app.config["AUTOHOST_POLL_INTERVAL"] = 5
 app.config["SELFGEN"] = True  # application process is in charge of scheduling Generations.
 # at what amount of worlds should scheduling be used, instead of rolling in the web-thread
 app.config["JOB_THRESHOLD"] = 1
@@ -47,6 +50,8 @@ app.config["JOB_THRESHOLD"] = 1
 app.config["JOB_TIME"] = 600
 # memory limit for generator processes in bytes
 app.config["GENERATOR_MEMORY_LIMIT"] = 4294967296
+# peak RSS in bytes after which a generator process is replaced by a fresh one
+app.config["GENERATOR_RSS_LIMIT"] = 2147483648
 
 # waitress uses one thread for I/O, these are for processing of views that then get sent
 # archipelago.gg uses gunicorn + nginx; ignoring this option
@@ -1,11 +1,18 @@
 from __future__ import annotations
 
+import contextlib
+import functools
+import itertools
 import json
 import logging
 import multiprocessing
+import multiprocessing.pool
+import os
+import queue
+import socket
 import typing
 from datetime import timedelta, datetime
-from threading import Event, Thread
+from threading import Event, Lock, Thread
 from typing import Any
 from uuid import UUID
 
@@ -15,6 +22,10 @@ from Utils import restricted_loads
 from .locker import Locker, AlreadyRunningException
 
 _stop_event = Event()
+# port of the UDP socket that wakes up the autohost of this machine, next to the lock of the autohost
+_wake_port_file = os.path.join(Locker.lock_folder, "autohost.port")
+# rooms active this long before the previous check are checked again, in case their activity was committed late
+_activity_margin = timedelta(seconds=10)
 
 
 def stop() -> None:
@@ -23,17 +34,78 @@ def stop() -> None:
     stop_event = _stop_event
     _stop_event = Event()  # new event for new threads
     stop_event.set()
+    _wake_autohost()
+
+
+def request_hosting(room: Room) -> None:
+    """
+    Asks for a room to be started and commits the current db_session. The request is stored in the database, where
+    autohost finds it on its next poll, and the autohost of this machine is woken up to start the room right away.
+    """
+    RoomStartRequest(room=room)
+    commit()
+    _wake_autohost()
+
+
+def _wake_autohost() -> None:
+    """Wakes up the autohost of this machine, if one is running, from any process."""
+    try:
+        with open(_wake_port_file) as f:
+            port = int(f.read())
+    except (OSError, ValueError):
+        return  # no autohost running on this machine
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as wake_socket:
+        try:
+            wake_socket.sendto(b"\0", ("127.0.0.1", port))
+        except OSError:
+            pass  # the autohost stopped in the meantime
+
+
+@contextlib.contextmanager
+def _open_wake_socket() -> typing.Iterator[socket.socket]:
+    """UDP socket that _wake_autohost sends to, its port is announced in _wake_port_file while it is open."""
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as wake_socket:
+        wake_socket.bind(("127.0.0.1", 0))
+        with open(_wake_port_file, "w") as f:
+            f.write(str(wake_socket.getsockname()[1]))
+        try:
+            yield wake_socket
+        finally:
+            with contextlib.suppress(OSError):
+                os.remove(_wake_port_file)
+
+
+def _wait_for_wake(wake_socket: socket.socket, timeout: float) -> None:
+    """Waits until the socket gets woken up or timeout passes, then discards all wake-ups received until then."""
+    wake_socket.settimeout(timeout)
+    try:
+        wake_socket.recv(1)
+    except socket.timeout:
+        return
+    wake_socket.setblocking(False)
+    with contextlib.suppress(BlockingIOError):
+        while True:
+            wake_socket.recv(1)
 
 
 def handle_generation_success(seed_id):
     logging.info(f"Generation finished for seed {seed_id}")
 
 
-def handle_generation_failure(result: BaseException):
+def handle_generation_failure(result: BaseException, sid: UUID | None = None):
     try:  # hacky way to get the full RemoteTraceback
         raise result
     except Exception as e:
         logging.exception(e)
+    if sid:
+        # gen_game records its own errors, this catches generations that couldn't, e.g. because their process died
+        with db_session:
+            generation = Generation.get(id=sid)
+            if generation is not None and generation.state == STATE_STARTED:
+                generation.state = STATE_ERROR
+                meta = json.loads(generation.meta)
+                meta["error"] = format_exception(result)
+                generation.meta = json.dumps(meta)
 
 
 def _mp_gen_game(
@@ -52,7 +124,7 @@ def _mp_gen_game(
         setproctitle(f"Generator (idle)")
 
 
-def launch_generator(pool: multiprocessing.pool.Pool, generation: Generation, timeout: int|None) -> None:
+def launch_generator(pool: GeneratorPool, generation: Generation, timeout: int|None) -> None:
     try:
         meta = json.loads(generation.meta)
         options = restricted_loads(generation.options)
@@ -67,7 +139,7 @@ def launch_generator(pool: multiprocessing.pool.Pool, generation: Generation, ti
                 "timeout": timeout,
             },
             handle_generation_success,
-            handle_generation_failure,
+            functools.partial(handle_generation_failure, sid=generation.id),
         )
     except Exception as e:
         generation.state = STATE_ERROR
@@ -100,6 +172,129 @@ def init_generator(config: dict[str, Any]) -> None:
     db.generate_mapping()
 
 
+def get_generator_context() -> multiprocessing.context.BaseContext:
+    """Context that forks generators from a server process that imported the worlds once, where supported."""
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context("forkserver")
+        context.set_forkserver_preload(["worlds", "WebHostLib.generate"])
+        return context
+    return multiprocessing.get_context()
+
+
+def _generator_worker(tasks: multiprocessing.Queue, results: multiprocessing.Queue, current_job: Any,
+                      initializer: typing.Callable[..., None] | None, initargs: tuple, rss_limit: int,
+                      max_tasks: int) -> None:
+    from profiling import peak_rss
+
+    if initializer:
+        initializer(*initargs)
+    completed = 0
+    while True:
+        task = tasks.get()
+        if task is None:
+            return
+        job, func, args, kwds = task
+        # shared memory, so that the pool knows which job was lost if this process dies
+        current_job.value = job
+        try:
+            results.put((job, True, func(*args, **kwds)))
+        except Exception as e:
+            results.put((job, False, multiprocessing.pool.ExceptionWithTraceback(e, e.__traceback__)))
+        completed += 1
+        rss = peak_rss()
+        if rss > rss_limit if rss is not None else completed >= max_tasks:
+            return  # replaced by a fresh worker
+
+
+class GeneratorCrashed(Exception):
+    """Passed to the error callback of a job whose generator process died while running it"""
+
+
+class GeneratorPool:
+    """
+    Pool of generator processes. Where the platform supports it, they are forked from a server process that imported
+    the worlds once, so that they don't have to import them again before their first generation.
+    Workers are replaced once a generation made them exceed rss_limit, or after max_tasks generations if their RSS
+    can't be measured. If a worker dies while running a job, e.g. killed for running out of memory, the job's
+    error_callback receives a GeneratorCrashed.
+    """
+    max_tasks: int = 10
+
+    def __init__(self, processes: int, initializer: typing.Callable[..., None] | None = None, initargs: tuple = (),
+                 rss_limit: int = 2 ** 31):
+        self.processes = processes
+        self.initializer = initializer
+        self.initargs = initargs
+        self.rss_limit = rss_limit
+        self.context = get_generator_context()
+        self.tasks = self.context.Queue()
+        self.results = self.context.Queue()
+        self.workers: typing.Dict[multiprocessing.Process, Any] = {}  # worker -> shared id of its current job
+        self.jobs: typing.Dict[int, typing.Tuple[typing.Callable[[Any], None] | None,
+                                                 typing.Callable[[BaseException], None] | None]] = {}
+        self.job_ids = itertools.count()
+        self.lock = Lock()
+        self.stop_event = Event()
+        self.maintain()
+        self.result_thread = Thread(target=self.handle_results, name="AP_GeneratorResults", daemon=True)
+        self.result_thread.start()
+
+    def apply_async(self, func: typing.Callable[..., Any], args: tuple = (), kwds: dict[str, Any] | None = None,
+                    callback: typing.Callable[[Any], None] | None = None,
+                    error_callback: typing.Callable[[BaseException], None] | None = None) -> None:
+        job = next(self.job_ids)
+        self.jobs[job] = callback, error_callback
+        self.tasks.put((job, func, args, kwds or {}))
+
+    def maintain(self) -> None:
+        """Replaces workers that exited and fails the jobs of those that died."""
+        with self.lock:
+            lost_jobs = [(current_job.value, worker.exitcode) for worker, current_job in self.workers.items()
+                         if not worker.is_alive() and worker.exitcode and not self.stop_event.is_set()]
+            self.workers = {worker: current_job for worker, current_job in self.workers.items() if worker.is_alive()}
+            while len(self.workers) < self.processes and not self.stop_event.is_set():
+                current_job = self.context.Value("q", -1, lock=False)
+                worker = self.context.Process(target=_generator_worker, name="Generator", daemon=True,
+                                              args=(self.tasks, self.results, current_job, self.initializer,
+                                                    self.initargs, self.rss_limit, self.max_tasks))
+                worker.start()
+                self.workers[worker] = current_job
+        for job, exitcode in lost_jobs:
+            # gone if the worker died after its last job's result was handled, ignored if that result arrives later
+            _, error_callback = self.jobs.pop(job, (None, None))
+            if error_callback:
+                error_callback(GeneratorCrashed(f"Generator process exited with code {exitcode}"))
+
+    def handle_results(self) -> None:
+        while not self.stop_event.is_set():
+            try:
+                job, success, value = self.results.get(timeout=0.1)
+            except queue.Empty:
+                pass
+            else:
+                callback, error_callback = self.jobs.pop(job, (None, None))
+                if success and callback:
+                    callback(value)
+                elif not success and error_callback:
+                    error_callback(value)
+            self.maintain()
+
+    def terminate(self) -> None:
+        self.stop_event.set()
+        with self.lock:
+            for worker in self.workers:
+                worker.terminate()
+            for worker in self.workers:
+                worker.join()
+            self.workers.clear()
+
+    def __enter__(self) -> GeneratorPool:
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.terminate()
+
+
 def cleanup():
     """delete unowned user-content"""
     with db_session:
@@ -113,11 +308,26 @@ def cleanup():
         logging.info(f"{rooms} Rooms, {seeds} Seeds and {slots} Slots have been deleted.")
 
 
+def get_rooms_to_host(active_since: datetime) -> typing.List[UUID]:
+    """Rooms that were active since active_since and are still within their timeout, using the last_activity index."""
+    now = datetime.utcnow()
+    rooms = select(room for room in Room if room.last_activity >= active_since)
+    # we have to filter twice, as the per-room timeout can't currently be PonyORM transpiled.
+    return [room.id for room in rooms if room.last_activity >= now - timedelta(seconds=room.timeout + 5)]
+
+
+def assign_room(hosters: typing.List[MultiworldInstance], room_id: UUID) -> None:
+    """Starts a room on the hoster with the fewest rooms and then the least memory, unless one already hosts it."""
+    if any(room_id in hoster.room_ids for hoster in hosters):
+        return  # should already be hosted currently.
+    min(hosters, key=lambda hoster: (len(hoster.room_ids), hoster.rss())).start_room(room_id)
+
+
 def autohost(config: dict):
     def keep_running():
         stop_event = _stop_event
         try:
-            with Locker("autohost"):
+            with Locker("autohost"), _open_wake_socket() as wake_socket:
                 cleanup()
                 hosters = []
                 for x in range(config["HOSTERS"]):
@@ -125,15 +335,27 @@ def autohost(config: dict):
                     hosters.append(hoster)
                     hoster.start()
 
-                while not stop_event.wait(0.1):
+                with db_session:
+                    # the rooms of old requests are found by the first check through their activity
+                    select(request for request in RoomStartRequest).delete(bulk=True)
+                active_since = datetime.utcnow() - timedelta(days=3)
+                while not stop_event.is_set():
+                    checked_at = datetime.utcnow()
+                    # rooms that shut down may have been requested again while they were shutting down
+                    shut_down = [room_id for hoster in hosters for room_id in hoster.collect_shut_down_rooms()]
                     with db_session:
-                        rooms = select(
-                            room for room in Room if
-                            room.last_activity >= datetime.utcnow() - timedelta(days=3))
-                        for room in rooms:
-                            # we have to filter twice, as the per-room timeout can't currently be PonyORM transpiled.
-                            if room.last_activity >= datetime.utcnow() - timedelta(seconds=room.timeout + 5):
-                                hosters[room.id.int % len(hosters)].start_room(room.id)
+                        room_ids = get_rooms_to_host(active_since)
+                        for request in select(request for request in RoomStartRequest):
+                            room_ids.append(request.room.id)
+                            request.delete()
+                        for room_id in shut_down:
+                            room = Room.get(id=room_id)
+                            if room and room.last_activity >= datetime.utcnow() - timedelta(seconds=room.timeout + 5):
+                                room_ids.append(room_id)
+                    for room_id in room_ids:
+                        assign_room(hosters, room_id)
+                    active_since = checked_at - _activity_margin
+                    _wait_for_wake(wake_socket, config["AUTOHOST_POLL_INTERVAL"])
 
         except AlreadyRunningException:
             logging.info("Autohost reports as already running, not starting another.")
@@ -147,8 +369,8 @@ def autogen(config: dict):
         try:
             with Locker("autogen"):
 
-                with multiprocessing.Pool(config["GENERATORS"], initializer=init_generator,
-                                          initargs=(config,), maxtasksperchild=10) as generator_pool:
+                with GeneratorPool(config["GENERATORS"], init_generator, (config,),
+                                   config["GENERATOR_RSS_LIMIT"]) as generator_pool:
                     job_time = config["JOB_TIME"]
                     with db_session:
                         to_start = select(generation for generation in Generation if generation.state == STATE_STARTED)
@@ -204,14 +426,41 @@ class MultiworldInstance():
         self.process = process
 
     def start_room(self, room_id):
-        while not self.rooms_shutting_down.empty():
-            self.room_ids.remove(self.rooms_shutting_down.get(block=True, timeout=None))
         if room_id in self.room_ids:
             pass  # should already be hosted currently.
         else:
             self.room_ids.add(room_id)
             self.rooms_to_start.put(room_id)
 
+    def collect_shut_down_rooms(self) -> typing.List[UUID]:
+        """Forgets and returns the rooms that shut down since the last call. If the process died, that is all of its
+        rooms, and the process is started again."""
+        shut_down = []
+        while not self.rooms_shutting_down.empty():
+            room_id = self.rooms_shutting_down.get(block=True, timeout=None)
+            self.room_ids.discard(room_id)
+            shut_down.append(room_id)
+        if self.done():
+            logging.error(f"{self.name} exited with code {self.process.exitcode}, restarting it.")
+            self.collect()
+            shut_down.extend(self.room_ids)
+            self.room_ids.clear()
+            # rooms still queued for the dead process are among its rooms, a new process must not start them again
+            self.rooms_to_start = multiprocessing.Queue()
+            self.rooms_shutting_down = multiprocessing.Queue()
+            self.start()
+        return shut_down
+
+    def rss(self) -> int:
+        """Resident memory of the hoster process in bytes, 0 if it can't be determined"""
+        if not self.process:
+            return 0
+        import psutil
+        try:
+            return psutil.Process(self.process.pid).memory_info().rss
+        except psutil.Error:
+            return 0
+
     def stop(self):
         if self.process:
             self.process.terminate()
@@ -225,6 +474,6 @@ class MultiworldInstance():
         self.process = None
 
 
-from .models import Room, Generation, STATE_QUEUED, STATE_STARTED, STATE_ERROR, db, Seed, Slot
+from .models import Room, RoomStartRequest, Generation, STATE_QUEUED, STATE_STARTED, STATE_ERROR, db, Seed, Slot
 from .customserver import run_server_process, get_static_server_data
-from .generate import gen_game
+from .generate import format_exception, gen_game
@@ -15,17 +15,18 @@ import typing
 import sys
 
 import websockets
-from pony.orm import commit, db_session, select
+from pony.orm import db_session, select
 
 import Utils
 
 from MultiServer import (
     Context, server, auto_shutdown, ServerCommandProcessor, ClientMessageProcessor, load_server_cert,
-    server_per_message_deflate_factory,
+    server_per_message_deflate_factory, apply_save_journal, SeedData,
 )
 from Utils import restricted_loads, cache_argsless
 from .locker import Locker
-from .models import Command, GameDataPackage, Room, db
+from .models import Command, GameDataPackage, Room, Seed, SaveJournalEntry, TrackerState, db
+from .tracker_state import get_save_journal, tracker_save_states
 
 
 class CustomClientMessageProcessor(ClientMessageProcessor):
@@ -60,8 +61,95 @@ class DBCommandProcessor(ServerCommandProcessor):
         self.ctx.logger.info(text)
 
 
+class SharedSeed:
+    """Seed data shared by all rooms of a seed that are hosted by this process."""
+    seed_data: SeedData
+    fallback_games: typing.List[str]  # games that use the static data package, or the one embedded in the multidata
+    static: bool  # whether all games use the static data package
+    encoded_game_packages: typing.Dict[str, str]  # see Context.encoded_game_packages
+    rooms: int  # rooms using it, it is freed when the last of them shuts down
+
+    def __init__(self, seed_data: SeedData, fallback_games: typing.List[str], static: bool):
+        self.seed_data = seed_data
+        self.fallback_games = fallback_games
+        self.static = static
+        self.encoded_game_packages = {}
+        self.rooms = 0
+
+    @classmethod
+    def parse(cls, seed: Seed, static_gamespackage: typing.Dict[str, typing.Any],
+              logger: logging.Logger) -> SharedSeed:
+        multidata = Context.decompress(seed.multidata)
+        game_data_packages = {}
+        fallback_games = []
+        missing_checksum = False
+
+        for game in list(multidata.get("datapackage", {})):
+            game_data = multidata["datapackage"][game]
+            if "checksum" in game_data:
+                if static_gamespackage.get(game, {}).get("checksum") == game_data["checksum"]:
+                    # non-custom. remove from multidata and use static data
+                    # games package could be dropped from static data once all rooms embed data package
+                    del multidata["datapackage"][game]
+                else:
+                    row = GameDataPackage.get(checksum=game_data["checksum"])
+                    if row:  # None if rolled on >= 0.3.9 but uploaded to <= 0.3.8. multidata should be complete
+                        game_data_packages[game] = restricted_loads(row.data)
+                        continue
+                    else:
+                        logger.warning(f"Did not find game_data_package for {game}: {game_data['checksum']}")
+            else:
+                missing_checksum = True  # Game rolled on old AP and will load data package from multidata
+            fallback_games.append(game)
+
+        return cls(SeedData.parse(multidata, game_data_packages), fallback_games,
+                   not game_data_packages and not missing_checksum)
+
+
+_shared_seeds: typing.Dict[typing.Any, SharedSeed] = {}
+"""Seeds of the rooms hosted by this process, by seed id. Only used from the event loop's thread."""
+
+
+class DBCommandDispatcher(threading.Thread):
+    """Fetches the Commands of all rooms hosted by a process and runs them on the event loops of their rooms."""
+    poll_interval: float = 1  # seconds between fetches
+    batch_size: int = 500  # rooms per query, to stay below the parameter limit of the database
+
+    def __init__(self):
+        super().__init__(name="DBCommandDispatcher", daemon=True)
+        self.processors: typing.Dict[typing.Any, DBCommandProcessor] = {}
+
+    def register(self, ctx: WebHostContext) -> None:
+        self.processors[ctx.room_id] = DBCommandProcessor(ctx)
+
+    def unregister(self, room_id) -> None:
+        self.processors.pop(room_id, None)
+
+    @db_session
+    def dispatch(self) -> None:
+        processors = dict(self.processors)  # rooms (un)register from the event loop's thread
+        room_ids = list(processors)
+        for start in range(0, len(room_ids), self.batch_size):
+            batch = room_ids[start:start + self.batch_size]
+            commands = select(command for command in Command if command.room.id in batch).order_by(Command.id)
+            for command in commands:
+                processor = processors[command.room.id]
+                processor.ctx.main_loop.call_soon_threadsafe(processor, command.commandtext)
+                command.delete()
+
+    def run(self) -> None:
+        while 1:
+            if self.processors:
+                try:
+                    self.dispatch()
+                except Exception as e:
+                    logging.exception(e)
+            time.sleep(self.poll_interval)
+
+
 class WebHostContext(Context):
     room_id: int
+    seed_id: typing.Any = None
 
     def __init__(self, static_server_data: dict, logger: logging.Logger):
         # static server data is used during _load_game_data to load required data,
@@ -89,20 +177,6 @@ class WebHostContext(Context):
             setattr(self, key, value)
         self.non_hintable_names = collections.defaultdict(frozenset, self.non_hintable_names)
 
-    def listen_to_db_commands(self):
-        cmdprocessor = DBCommandProcessor(self)
-
-        while not self.exit_event.is_set():
-            with db_session:
-                commands = select(command for command in Command if command.room.id == self.room_id)
-                if commands:
-                    for command in commands:
-                        self.main_loop.call_soon_threadsafe(cmdprocessor, command.commandtext)
-                        command.delete()
-                    commit()
-            del commands
-            time.sleep(5)
-
     @db_session
     def load(self, room_id: int):
         self.room_id = room_id
@@ -112,69 +186,93 @@ class WebHostContext(Context):
         else:
             self.port = get_random_port()
 
-        multidata = self.decompress(room.seed.multidata)
-        game_data_packages = {}
-
-        static_gamespackage = self.gamespackage  # this is shared across all rooms
-        static_item_name_groups = self.item_name_groups
-        static_location_name_groups = self.location_name_groups
-        self.gamespackage = {"Archipelago": static_gamespackage.get("Archipelago", {})}  # this may be modified by _load
-        self.item_name_groups = {"Archipelago": static_item_name_groups.get("Archipelago", {})}
-        self.location_name_groups = {"Archipelago": static_location_name_groups.get("Archipelago", {})}
-        missing_checksum = False
-
-        for game in list(multidata.get("datapackage", {})):
-            game_data = multidata["datapackage"][game]
-            if "checksum" in game_data:
-                if static_gamespackage.get(game, {}).get("checksum") == game_data["checksum"]:
-                    # non-custom. remove from multidata and use static data
-                    # games package could be dropped from static data once all rooms embed data package
-                    del multidata["datapackage"][game]
-                else:
-                    row = GameDataPackage.get(checksum=game_data["checksum"])
-                    if row:  # None if rolled on >= 0.3.9 but uploaded to <= 0.3.8. multidata should be complete
-                        game_data_packages[game] = restricted_loads(row.data)
-                        continue
-                    else:
-                        self.logger.warning(f"Did not find game_data_package for {game}: {game_data['checksum']}")
-            else:
-                missing_checksum = True  # Game rolled on old AP and will load data package from multidata
-            self.gamespackage[game] = static_gamespackage.get(game, {})
-            self.item_name_groups[game] = static_item_name_groups.get(game, {})
-            self.location_name_groups[game] = static_location_name_groups.get(game, {})
-
-        if not game_data_packages and not missing_checksum:
-            # all static -> use the static dicts directly
-            self.gamespackage = static_gamespackage
-            self.item_name_groups = static_item_name_groups
-            self.location_name_groups = static_location_name_groups
-        return self._load(multidata, game_data_packages, True)
+        self.seed_id = room.seed.id
+        shared_seed = _shared_seeds.get(self.seed_id)
+        if not shared_seed:
+            shared_seed = _shared_seeds[self.seed_id] = SharedSeed.parse(room.seed, self.gamespackage, self.logger)
+        shared_seed.rooms += 1
+
+        if not shared_seed.static:
+            static_gamespackage = self.gamespackage  # this is shared across all rooms
+            static_item_name_groups = self.item_name_groups
+            static_location_name_groups = self.location_name_groups
+            self.gamespackage = {"Archipelago": static_gamespackage.get("Archipelago", {})}  # may be modified by _load
+            self.item_name_groups = {"Archipelago": static_item_name_groups.get("Archipelago", {})}
+            self.location_name_groups = {"Archipelago": static_location_name_groups.get("Archipelago", {})}
+            for game in shared_seed.fallback_games:
+                self.gamespackage[game] = static_gamespackage.get(game, {})
+                self.item_name_groups[game] = static_item_name_groups.get(game, {})
+                self.location_name_groups[game] = static_location_name_groups.get(game, {})
+        # else all static -> use the static dicts directly
+        self.encoded_game_packages = shared_seed.encoded_game_packages
+        return self._load_seed_data(shared_seed.seed_data, True)
+
+    def unload(self) -> None:
+        """Releases the seed data shared with other rooms of the seed, freeing it if this was the last of them."""
+        shared_seed = _shared_seeds.get(self.seed_id)
+        if shared_seed:
+            shared_seed.rooms -= 1
+            if not shared_seed.rooms:
+                del _shared_seeds[self.seed_id]
+        self.seed_id = None
 
     def init_save(self, enabled: bool = True):
         self.saving = enabled
         if self.saving:
             with db_session:
-                savegame_data = Room.get(id=self.room_id).multisave
+                room = Room.get(id=self.room_id)
+                savegame_data = room.multisave
                 if savegame_data:
-                    self.set_save(restricted_loads(Room.get(id=self.room_id).multisave))
+                    savegame_data = restricted_loads(savegame_data)
+                    journal_entries = apply_save_journal(savegame_data, get_save_journal(room))
+                    self.set_save(savegame_data)
+                    self.save_journal_entries = journal_entries
             self._start_async_saving(atexit_save=False)
-        threading.Thread(target=self.listen_to_db_commands, daemon=True).start()
 
     @db_session
     def _save(self, exit_save: bool = False) -> bool:
         room = Room.get(id=self.room_id)
-        # Does not use Utils.restricted_dumps because we'd rather make a save than not make one
-        room.multisave = pickle.dumps(self.get_save())
+        self._save_journaled(exit_save)
         # saving only occurs on activity, so we can "abuse" this information to mark this as last_activity
         if not exit_save:  # we don't want to count a shutdown as activity, which would restart the server again
             room.last_activity = datetime.datetime.utcnow()
         return True
 
-    def get_save(self) -> dict:
-        d = super(WebHostContext, self).get_save()
+    def _write_save_snapshot(self, savedata: dict) -> None:
+        room = Room.get(id=self.room_id)
+        # Does not use Utils.restricted_dumps because we'd rather make a save than not make one
+        room.multisave = pickle.dumps(savedata)
+        select(entry for entry in SaveJournalEntry if entry.room == room).delete(bulk=True)
+        self._publish_tracker_state(room)
+
+    def _write_save_journal_entry(self, delta: dict) -> None:
+        SaveJournalEntry(room=Room.get(id=self.room_id), data=pickle.dumps(delta))
+
+    def get_save_states(self) -> dict:
+        d = super(WebHostContext, self).get_save_states()
         d["video"] = [(tuple(playerslot), videodata) for playerslot, videodata in self.video.items()]
         return d
 
+    def get_tracker_state(self) -> dict:
+        """Parts of the save read by WebHostLib.tracker.TrackerData, in the same format as in the save."""
+        save_states = self.get_save_states()
+        return {
+            "received_items": {key: items for key, items in self.received_items.items() if key[2]},
+            "hints": dict(self.hints),
+            "location_checks": dict(self.location_checks),
+            **{key: save_states[key] for key in tracker_save_states},
+        }
+
+    def _publish_tracker_state(self, room: Room) -> None:
+        """Replaces the tracker state of the room with its state at the current save snapshot, so that trackers
+        don't have to load the whole save. Until the next snapshot, trackers apply the save journal to it."""
+        data = pickle.dumps(self.get_tracker_state())
+        if room.tracker_state:
+            room.tracker_state.version = self.save_generation
+            room.tracker_state.data = data
+        else:
+            TrackerState(room=room, version=self.save_generation, data=data)
+
 
 def get_random_port():
     return random.randint(49152, 65535)
@@ -275,6 +373,8 @@ def run_server_process(name: str, ponyconfig: dict, static_server_data: dict,
     gc.collect()  # free intermediate objects used during setup
 
     loop = asyncio.get_event_loop()
+    command_dispatcher = DBCommandDispatcher()
+    command_dispatcher.start()
 
     async def start_room(room_id):
         with Locker(f"RoomLocker {room_id}"):
@@ -283,6 +383,7 @@ def run_server_process(name: str, ponyconfig: dict, static_server_data: dict,
                 ctx = WebHostContext(static_server_data, logger)
                 ctx.load(room_id)
                 ctx.init_save()
+                command_dispatcher.register(ctx)
                 assert ctx.server is None
                 try:
                     ctx.server = websockets.serve(
@@ -340,6 +441,8 @@ def run_server_process(name: str, ponyconfig: dict, static_server_data: dict,
                     setattr(asyncio.current_task(), "save", None)
             finally:
                 try:
+                    command_dispatcher.unregister(room_id)
+                    ctx.unload()
                     ctx.save_dirty = False  # make sure the saving thread does not write to DB after final wakeup
                     ctx.exit_event.set()  # make sure the saving thread stops at some point
                     # NOTE: async saving should probably be an async task and could be merged with shutdown_task
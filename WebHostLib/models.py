@@ -26,6 +26,9 @@ class Room(db.Entity):
     commands = Set('Command')
     seed = Required('Seed', index=True)
     multisave = Optional(buffer, lazy=True)
+    save_journal = Set('SaveJournalEntry')  # changes since multisave was written, see MultiServer.apply_save_journal
+    tracker_state = Optional('TrackerState', cascade_delete=True)  # published by the room's server for the trackers
+    start_requests = Set('RoomStartRequest')  # written by the web pages that want the room hosted, see autolauncher
     show_spoiler = Required(int, default=0)  # 0 -> never, 1 -> after completion, -> 2 always
     timeout = Required(int, default=lambda: 2 * 60 * 60)  # seconds since last activity to shutdown
     tracker = Optional(UUID, index=True)
@@ -50,6 +53,23 @@ class Command(db.Entity):
     commandtext = Required(str)
 
 
+class RoomStartRequest(db.Entity):
+    id = PrimaryKey(int, auto=True)
+    room = Required(Room)
+
+
+class SaveJournalEntry(db.Entity):
+    id = PrimaryKey(int, auto=True)
+    room = Required(Room, index=True)
+    data = Required(buffer, lazy=True)
+
+
+class TrackerState(db.Entity):
+    room = PrimaryKey(Room)
+    version = Required(int)  # save generation of the snapshot it was published with, see MultiServer.Context
+    data = Required(buffer, lazy=True)
+
+
 class Generation(db.Entity):
     id = PrimaryKey(UUID, default=uuid4)
     owner = Required(UUID)
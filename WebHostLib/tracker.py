@@ -1,21 +1,28 @@
 import datetime
 import collections
+import threading
 from dataclasses import dataclass
 from typing import Any, Callable, Dict, List, Optional, Set, Tuple, NamedTuple, Counter
 from uuid import UUID
 from email.utils import parsedate_to_datetime
 
 from flask import make_response, render_template, request, Request, Response
+from pony.orm import select
 from werkzeug.exceptions import abort
 
-from MultiServer import Context, get_saving_second
+from MultiServer import Context, apply_save_journal, get_saving_second, index_spheres
 from NetUtils import ClientStatus, Hint, NetworkItem, NetworkSlot, SlotType
 from Utils import restricted_loads, KeyedDefaultDict
 from . import app, cache
-from .models import GameDataPackage, Room
+from .models import GameDataPackage, Room, SaveJournalEntry, Seed
+from .tracker_state import apply_tracker_journal, get_save_journal
 
 # Multisave is currently updated, at most, every minute.
 TRACKER_CACHE_TIMEOUT_IN_SECONDS = 60
+# Decoded seeds kept by each web worker, multidata never changes so they only leave the cache to make room.
+TRACKER_SEED_CACHE_SIZE = 8
+# Decoded tracker states of rooms kept by each web worker, updated from the save journal of the room's server.
+TRACKER_STATE_CACHE_SIZE = 64
 
 _multiworld_trackers: Dict[str, Callable] = {}
 _player_trackers: Dict[str, Callable] = {}
@@ -40,45 +47,126 @@ def _cache_results(func: Callable) -> Callable:
     return method_wrapper
 
 
+_seed_data_cache: "collections.OrderedDict[UUID, TrackerSeedData]" = collections.OrderedDict()
+_tracker_state_cache: "collections.OrderedDict[UUID, Tuple[int, int, Dict[str, Any]]]" = collections.OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _cache_get(cache: collections.OrderedDict, key: UUID) -> Any:
+    with _cache_lock:
+        value = cache.get(key)
+        if value is not None:
+            cache.move_to_end(key)
+        return value
+
+
+def _cache_put(cache: collections.OrderedDict, key: UUID, value: Any, size: int) -> None:
+    with _cache_lock:
+        cache[key] = value
+        cache.move_to_end(key)
+        while len(cache) > size:
+            cache.popitem(last=False)
+
+
+class TrackerSeedData(NamedTuple):
+    """Decoded multidata of a seed and the name tables of its games, shared by the TrackerData of all rooms of the seed
+    in a web worker. Must not be modified."""
+    multidata: Dict[str, Any]
+    item_name_to_id: Dict[str, Dict[str, int]]
+    location_name_to_id: Dict[str, Dict[str, int]]
+    item_id_to_name: Dict[str, Dict[int, str]]
+    location_id_to_name: Dict[str, Dict[int, str]]
+    location_spheres: Dict[int, Dict[int, int]]  # see MultiServer.index_spheres
+
+    @classmethod
+    def load(cls, seed: Seed) -> "TrackerSeedData":
+        multidata = Context.decompress(seed.multidata)
+        item_name_to_id: Dict[str, Dict[str, int]] = {}
+        location_name_to_id: Dict[str, Dict[str, int]] = {}
+
+        # Generate inverse lookup tables from data package, useful for trackers.
+        item_id_to_name: Dict[str, Dict[int, str]] = KeyedDefaultDict(lambda game_name: {
+            game_name: KeyedDefaultDict(lambda code: f"Unknown Game {game_name} - Item (ID: {code})")
+        })
+        location_id_to_name: Dict[str, Dict[int, str]] = KeyedDefaultDict(lambda game_name: {
+            game_name: KeyedDefaultDict(lambda code: f"Unknown Game {game_name} - Location (ID: {code})")
+        })
+        for game, game_package in multidata["datapackage"].items():
+            game_package = restricted_loads(GameDataPackage.get(checksum=game_package["checksum"]).data)
+            item_id_to_name[game] = KeyedDefaultDict(lambda code: f"Unknown Item (ID: {code})", {
+                id: name for name, id in game_package["item_name_to_id"].items()})
+            location_id_to_name[game] = KeyedDefaultDict(lambda code: f"Unknown Location (ID: {code})", {
+                id: name for name, id in game_package["location_name_to_id"].items()})
+
+            # Normal lookup tables as well.
+            item_name_to_id[game] = game_package["item_name_to_id"]
+            location_name_to_id[game] = game_package["location_name_to_id"]
+
+        return cls(multidata, item_name_to_id, location_name_to_id, item_id_to_name, location_id_to_name,
+                   index_spheres(multidata.get("spheres", [])))
+
+
+def get_seed_data(seed: Seed) -> TrackerSeedData:
+    """Retrieves the decoded data of a seed, decoding it at most once per web worker while it stays cached."""
+    seed_data = _cache_get(_seed_data_cache, seed.id)
+    if seed_data is None:
+        seed_data = TrackerSeedData.load(seed)
+        _cache_put(_seed_data_cache, seed.id, seed_data, TRACKER_SEED_CACHE_SIZE)
+    return seed_data
+
+
+def get_tracker_state(room: Room) -> Dict[str, Any]:
+    """Retrieves the parts of the save of a room read by trackers. Uses the state published by the room's server at
+    its last save snapshot, see WebHostContext.get_tracker_state, with only the journal entries written since the
+    previous call applied to it. Falls back to the save for rooms that haven't published one yet.
+    Must not be modified."""
+    tracker_state = room.tracker_state
+    if not tracker_state:
+        multisave = restricted_loads(room.multisave) if room.multisave else {}
+        if multisave:
+            apply_save_journal(multisave, get_save_journal(room))
+        return multisave
+
+    cached = _cache_get(_tracker_state_cache, room.id)
+    if cached is None or cached[0] != tracker_state.version:
+        cached = (tracker_state.version, 0, restricted_loads(tracker_state.data))
+    version, last_entry_id, state = cached
+    entries = select(entry for entry in SaveJournalEntry
+                     if entry.room == room and entry.id > last_entry_id).order_by(SaveJournalEntry.id)[:]
+    if entries:
+        state = apply_tracker_journal(state, version, (restricted_loads(entry.data) for entry in entries))
+        last_entry_id = entries[-1].id
+    _cache_put(_tracker_state_cache, room.id, (version, last_entry_id, state), TRACKER_STATE_CACHE_SIZE)
+    return state
+
+
 @dataclass
 class TrackerData:
     """A helper dataclass that is instantiated each time an HTTP request comes in for tracker data.
 
     Provides helper methods to lazily load necessary data that each tracker require and caches any results so any
     subsequent helper method calls do not need to recompute results during the lifetime of this instance.
+    The multidata, name tables and save it reads are shared with other instances, see TrackerSeedData and get_tracker_state.
     """
     room: Room
     _multidata: Dict[str, Any]
     _multisave: Dict[str, Any]
+    _location_spheres: Dict[int, Dict[int, int]]
     _tracker_cache: Dict[str, Any]
 
     def __init__(self, room: Room):
         """Initialize a new RoomMultidata object for the current room."""
         self.room = room
-        self._multidata = Context.decompress(room.seed.multidata)
-        self._multisave = restricted_loads(room.multisave) if room.multisave else {}
+        seed_data = get_seed_data(room.seed)
+        self._multidata = seed_data.multidata
+        self._multisave = get_tracker_state(room)
+        self._location_spheres = seed_data.location_spheres
         self._tracker_cache = {}
 
-        self.item_name_to_id: Dict[str, Dict[str, int]] = {}
-        self.location_name_to_id: Dict[str, Dict[str, int]] = {}
-
-        # Generate inverse lookup tables from data package, useful for trackers.
-        self.item_id_to_name: Dict[str, Dict[int, str]] = KeyedDefaultDict(lambda game_name: {
-            game_name: KeyedDefaultDict(lambda code: f"Unknown Game {game_name} - Item (ID: {code})")
-        })
-        self.location_id_to_name: Dict[str, Dict[int, str]] = KeyedDefaultDict(lambda game_name: {
-            game_name: KeyedDefaultDict(lambda code: f"Unknown Game {game_name} - Location (ID: {code})")
-        })
-        for game, game_package in self._multidata["datapackage"].items():
-            game_package = restricted_loads(GameDataPackage.get(checksum=game_package["checksum"]).data)
-            self.item_id_to_name[game] = KeyedDefaultDict(lambda code: f"Unknown Item (ID: {code})", {
-                id: name for name, id in game_package["item_name_to_id"].items()})
-            self.location_id_to_name[game] = KeyedDefaultDict(lambda code: f"Unknown Location (ID: {code})", {
-                id: name for name, id in game_package["location_name_to_id"].items()})
-
-            # Normal lookup tables as well.
-            self.item_name_to_id[game] = game_package["item_name_to_id"]
-            self.location_name_to_id[game] = game_package["location_name_to_id"]
+        self.item_name_to_id: Dict[str, Dict[str, int]] = seed_data.item_name_to_id
+        self.location_name_to_id: Dict[str, Dict[str, int]] = seed_data.location_name_to_id
+        self.item_id_to_name: Dict[str, Dict[int, str]] = seed_data.item_id_to_name
+        self.location_id_to_name: Dict[str, Dict[int, str]] = seed_data.location_id_to_name
 
     def get_seed_name(self) -> str:
         """Retrieves the seed name."""
@@ -296,6 +384,21 @@ class TrackerData:
         """ each sphere is { player: { location_id, ... } } """
         return self._multidata.get("spheres", [])
 
+    def get_location_spheres(self) -> Dict[int, Dict[int, int]]:
+        """Retrieves the sphere number of each location by player and location id, indexed once per seed."""
+        return self._location_spheres
+
+    @_cache_results
+    def get_team_checked_locations_by_sphere(self, team: int) -> List[Tuple[int, int, int]]:
+        """Retrieves the sphere number, finding player and location id of every checked location of a team that is
+        in a sphere, in sphere order."""
+        checked_locations = []
+        for player, location_spheres in self.get_location_spheres().items():
+            for location_id in self.get_player_checked_locations(team, player):
+                if location_id in location_spheres:
+                    checked_locations.append((location_spheres[location_id], player, location_id))
+        return sorted(checked_locations)
+
 
 def _process_if_request_valid(incoming_request: Request, room: Optional[Room]) -> Optional[Response]:
     if not room:
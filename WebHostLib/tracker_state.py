@@ -0,0 +1,35 @@
+import typing
+
+from pony.orm import select
+
+from Utils import restricted_loads
+from .models import Room, SaveJournalEntry
+
+tracker_save_states = ("name_aliases", "client_game_state", "client_activity_timers", "client_connection_timers",
+                       "video")
+"""Parts of Context.get_save_states read by trackers, which are written whole into every save journal entry."""
+
+
+def get_save_journal(room: Room) -> typing.Iterator[typing.Dict[str, typing.Any]]:
+    """Save deltas journaled for a room since its last snapshot in Room.multisave, see MultiServer.apply_save_journal"""
+    for entry in select(entry for entry in SaveJournalEntry if entry.room == room).order_by(SaveJournalEntry.id):
+        yield restricted_loads(entry.data)
+
+
+def apply_tracker_journal(state: typing.Dict[str, typing.Any], version: int,
+                          journal: typing.Iterable[typing.Dict[str, typing.Any]]) -> typing.Dict[str, typing.Any]:
+    """Applies the journaled save deltas of the snapshot a tracker state was published with to it, like
+    MultiServer.apply_save_journal does to a save. Returns a new state, as the given one may be in use."""
+    state = {**state, "received_items": dict(state.get("received_items", {})),
+             "location_checks": dict(state.get("location_checks", {})), "hints": dict(state.get("hints", {}))}
+    for delta in journal:
+        if delta["save_generation"] != version:
+            continue
+        for key, (start, items) in delta["received_items"].items():
+            if key[2]:
+                state["received_items"][key] = state["received_items"].get(key, [])[:start] + items
+        for team_slot, locations in delta["location_checks"].items():
+            state["location_checks"][team_slot] = state["location_checks"].get(team_slot, set()) | locations
+        state["hints"].update(delta["hints"])
+        state.update((key, delta[key]) for key in tracker_save_states)
+    return state
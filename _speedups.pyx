@@ -1,6 +1,5 @@
 #cython: language_level=3
 #distutils: language = c
-#distutils: depends = intset.h
 
 """
 Provides faster implementation of some core parts.
@@ -31,28 +30,6 @@ ctypedef int64_t ap_id_t
 cdef ap_player_t MAX_PLAYER_ID = 1000000  # limit the size of indexing array
 cdef size_t INVALID_SIZE = <size_t>(-1)  # this is all 0xff... adding 1 results in 0, but it's not negative
 
-# configure INTSET for player
-cdef extern from *:
-    """
-    #define INTSET_NAME ap_player_set
-    #define INTSET_TYPE uint32_t  // has to match ap_player_t
-    """
-
-# create INTSET for player
-cdef extern from "intset.h":
-    """
-    #undef INTSET_NAME
-    #undef INTSET_TYPE
-    """
-    ctypedef struct ap_player_set:
-        pass
-
-    ap_player_set* ap_player_set_new(size_t bucket_count) nogil
-    void ap_player_set_free(ap_player_set* set) nogil
-    bint ap_player_set_add(ap_player_set* set, ap_player_t val) nogil
-    bint ap_player_set_contains(ap_player_set* set, ap_player_t val) nogil
-
-
 cdef struct LocationEntry:
     # layout is so that
     # 64bit player: location+sender and item+receiver 128bit comparisons, if supported
@@ -92,6 +69,9 @@ cdef class LocationStore:
     cdef size_t entry_count
     cdef IndexEntry* sender_index  # 16KB/1000 players
     cdef size_t sender_index_size
+    cdef size_t* receiver_entries  # 800KB/100k items, indices of entries sorted by receiver and item
+    cdef IndexEntry* receiver_index  # 16KB/1000 players, ranges of receiver_entries per receiver
+    cdef size_t receiver_index_size
     cdef list _keys  # ~36KB/1000 players, speed up iter (28 per int + 8 per list entry)
     cdef list _items  # ~64KB/1000 players, speed up items (56 per tuple + 8 per list entry)
     cdef list _proxies  # ~92KB/1000 players, speed up self[player] (56 per struct + 28 per len + 8 per list entry)
@@ -100,7 +80,8 @@ cdef class LocationStore:
     def get_size(self):
         from sys import getsizeof
         size = getsizeof(self) + getsizeof(self._mem) + getsizeof(self._len) \
-                + sizeof(LocationEntry) * self.entry_count + sizeof(IndexEntry) * self.sender_index_size
+                + sizeof(LocationEntry) * self.entry_count + sizeof(IndexEntry) * self.sender_index_size \
+                + sizeof(size_t) * self.entry_count + sizeof(IndexEntry) * self.receiver_index_size
         size += getsizeof(self._keys) + getsizeof(self._items) + getsizeof(self._proxies)
         size += sum(sizeof(key) for key in self._keys)
         size += sum(sizeof(item) for item in self._items)
@@ -117,6 +98,7 @@ cdef class LocationStore:
 
         # iterate over everything to get all maxima and validate everything
         cdef size_t max_sender = INVALID_SIZE  # keep track of highest used player id for indexing
+        cdef size_t max_receiver = 0
         cdef size_t sender_count = 0
         cdef size_t count = 0
         for sender, locations in locations_dict.items():
@@ -131,6 +113,7 @@ cdef class LocationStore:
                 receiver = data[1]
                 if receiver < 1 or receiver > MAX_PLAYER_ID:
                     raise ValueError(f"Invalid player id {receiver} for item")
+                max_receiver = max(max_receiver, receiver)
                 count += 1
             sender_count += 1
 
@@ -148,15 +131,20 @@ cdef class LocationStore:
         if count:
             # leaving entries as NULL if there are none, makes potential memory errors more visible
             self.entries = <LocationEntry*>self._mem.alloc(count, sizeof(LocationEntry))
+            self.receiver_entries = <size_t*>self._mem.alloc(count, sizeof(size_t))
         self.sender_index = <IndexEntry*>self._mem.alloc(max_sender + 1, sizeof(IndexEntry))
+        self.receiver_index = <IndexEntry*>self._mem.alloc(max_receiver + 1, sizeof(IndexEntry))
         self._raw_proxies = <PyObject**>self._mem.alloc(max_sender + 1, sizeof(PyObject*))
 
         assert (not self.entries) == (not count)
+        assert (not self.receiver_entries) == (not count)
         assert self.sender_index
+        assert self.receiver_index
         assert self._raw_proxies
 
         # build entries and index
         cdef size_t i = 0
+        cdef list receiver_order = []
         for sender, locations in sorted(locations_dict.items()):
             self.sender_index[sender].start = i
             self.sender_index[sender].count = 0
@@ -170,8 +158,18 @@ cdef class LocationStore:
                     self.entries[i].flags = data[2]  # initialized to 0 during alloc
                 # Ignoring extra data. warn?
                 self.sender_index[sender].count += 1
+                receiver_order.append((data[1], data[0], i))
                 i += 1
 
+        # build receiver index, entries of a receiver are sorted by item, then in entry order
+        receiver_order.sort()
+        cdef size_t j
+        for j, (receiver, _, i) in enumerate(receiver_order):
+            self.receiver_entries[j] = i
+            if not self.receiver_index[receiver].count:
+                self.receiver_index[receiver].start = j
+            self.receiver_index[receiver].count += 1
+
         # build pyobject caches
         self._proxies.append(None)  # player 0
         assert self.sender_index[0].count == 0
@@ -187,6 +185,7 @@ cdef class LocationStore:
             self._raw_proxies[i] = <PyObject*>proxy
 
         self.sender_index_size = max_sender + 1
+        self.receiver_index_size = max_receiver + 1
         self.entry_count = count
         self._len = sender_count
 
@@ -217,45 +216,46 @@ cdef class LocationStore:
     # specialized accessors
     def find_item(self, slots: Set[int], seeked_item_id: int) -> Generator[Tuple[int, int, int, int, int], None, None]:
         cdef ap_id_t item = seeked_item_id
-        cdef ap_player_t receiver
-        cdef ap_player_set* receivers
-        cdef size_t slot_count = len(slots)
-        if slot_count == 1:
-            # specialized implementation for single slot
-            receiver = list(slots)[0]
-            with nogil:
-                for entry in self.entries[:self.entry_count]:
-                    if entry.item == item and entry.receiver == receiver:
-                        with gil:
-                            yield entry.sender, entry.location, entry.item, entry.receiver, entry.flags
-        elif slot_count:
-            # generic implementation with lookup in set
-            receivers = ap_player_set_new(min(1023, slot_count))  # limit top level struct to 16KB
-            if not receivers:
-                raise MemoryError()
-            try:
-                for receiver in slots:
-                    if not ap_player_set_add(receivers, receiver):
-                        raise MemoryError()
-                with nogil:
-                    for entry in self.entries[:self.entry_count]:
-                        if entry.item == item and ap_player_set_contains(receivers, entry.receiver):
-                            with gil:
-                                yield entry.sender, entry.location, entry.item, entry.receiver, entry.flags
-            finally:
-                ap_player_set_free(receivers)
+        cdef LocationEntry* entry
+        cdef size_t receiver, l, r, m, end
+        cdef list matches = []
+        for slot in slots:
+            if slot < 1 or slot >= self.receiver_index_size:
+                continue
+            receiver = slot
+            # binary search for the first entry of the item in the entries of the receiver
+            l = self.receiver_index[receiver].start
+            end = l + self.receiver_index[receiver].count
+            r = end
+            while l < r:
+                m = (l + r) // 2
+                if self.entries[self.receiver_entries[m]].item < item:
+                    l = m + 1
+                else:
+                    r = m
+            while l < end and self.entries[self.receiver_entries[l]].item == item:
+                matches.append(self.receiver_entries[l])
+                l += 1
+        if len(slots) > 1:
+            matches.sort()  # yield in entry order, like a scan of all entries would
+        for i in matches:
+            entry = self.entries + <size_t>i
+            yield entry.sender, entry.location, entry.item, entry.receiver, entry.flags
 
     def get_for_player(self, slot: int) -> Dict[int, Set[int]]:
-        cdef ap_player_t receiver = slot
+        cdef LocationEntry* entry
+        cdef size_t receiver, start, i
         all_locations: Dict[int, Set[int]] = {}
-        with nogil:
-            for entry in self.entries[:self.entry_count]:
-                if entry.receiver == receiver:
-                    with gil:
-                        sender: int = entry.sender
-                        if sender not in all_locations:
-                            all_locations[sender] = set()
-                        all_locations[sender].add(entry.location)
+        if slot < 1 or slot >= self.receiver_index_size:
+            return all_locations
+        receiver = slot
+        start = self.receiver_index[receiver].start
+        for i in range(start, start + self.receiver_index[receiver].count):
+            entry = self.entries + self.receiver_entries[i]
+            sender: int = entry.sender
+            if sender not in all_locations:
+                all_locations[sender] = set()
+            all_locations[sender].add(entry.location)
         return all_locations
 
     def get_checked(self, state: State, team: int, slot: int) -> List[int]:
@@ -224,7 +224,7 @@ class ERPlacementState:
         # propagate back to the real multiworld.
         copied_state.reachable_regions[self.world.player].add(target_entrance.connected_region)
         copied_state.blocked_connections[self.world.player].remove(source_exit)
-        copied_state.blocked_connections[self.world.player].update(target_entrance.connected_region.exits)
+        copied_state.block_connections(self.world.player, target_entrance.connected_region.exits)
         copied_state.update_reachable_regions(self.world.player)
         copied_state.sweep_for_advancements()
         # test that at there are newly reachable randomized exits that are ACTUALLY reachable
@@ -0,0 +1,144 @@
+"""
+Structured timing of a whole generation, enabled with `Generate.py --profile`.
+
+Spans are recorded per thread and written in the Chrome trace event format, which can be opened in Perfetto,
+chrome://tracing or speedscope to get a flamegraph of the generation phases and worlds.
+"""
+from __future__ import annotations
+
+import json
+import os
+import sys
+import threading
+import time
+import typing
+from collections import Counter
+
+if typing.TYPE_CHECKING:
+    from BaseClasses import MultiWorld
+
+_T = typing.TypeVar("_T")
+
+
+def peak_rss() -> typing.Optional[int]:
+    """Peak resident set size of this process in bytes so far, or None if it can't be measured on this platform."""
+    try:
+        import resource
+    except ModuleNotFoundError:
+        return None  # unix only module
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return max_rss if sys.platform == "darwin" else max_rss * 1024  # bytes on macOS, KiB elsewhere
+
+
+class Span:
+    """
+    A timed span of a GenerationProfile. Can be used as a context manager, or ended manually.
+    `args` can be extended with results, such as counts, until the span ends.
+    """
+    __slots__ = ("profile", "name", "category", "args", "start")
+
+    def __init__(self, profile: typing.Optional[GenerationProfile], name: str, category: str,
+                 args: typing.Dict[str, typing.Any]) -> None:
+        self.profile = profile
+        self.name = name
+        self.category = category
+        self.args = args
+        self.start = time.perf_counter()
+
+    def end(self, **args: typing.Any) -> None:
+        if self.profile:
+            self.args.update(args)
+            self.profile.add(self.name, self.category, self.start, time.perf_counter(), self.args)
+
+    def __enter__(self) -> Span:
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        if exc_type:
+            self.end(failed=True)
+        else:
+            self.end()
+
+
+class GenerationProfile:
+    """Collects spans of a generation from all threads."""
+    events: typing.List[typing.Dict[str, typing.Any]]
+    thread_names: typing.Dict[int, str]
+
+    def __init__(self) -> None:
+        self.events = []
+        self.thread_names = {}
+        self.start = time.perf_counter()
+        self.pid = os.getpid()
+        self._lock = threading.Lock()
+
+    def span(self, name: str, category: str = "phase", **args: typing.Any) -> Span:
+        return Span(self, name, category, args)
+
+    def add(self, name: str, category: str, start: float, end: float, args: typing.Dict[str, typing.Any]) -> None:
+        thread = threading.current_thread()
+        max_rss = peak_rss()
+        if max_rss is not None:
+            args["peak_rss"] = max_rss
+        event = {
+            "name": name,
+            "cat": category,
+            "ph": "X",  # complete event
+            "ts": (start - self.start) * 1_000_000,
+            "dur": (end - start) * 1_000_000,
+            "pid": self.pid,
+            "tid": thread.ident,
+            "args": args,
+        }
+        with self._lock:
+            self.events.append(event)
+            self.thread_names.setdefault(thread.ident, thread.name)
+
+    def summary(self) -> typing.Dict[str, typing.Dict[str, float]]:
+        """Total seconds spent per category and name, and per game and player for world methods."""
+        summary: typing.Dict[str, typing.Counter[str]] = {}
+        with self._lock:
+            events = list(self.events)
+        for event in events:
+            seconds = event["dur"] / 1_000_000
+            summary.setdefault(event["cat"], Counter())[event["name"]] += seconds
+            if "player" in event["args"]:
+                summary.setdefault("games", Counter())[event["args"]["game"]] += seconds
+                summary.setdefault("players", Counter())[
+                    f"{event['args']['player']} ({event['args']['player_name']})"] += seconds
+        return {category: dict(totals.most_common()) for category, totals in summary.items()}
+
+    def write(self, path: str) -> None:
+        with self._lock:
+            events = sorted(self.events, key=lambda event: event["ts"])
+            thread_names = dict(self.thread_names)
+        metadata = [{"name": "thread_name", "ph": "M", "pid": self.pid, "tid": tid, "args": {"name": name}}
+                    for tid, name in thread_names.items()]
+        with open(path, "w") as f:
+            json.dump({
+                "traceEvents": metadata + events,
+                "displayTimeUnit": "ms",
+                "otherData": {"summary": self.summary()},
+            }, f)
+
+
+_unprofiled_span = Span(None, "unprofiled", "phase", {})
+"""Returned for every span started without a profile, so they don't cost anything when not profiling."""
+
+
+def profile_span(multiworld: typing.Optional[MultiWorld], name: str, category: str = "phase",
+                 **args: typing.Any) -> Span:
+    """Starts a span in the multiworld's profile. The span does nothing if the multiworld isn't being profiled."""
+    profile = multiworld.profile if multiworld else None
+    if not profile:
+        return _unprofiled_span
+    return Span(profile, name, category, args)
+
+
+def profiled(multiworld: MultiWorld, name: str, category: str,
+             function: typing.Callable[[], _T]) -> typing.Callable[[], _T]:
+    """Wraps function to be run in a span, for example in another thread."""
+    def run() -> _T:
+        with profile_span(multiworld, name, category):
+            return function()
+    return run
@@ -609,6 +609,12 @@ class ServerOptions(Group):
         OFF = 0
         ON = 1
 
+    class SetReplyDelay(int):
+        """
+        Milliseconds for which updates of a data storage key are held back and coalesced into one SetReply per
+        subscriber, 0 to send every update immediately
+        """
+
     host: str | None = None
     port: int = 38281
     password: str | None = None
@@ -628,6 +634,7 @@ class ServerOptions(Group):
     auto_shutdown: AutoShutdown = AutoShutdown(0)
     compatibility: Compatibility = Compatibility(2)
     log_network: LogNetwork = LogNetwork(0)
+    set_reply_delay: SetReplyDelay = SetReplyDelay(0)
 
 
 class GeneratorOptions(Group):
@@ -687,6 +694,12 @@ class GeneratorOptions(Group):
         start_inventory -> Move remaining items to start_inventory, generate additional filler items to fill locations.
         """
 
+    class SweepProcesses(int):
+        """
+        Number of worker processes that large sweeps for reachable items may use to test locations in parallel.
+        0 or 1 disables this. Only supported on platforms that can fork processes, e.g. Linux.
+        """
+
     enemizer_path: EnemizerPath = EnemizerPath("EnemizerCLI/EnemizerCLI.Core")  # + ".exe" is implied on Windows
     player_files_path: PlayerFilesPath = PlayerFilesPath("Players")
     players: Players = Players(0)
@@ -696,6 +709,7 @@ class GeneratorOptions(Group):
     race: Race = Race(0)
     plando_options: PlandoOptions = PlandoOptions("bosses, connections, texts")
     panic_method: PanicMethod = PanicMethod("swap")
+    sweep_processes: SweepProcesses = SweepProcesses(0)
     loglevel: str = "info"
     logtime: bool = False
 
@@ -5,3 +5,9 @@ if __name__ == "__main__":
     load_worlds.run_load_worlds_benchmark()
     import locations
     locations.run_locations_benchmark()
+    import playthrough
+    playthrough.run_playthrough_benchmark()
+    import generation
+    generation.run_generation_benchmark()
+    import encoding
+    encoding.run_encoding_benchmark()
@@ -0,0 +1,138 @@
+import typing
+
+recorded_prefixes: typing.Dict[str, str] = {
+    "Outgoing message: ": "outgoing",
+    "Outgoing broadcast: ": "outgoing",
+    "Incoming message: ": "incoming",
+}
+"""Prefixes of messages in the log of a server with log_network enabled, by direction."""
+
+
+def read_recorded_traffic(path: str) -> typing.List[typing.Tuple[str, str]]:
+    """
+    Read the traffic of a server log written with log_network enabled.
+
+    :param path: Path of the log.
+    :return: Direction and encoded message of each recorded message.
+    """
+    traffic = []
+    with open(path, encoding="utf-8-sig") as f:
+        for line in f:
+            for prefix, direction in recorded_prefixes.items():
+                index = line.find(prefix)
+                if index != -1:
+                    traffic.append((direction, line[index + len(prefix):].rstrip("\n")))
+                    break
+    return traffic
+
+
+def synthetic_traffic(players: int = 100, items_per_player: int = 200, seed: int = 0) \
+        -> typing.List[typing.Tuple[str, str]]:
+    """
+    Traffic of a room of generic games, in which every player connects and then checks all of their locations.
+
+    :param players: Number of slots of the room.
+    :param items_per_player: Locations of each slot, each sending one item to a random slot.
+    :param seed: Seed of the random items.
+    :return: Direction and encoded message of each message.
+    """
+    from random import Random
+
+    from MultiServer import json_format_send_event
+    from NetUtils import encode, Hint, NetworkItem, NetworkPlayer, NetworkSlot, SlotType
+    from Utils import Version
+
+    r = Random(seed)
+    slots = range(1, players + 1)
+    network_players = [NetworkPlayer(0, slot, f"Player{slot}", f"Player{slot}") for slot in slots]
+    slot_info = {slot: NetworkSlot(f"Player{slot}", "Generic Game", SlotType.player) for slot in slots}
+    placements = {slot: [NetworkItem(r.randint(1000, 1999), location, r.choice(slots),
+                                     r.choice((0, 0, 0, 0, 0, 0, 0, 1, 2, 4)))
+                         for location in range(1000, 1000 + items_per_player)] for slot in slots}
+    received: typing.Dict[int, typing.List[NetworkItem]] = {slot: [] for slot in slots}
+
+    traffic = []
+    for slot in slots:
+        traffic.append(("incoming", encode([{"cmd": "Connect", "password": None, "game": "Generic Game",
+                                             "name": f"Player{slot}", "uuid": str(slot),
+                                             "version": Version(0, 6, 2), "items_handling": 0b111, "tags": [],
+                                             "slot_data": True}])))
+        traffic.append(("outgoing", encode([{"cmd": "Connected", "team": 0, "slot": slot, "players": network_players,
+                                             "missing_locations": [item.location for item in placements[slot]],
+                                             "checked_locations": [], "slot_info": slot_info, "hint_points": 0,
+                                             "slot_data": {}}])))
+    for location_index in range(items_per_player):
+        for finder in slots:
+            sent = placements[finder][location_index]
+            item = NetworkItem(sent.item, sent.location, finder, sent.flags)
+            traffic.append(("incoming", encode([{"cmd": "LocationChecks", "locations": [sent.location]}])))
+            received[sent.player].append(item)
+            traffic.append(("outgoing", encode([{"cmd": "ReceivedItems", "index": len(received[sent.player]) - 1,
+                                                 "items": [item]}])))
+            traffic.append(("outgoing", encode([json_format_send_event(NetworkItem(*sent[:3], sent.flags), finder)])))
+    for slot in slots:  # everyone reconnects, getting their whole inventory and hints
+        traffic.append(("outgoing", encode([{"cmd": "ReceivedItems", "index": 0, "items": received[slot]}])))
+        hints = [Hint(slot, finder, item.location, item.item, True, item_flags=item.flags)
+                 for finder in r.sample(slots, 5) for item in placements[finder][:10]]
+        traffic.append(("outgoing", encode([{"cmd": "SetReply", "key": f"_read_hints_0_{slot}", "value": hints}])))
+    return traffic
+
+
+def run_encoding_benchmark(recording: typing.Optional[str] = None, repeat: int = 5) -> bool:
+    """
+    Run a benchmark of NetUtils.encode and decode against the reference paths, which convert all TypedTuples before
+    encoding and hook every decoded object, over recorded or synthetic server traffic.
+
+    :param recording: Server log written with log_network enabled. Traffic of a synthetic room is used if not given.
+    :param repeat: How many times the traffic is encoded and decoded.
+    :return: Whether both paths produced the same results.
+    """
+    import logging
+
+    from time_it import TimeIt
+
+    from NetUtils import _decode, _encode_scanned, decode, encode
+    from Utils import init_logging
+
+    init_logging("Benchmark Runner")
+    logger = logging.getLogger("Benchmark")
+
+    traffic = read_recorded_traffic(recording) if recording else synthetic_traffic()
+    encoded_messages = [message for _, message in traffic]
+    outgoing = [_decode(message) for direction, message in traffic if direction == "outgoing"]
+    logger.info(f"Replaying {len(outgoing)} outgoing and {len(traffic) - len(outgoing)} incoming messages, "
+                f"{sum(map(len, encoded_messages)) / 2 ** 20:.1f} MiB, {repeat} times.")
+
+    same = True
+    for name, reference, fast, messages in (("encode", _encode_scanned, encode, outgoing),
+                                            ("decode", _decode, decode, encoded_messages)):
+        with TimeIt(f"reference {name}") as reference_time:
+            for _ in range(repeat):
+                reference_results = [reference(message) for message in messages]
+        with TimeIt(name) as fast_time:
+            for _ in range(repeat):
+                fast_results = [fast(message) for message in messages]
+        logger.info(f"{name} took {fast_time.dif:.4f} seconds, reference {reference_time.dif:.4f} seconds, "
+                    f"{reference_time.dif / fast_time.dif:.2f}x.")
+        if fast_results != reference_results:
+            logger.error(f"{name} results differ from the reference.")
+            same = False
+    return same
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    from path_change import change_home
+
+    parser = argparse.ArgumentParser(description="Benchmark NetUtils encode and decode over server traffic.")
+    parser.add_argument("recording", nargs="?", default=None,
+                        help="Server log written with log_network enabled, defaults to synthetic traffic.")
+    parser.add_argument("--repeat", type=int, default=5, help="How many times the traffic is replayed.")
+    benchmark_args = parser.parse_args()
+    if benchmark_args.recording:
+        import os
+        benchmark_args.recording = os.path.abspath(benchmark_args.recording)  # before changing the working directory
+    change_home()
+    sys.exit(not run_encoding_benchmark(benchmark_args.recording, benchmark_args.repeat))
@@ -0,0 +1,212 @@
+import typing
+
+mixed_games: typing.Tuple[str, ...] = (
+    "Hollow Knight",
+    "Timespinner",
+    "The Witness",
+    "Super Mario 64",
+    "Risk of Rain 2",
+    "A Short Hike",
+    "Celeste 64",
+    "Subnautica",
+    "Muse Dash",
+    "Raft",
+)
+"""Games of the mixed scenarios. Only games that don't need a base ROM for their output are used."""
+
+item_link_games: typing.Tuple[str, ...] = ("Hollow Knight", "Timespinner", "The Witness", "Super Mario 64")
+item_link_size: int = 8
+"""How many players share each item link of the item links scenario."""
+
+
+def mixed_players(players: int) -> typing.List[typing.Dict[str, typing.Any]]:
+    """Player yamls of mixed games with their default options."""
+    player_yamls = []
+    for player in range(1, players + 1):
+        game = mixed_games[(player - 1) % len(mixed_games)]
+        player_yamls.append({"name": f"Player{player}", "game": game, game: {}})
+    return player_yamls
+
+
+def item_link_players(players: int) -> typing.List[typing.Dict[str, typing.Any]]:
+    """Player yamls linking their whole item pool with other players of the same game."""
+    player_yamls = []
+    for player in range(1, players + 1):
+        game = item_link_games[(player - 1) % len(item_link_games)]
+        link = (player - 1) // (len(item_link_games) * item_link_size)
+        player_yamls.append({
+            "name": f"Player{player}",
+            "game": game,
+            game: {"item_links": [{"name": f"{game} Link {link}", "item_pool": ["Everything"],
+                                   "replacement_item": None}]},
+        })
+    return player_yamls
+
+
+class Scenario(typing.NamedTuple):
+    seed: int
+    spoiler: int
+    """Spoiler level, playthrough paths are too slow for the largest scenarios."""
+    player_yamls: typing.Callable[[], typing.List[typing.Dict[str, typing.Any]]]
+
+
+scenarios: typing.Dict[str, Scenario] = {
+    "solo": Scenario(1, 3, lambda: mixed_players(1)),
+    "mixed_50": Scenario(2, 3, lambda: mixed_players(50)),
+    "mixed_300": Scenario(3, 2, lambda: mixed_players(300)),
+    "item_links": Scenario(4, 2, lambda: item_link_players(64)),
+}
+
+measured_categories: typing.Tuple[str, ...] = ("main", "phase", "stage", "output")
+"""Categories of generation profile spans that are recorded as phases of a scenario."""
+
+default_baseline_path: str = "generation_baseline.json"
+
+
+def run_scenario(name: str, home: str) -> typing.Dict[str, typing.Dict[str, float]]:
+    """
+    Generate a scenario with Generate.main and Main.main, meant to be run in a fresh process so that its peak RSS is
+    its own.
+
+    :param name: Name of the scenario.
+    :param home: Archipelago directory.
+    :return: Seconds and peak RSS in bytes per phase.
+    """
+    import os
+    import sys
+    import tempfile
+    import time
+
+    import yaml
+
+    from Utils import local_path, init_logging
+    local_path.cached_path = home
+    init_logging(f"Benchmark {name}")
+
+    import Generate
+    import Main
+    from profiling import peak_rss
+
+    scenario = scenarios[name]
+    with tempfile.TemporaryDirectory() as player_files, tempfile.TemporaryDirectory() as output_path:
+        for number, player_yaml in enumerate(scenario.player_yamls(), 1):
+            with open(os.path.join(player_files, f"Player{number}.yaml"), "w") as f:
+                yaml.dump(player_yaml, f)
+        sys.argv = [sys.argv[0], "--seed", str(scenario.seed), "--player_files_path", player_files,
+                    "--outputpath", output_path, "--spoiler", str(scenario.spoiler), "--profile"]
+
+        start = time.perf_counter()
+        args, seed = Generate.main()
+        phases = {"Generate.main": {"seconds": time.perf_counter() - start, "peak_rss": peak_rss() or 0}}
+        multiworld = Main.main(args, seed)
+
+    for event in multiworld.profile.events:
+        if event["cat"] in measured_categories:
+            phase = phases.setdefault(event["name"], {"seconds": 0, "peak_rss": 0})
+            phase["seconds"] += event["dur"] / 1_000_000
+            phase["peak_rss"] = max(phase["peak_rss"], event["args"].get("peak_rss", 0))
+    return phases
+
+
+def compare_to_baseline(results: typing.Dict[str, typing.Dict[str, typing.Dict[str, float]]],
+                        baseline: typing.Dict[str, typing.Dict[str, typing.Dict[str, float]]],
+                        tolerance: float, min_seconds: float = 0.5) -> typing.List[str]:
+    """
+    Compare benchmark results to a baseline.
+
+    :param results: Seconds and peak RSS per phase per scenario.
+    :param baseline: Baseline in the same format as results.
+    :param tolerance: Fraction by which a phase may be slower or use more memory than its baseline.
+    :param min_seconds: Phases shorter than this in the baseline are too noisy to be compared by time.
+    :return: Descriptions of the regressions.
+    """
+    regressions = []
+    for scenario, phases in results.items():
+        for phase, measurement in phases.items():
+            base = baseline.get(scenario, {}).get(phase)
+            if not base:
+                continue
+            if base["seconds"] >= min_seconds and measurement["seconds"] > base["seconds"] * (1 + tolerance):
+                regressions.append(f"{scenario} {phase} took {measurement['seconds']:.2f}s, "
+                                   f"baseline {base['seconds']:.2f}s")
+            if base["peak_rss"] and measurement["peak_rss"] > base["peak_rss"] * (1 + tolerance):
+                regressions.append(f"{scenario} {phase} peaked at {measurement['peak_rss'] / 2 ** 20:.0f} MiB RSS, "
+                                   f"baseline {base['peak_rss'] / 2 ** 20:.0f} MiB")
+    return regressions
+
+
+def run_generation_benchmark(scenario_names: typing.Iterable[str] = tuple(scenarios),
+                             baseline_path: str = default_baseline_path, save_baseline: bool = False,
+                             tolerance: float = 0.1) -> bool:
+    """
+    Run a benchmark of whole generations of fixed scenarios, each in its own process, and compare the wall time and
+    peak RSS of their phases against a baseline.
+    Baselines are machine specific, so record one with save_baseline before making the changes to be benchmarked.
+
+    :param scenario_names: Names of the scenarios to generate.
+    :param baseline_path: Path of the baseline json, relative to this directory.
+    :param save_baseline: Whether to write the results to the baseline instead of comparing them to it.
+    :param tolerance: Fraction by which a phase may be slower or use more memory than its baseline.
+    :return: Whether no regressions were found.
+    """
+    import concurrent.futures
+    import json
+    import logging
+    import multiprocessing
+    import os
+
+    from Utils import init_logging, local_path
+
+    init_logging("Benchmark Runner")
+    logger = logging.getLogger("Benchmark")
+    baseline_path = os.path.join(os.path.dirname(__file__), baseline_path)
+
+    baseline = {}
+    if os.path.exists(baseline_path):
+        with open(baseline_path) as f:
+            baseline = json.load(f)
+
+    results = {}
+    for name in scenario_names:
+        with concurrent.futures.ProcessPoolExecutor(1, multiprocessing.get_context("spawn")) as pool:
+            phases = pool.submit(run_scenario, name, local_path()).result()
+        results[name] = phases
+        for phase, measurement in sorted(phases.items(), key=lambda item: -item[1]["seconds"]):
+            logger.info(f"{name} {phase}: {measurement['seconds']:.4f} seconds, "
+                        f"peak RSS {measurement['peak_rss'] / 2 ** 20:.0f} MiB")
+
+    if save_baseline:
+        baseline.update(results)
+        with open(baseline_path, "w") as f:
+            json.dump(baseline, f, indent=2)
+        logger.info(f"Saved baseline of {', '.join(results)} to {baseline_path}.")
+        return True
+
+    regressions = compare_to_baseline(results, baseline, tolerance)
+    for regression in regressions:
+        logger.warning(f"Regression: {regression}")
+    missing = [name for name in results if name not in baseline]
+    if missing:
+        logger.info(f"No baseline for {', '.join(missing)}, record one with --save-baseline.")
+    return not regressions
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    from path_change import change_home
+
+    parser = argparse.ArgumentParser(description="Benchmark whole generations against a baseline.")
+    parser.add_argument("scenarios", nargs="*", default=tuple(scenarios),
+                        help="Scenarios to generate, defaults to all.")
+    parser.add_argument("--baseline", default=default_baseline_path,
+                        help="Baseline json to compare against, relative to this directory.")
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="Write the results to the baseline instead of comparing them.")
+    parser.add_argument("--tolerance", type=float, default=0.1,
+                        help="Fraction by which a phase may be slower or use more memory than its baseline.")
+    benchmark_args = parser.parse_args()
+    change_home()
+    sys.exit(not run_generation_benchmark(benchmark_args.scenarios, benchmark_args.baseline,
+                                          benchmark_args.save_baseline, benchmark_args.tolerance))
@@ -0,0 +1,93 @@
+def run_playthrough_benchmark(games: tuple = ("A Link to the Past", "Ocarina of Time", "Hollow Knight", "Timespinner",
+                                             "The Witness", "Super Mario 64"),
+                              copies: int = 2, seed: int = 0) -> None:
+    """
+    Run a benchmark of the playthrough minimisation in Spoiler.create_playthrough, by generating a multiworld of
+    games with their default options and creating its playthrough with its minimiser and with a reference
+    minimiser that checks each location on its own.
+
+    :param games: Games of the multiworld.
+    :param copies: How many players of each game to generate.
+    :param seed: Seed of the multiworld.
+    """
+    import argparse
+    import logging
+    import typing
+
+    from time_it import TimeIt
+
+    from Utils import init_logging
+    from BaseClasses import CollectionState, Location, MultiWorld, Spoiler
+    from worlds import AutoWorld
+    from worlds.AutoWorld import call_all
+    from Fill import balance_multiworld_progression, distribute_items_restrictive
+
+    init_logging("Benchmark Runner")
+    logger = logging.getLogger("Benchmark")
+
+    def sequential_cull_locations(spoiler: Spoiler, state: CollectionState, locations: typing.List[Location],
+                                  required_locations: typing.Set[Location]) -> typing.Set[Location]:
+        """Reference minimiser, checking every location on its own."""
+        to_delete: typing.Set[Location] = set()
+        for location in locations:
+            required_locations.remove(location)
+            if spoiler.multiworld.can_beat_game(state, required_locations):
+                to_delete.add(location)
+            else:
+                required_locations.add(location)
+        return to_delete
+
+    original_sweep_for_advancements = CollectionState.sweep_for_advancements
+    sweeps = 0
+
+    def counting_sweep_for_advancements(state: CollectionState, *args, **kwargs):
+        """Counts calls of CollectionState.sweep_for_advancements."""
+        nonlocal sweeps
+        sweeps += 1
+        return original_sweep_for_advancements(state, *args, **kwargs)
+
+    player_games = list(games) * copies
+    multiworld = MultiWorld(len(player_games))
+    multiworld.game = dict(enumerate(player_games, 1))
+    multiworld.player_name = {player: f"Tester{player}" for player in multiworld.player_ids}
+    multiworld.set_seed(seed)
+    args = argparse.Namespace()
+    for player, game in multiworld.game.items():
+        for name, option in AutoWorld.AutoWorldRegister.world_types[game].options_dataclass.type_hints.items():
+            option_values = getattr(args, name, {})
+            option_values[player] = option.from_any(option.default)
+            setattr(args, name, option_values)
+    multiworld.set_options(args)
+    multiworld.state = CollectionState(multiworld)
+
+    with TimeIt(f"generation of {multiworld.players} players", logger):
+        for step in ("generate_early", "create_regions", "create_items", "set_rules", "connect_entrances",
+                     "generate_basic", "pre_fill"):
+            call_all(multiworld, step)
+    with TimeIt(f"fill of {multiworld.players} players", logger):
+        distribute_items_restrictive(multiworld)
+        call_all(multiworld, "post_fill")
+        balance_multiworld_progression(multiworld)
+
+    CollectionState.sweep_for_advancements = counting_sweep_for_advancements
+    try:
+        results = {}
+        for name, cull_locations in (("recursive", Spoiler.cull_locations),
+                                     ("sequential", sequential_cull_locations)):
+            multiworld.spoiler.cull_locations = cull_locations.__get__(multiworld.spoiler)
+            sweeps = 0
+            with TimeIt(f"{name} playthrough") as t:
+                multiworld.spoiler.create_playthrough(create_paths=False)
+            results[name] = multiworld.spoiler.playthrough
+            logger.info(f"{name} playthrough took {t.dif:.4f} seconds with {sweeps} sweeps.")
+        if results["recursive"] != results["sequential"]:
+            logger.error("Playthroughs differ.")
+    finally:
+        CollectionState.sweep_for_advancements = original_sweep_for_advancements
+        del multiworld.spoiler.cull_locations
+
+
+if __name__ == "__main__":
+    from path_change import change_home
+    change_home()
+    run_playthrough_benchmark()
@@ -433,6 +433,45 @@ class TestFillRestrictive(unittest.TestCase):
         self.assertTrue(sphere1_loc1.item.name == one_to_two1 or
                         sphere1_loc2.item.name == one_to_two1, "Wrong item in Sphere 1")
 
+    def test_unreachable_location_tested_once_per_state(self):
+        """Tests that a location found unreachable is not tested again for further items placed with the same state"""
+        multiworld = generate_test_multiworld(3)
+        players = [generate_player_data(multiworld, player, 2, 2) for player in range(1, 4)]
+        access_checks = 0
+
+        def never_reachable(state) -> bool:
+            nonlocal access_checks
+            access_checks += 1
+            return False
+
+        unreachable = generate_locations(1, 1, players[0].menu, None, "_unreachable")[0]
+        set_rule(unreachable, never_reachable)
+        locations = [unreachable] + [location for player in players for location in player.locations]
+        items = [item for player in players for item in player.prog_items]
+        fill_restrictive(multiworld, multiworld.state, locations, items)
+
+        self.assertEqual([unreachable], locations)
+        self.assertEqual([], items)
+        # 6 items placed in 2 batches of one item per player
+        self.assertEqual(2, access_checks)
+
+    def test_base_state_not_modified(self):
+        """Tests that fill_restrictive keeps collecting and removing pool items in its own state, not in base_state"""
+        multiworld = generate_test_multiworld()
+        player1 = generate_player_data(multiworld, 1, 3, 3)
+        item0, item1, item2 = player1.prog_items
+        loc0, loc1, loc2 = player1.locations
+        set_rule(loc1, lambda state: state.has(item0.name, player1.id))
+        set_rule(loc2, lambda state: state.has(item1.name, player1.id))
+        base_state = multiworld.state.copy()
+
+        fill_restrictive(multiworld, base_state, player1.locations, player1.prog_items)
+
+        self.assertEqual(0, sum(base_state.prog_items[player1.id].values()))
+        self.assertEqual(item0, loc0.item)
+        self.assertEqual(item1, loc1.item)
+        self.assertEqual(item2, loc2.item)
+
     def test_double_sweep(self):
         """Test that sweep doesn't duplicate Event items when sweeping"""
         # test for PR1114
@@ -880,3 +919,46 @@ class TestBalanceMultiworldProgression(unittest.TestCase):
 
         self.assertRegionContains(
             self.player1.regions[2], self.player2.prog_items[0])
+
+    def test_balances_in_several_passes(self) -> None:
+        """
+        Test that progression balancing, which reuses spheres and candidate states until it moves items, places items
+        the same as balancing that searched every sphere and collected every candidate again, over several passes
+        """
+        multiworld = generate_test_multiworld(3)
+        multiworld.random.seed(2)
+        players = [generate_player_data(multiworld, player, 5, 4) for player in range(1, 4)]
+        for player in players:
+            # a chain of regions, each requiring the next progression item of the player
+            for item in player.prog_items:
+                player.generate_region(player.regions[-1], 5,
+                                       lambda state, name=item.name, p=player.id: state.has(name, p))
+            multiworld.worlds[player.id].options.progression_balancing.value = 99
+            multiworld.completion_condition[player.id] = \
+                lambda state, p=player: state.has_all(names(p.prog_items), p.id)
+        locations = [location for player in players for location in player.locations]
+        multiworld.random.shuffle(locations)
+        fill_restrictive(multiworld, multiworld.state, locations,
+                         [item for player in players for item in player.prog_items])
+        for location in locations:
+            multiworld.push_item(location, generate_items(1, location.player)[0], False)
+
+        with self.assertLogs(level="DEBUG") as logs:
+            balance_multiworld_progression(multiworld)
+
+        self.assertEqual(2, sum(message.startswith("DEBUG:root:Moved") for message in logs.output))
+        # placements of balancing before spheres and candidate states were reused
+        self.assertEqual({
+            "player1_progitem0": "player2_location1",
+            "player1_progitem1": "player3_location4",
+            "player1_progitem2": "player1_location3",
+            "player1_progitem3": "player1_region1_location1",
+            "player2_progitem0": "player2_location0",
+            "player2_progitem1": "player2_region1_location0",
+            "player2_progitem2": "player1_location1",
+            "player2_progitem3": "player1_location0",
+            "player3_progitem0": "player3_location2",
+            "player3_progitem1": "player2_location2",
+            "player3_progitem2": "player3_location3",
+            "player3_progitem3": "player1_region1_location4",
+        }, {item.name: item.location.name for player in players for item in player.prog_items})
@@ -0,0 +1,73 @@
+import threading
+import unittest
+
+from BaseClasses import MultiWorld, SphereAnalysis
+from Fill import FillError
+from test.general import generate_items, generate_locations, generate_test_multiworld
+
+
+class TestSphereAnalysis(unittest.TestCase):
+    multiworld: MultiWorld
+
+    def setUp(self) -> None:
+        self.multiworld = generate_test_multiworld()
+        menu = self.multiworld.get_region("Menu", 1)
+        self.locations = generate_locations(4, 1, menu, 1)
+        self.items = generate_items(2, 1, True, 1) + generate_items(1, 1, False, 1)
+        self.event_location = generate_locations(1, 1, menu, None, "_event")[0]
+        self.event = generate_items(1, 1, True)[0]
+        self.unreachable = generate_locations(1, 1, menu, 1, "_unreachable")[0]
+
+        self.locations[1].access_rule = lambda state: state.has(self.items[0].name, 1)
+        self.locations[2].access_rule = lambda state: state.has(self.event.name, 1)
+        self.event_location.access_rule = lambda state: state.has(self.items[1].name, 1)
+        self.unreachable.access_rule = lambda state: False
+        for location, item in zip(self.locations, self.items):
+            location.place_locked_item(item)
+        self.event_location.place_locked_item(self.event)
+        self.multiworld.completion_condition[1] = lambda state: state.has(self.event.name, 1)
+
+    def test_same_spheres(self) -> None:
+        """Test that analysed spheres are the same as the ones walked by the multiworld"""
+        spheres = list(self.multiworld.get_spheres())
+        sendable_spheres = list(self.multiworld.get_sendable_spheres())
+
+        self.multiworld.sphere_analysis = SphereAnalysis(self.multiworld)
+        self.assertEqual(spheres, list(self.multiworld.get_spheres()))
+        self.assertEqual(sendable_spheres, list(self.multiworld.get_sendable_spheres()))
+        self.assertEqual({self.unreachable}, self.multiworld.sphere_analysis.unreachable)
+        self.assertEqual(2, self.multiworld.sphere_analysis.location_sphere[self.event_location])
+
+    def test_same_accessibility(self) -> None:
+        """Test that accessibility checks give the same result with analysed spheres"""
+        analysis = SphereAnalysis(self.multiworld)
+        accessibility = self.multiworld.worlds[1].options.accessibility
+        accessibility.value = accessibility.option_minimal
+        self.assertTrue(self.multiworld.fulfills_accessibility())
+        self.assertTrue(analysis.fulfills_accessibility())
+
+        accessibility.value = accessibility.option_full
+        self.assertRaises(FillError, self.multiworld.fulfills_accessibility)
+        self.assertRaises(FillError, analysis.fulfills_accessibility)
+
+    def test_same_playthrough(self) -> None:
+        """Test that the spoiler playthrough is the same with analysed spheres"""
+        self.multiworld.spoiler.create_playthrough()
+        playthrough = self.multiworld.spoiler.playthrough
+
+        self.multiworld.sphere_analysis = SphereAnalysis(self.multiworld)
+        self.multiworld.spoiler.create_playthrough()
+        self.assertEqual(playthrough, self.multiworld.spoiler.playthrough)
+
+    def test_analysed_on_first_use(self) -> None:
+        """Test that the spheres are only analysed once the placement is final, once for all threads using them"""
+        self.assertIsNone(self.multiworld.sphere_analysis)
+        self.multiworld.final_placement = True
+        analyses = []
+        threads = [threading.Thread(target=lambda: analyses.append(self.multiworld.sphere_analysis)) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertIsInstance(analyses[0], SphereAnalysis)
+        self.assertTrue(all(analysis is self.multiworld.sphere_analysis for analysis in analyses))
@@ -1,7 +1,13 @@
+import multiprocessing
 import unittest
+import unittest.mock
+from collections import Counter
+from typing import Callable
 
+from BaseClasses import CollectionState, Item, ItemClassification, Region
+from Fill import distribute_items_restrictive
 from worlds.AutoWorld import AutoWorldRegister, call_all
-from . import setup_solo_multiworld
+from . import generate_locations, generate_test_multiworld, setup_multiworld, setup_solo_multiworld
 
 
 class TestBase(unittest.TestCase):
@@ -27,3 +33,269 @@ class TestBase(unittest.TestCase):
                     with self.subTest("Step", step=step):
                         call_all(multiworld, step)
                         self.assertTrue(multiworld.get_all_state(False, allow_partial_entrances=True))
+
+
+class TestIncrementalReachability(unittest.TestCase):
+    def setUp(self) -> None:
+        self.multiworld = generate_test_multiworld()
+        self.world = self.multiworld.worlds[1]
+        self.world.incremental_reachability = True
+        self.rule_calls: Counter[str] = Counter()
+        menu = self.multiworld.get_region("Menu", 1)
+        regions = [Region(name, 1, self.multiworld) for name in ("Sword Room", "Bow Room", "Vault", "Anywhere")]
+        self.multiworld.regions += regions
+
+        def counted_rule(name: str, rule: Callable[[CollectionState], bool]) -> Callable[[CollectionState], bool]:
+            def wrapped(state: CollectionState) -> bool:
+                self.rule_calls[name] += 1
+                return rule(state)
+            return wrapped
+
+        menu.connect(regions[0], "To Sword Room", counted_rule("sword", lambda state: state.has("Sword", 1)))
+        menu.connect(regions[1], "To Bow Room", counted_rule("bow", lambda state: state.has("Bow", 1)))
+        regions[0].connect(regions[2], "To Vault",
+                           counted_rule("vault", lambda state: state.can_reach_region("Bow Room", 1)))
+        self.multiworld.register_indirect_condition(regions[1], self.multiworld.get_entrance("To Vault", 1))
+        menu.connect(regions[3], "To Anywhere", counted_rule("total", lambda state: state.prog_items[1].total() >= 3))
+
+    def test_only_dependent_connections_retested(self) -> None:
+        """Tests that collecting an item only retests the blocked connections whose rule read that item."""
+        state = CollectionState(self.multiworld)
+        self.assertFalse(state.can_reach_region("Sword Room", 1))
+        self.assertEqual(self.rule_calls, {"sword": 1, "bow": 1, "total": 1})
+
+        state.collect(Item("Sword", ItemClassification.progression, None, 1), True)
+        self.assertTrue(state.can_reach_region("Sword Room", 1))
+        self.assertFalse(state.can_reach_region("Vault", 1))
+        # the "Bow" rule did not read "Sword", the untracked `total()` rule is retested on every update
+        self.assertEqual(self.rule_calls, {"sword": 2, "bow": 1, "vault": 1, "total": 2})
+
+        state.collect(Item("Bow", ItemClassification.progression, None, 1), True)
+        self.assertTrue(state.can_reach_region("Vault", 1))
+        self.assertFalse(state.can_reach_region("Anywhere", 1))
+        state.collect(Item("Arrow", ItemClassification.progression, None, 1), True)
+        self.assertTrue(state.can_reach_region("Anywhere", 1))
+
+    def test_matches_full_update(self) -> None:
+        """Tests that incremental updates reach the same regions as full updates, including after copy and remove."""
+        incremental_state = CollectionState(self.multiworld)
+        items = [Item(name, ItemClassification.progression, None, 1) for name in ("Bow", "Arrow", "Sword")]
+        steps = []
+        for item in items:
+            incremental_state.collect(item, True)
+            steps.append(incremental_state.copy())
+        incremental_state.remove(items[-1])
+        steps.append(incremental_state)
+
+        self.world.incremental_reachability = False
+        for expected_items, state in zip((items[:1], items[:2], items, items[:2]), steps):
+            full_state = CollectionState(self.multiworld)
+            for item in expected_items:
+                full_state.collect(item, True)
+            for region in self.multiworld.get_regions(1):
+                self.world.incremental_reachability = True
+                reachable = region.can_reach(state)
+                self.world.incremental_reachability = False
+                self.assertEqual(reachable, region.can_reach(full_state), region.name)
+
+    def test_restore_reachable_regions(self) -> None:
+        """Tests that regions update from restored reachable regions to the same result as from scratch."""
+        sword, bow = (Item(name, ItemClassification.progression, None, 1) for name in ("Sword", "Bow"))
+        lower_state = CollectionState(self.multiworld)
+        lower_state.collect(sword, True)
+        self.assertTrue(lower_state.can_reach_region("Sword Room", 1))
+        state = lower_state.copy()
+        state.collect(bow, True)
+        state.collect(Item("Arrow", ItemClassification.progression, None, 1), True)
+        self.assertTrue(state.can_reach_region("Anywhere", 1))
+
+        state.remove(bow)
+        state.restore_reachable_regions(1, lower_state)
+        self.assertEqual({region.name for region in self.multiworld.get_regions(1) if region.can_reach(state)},
+                         {"Menu", "Sword Room"})
+
+    def test_untracked_rules_retested(self) -> None:
+        """Tests that rules reading items of other players or failing without reading any item are always retested."""
+        multiworld = generate_test_multiworld(2)
+        multiworld.worlds[1].incremental_reachability = True
+        menu = multiworld.get_region("Menu", 1)
+        regions = [Region(name, 1, multiworld) for name in ("Linked Room", "Open Room")]
+        multiworld.regions += regions
+        opened = False
+        menu.connect(regions[0], "To Linked Room", lambda state: state.has("Key", 2))
+        menu.connect(regions[1], "To Open Room", lambda state: opened)
+
+        state = CollectionState(multiworld)
+        self.assertFalse(state.can_reach_region("Linked Room", 1))
+        self.assertFalse(state.can_reach_region("Open Room", 1))
+        state.collect(Item("Key", ItemClassification.progression, None, 2), True)
+        opened = True
+        state.collect(Item("Sword", ItemClassification.progression, None, 1), True)
+        self.assertTrue(state.can_reach_region("Linked Room", 1))
+        self.assertTrue(state.can_reach_region("Open Room", 1))
+
+    def test_worlds_match_full_update(self) -> None:
+        """Tests that the spheres of a filled multiworld are the same with incremental reachability for every world."""
+        for game_name, world_type in AutoWorldRegister.world_types.items():
+            if not world_type.explicit_indirect_conditions:
+                continue
+            with self.subTest(game=game_name):
+                multiworld = setup_solo_multiworld(world_type)
+                world = multiworld.worlds[1]
+                distribute_items_restrictive(multiworld)
+                call_all(multiworld, "post_fill")
+                full_spheres = list(multiworld.get_spheres())
+                world.incremental_reachability = True
+                self.assertEqual(full_spheres, list(multiworld.get_spheres()))
+
+
+    def test_opted_in_worlds_match_full_update(self) -> None:
+        """Tests that the worlds enabling incremental reachability reach the same regions as full updates after every
+        sphere of a filled multiplayer seed."""
+        for game_name, world_type in AutoWorldRegister.world_types.items():
+            if not (world_type.explicit_indirect_conditions and world_type.incremental_reachability):
+                continue
+            with self.subTest(game=game_name):
+                multiworld = setup_multiworld([world_type] * 3, seed=1)
+                distribute_items_restrictive(multiworld)
+                call_all(multiworld, "post_fill")
+                incremental_state = CollectionState(multiworld)
+                collected = []
+                for sphere in multiworld.get_spheres():
+                    for location in sphere:
+                        if location.item and location.item.advancement:
+                            incremental_state.collect(location.item, True, location)
+                            collected.append(location.item)
+                    incremental_state.sweep_for_advancements()
+                    for world in multiworld.worlds.values():
+                        world.incremental_reachability = False
+                    full_state = CollectionState(multiworld)
+                    for item in collected:
+                        full_state.collect(item, True)
+                    full_state.sweep_for_advancements()
+                    for player in multiworld.player_ids:
+                        full_state.update_reachable_regions(player)
+                        self.assertEqual(incremental_state.reachable_regions[player],
+                                         full_state.reachable_regions[player])
+                    for world in multiworld.worlds.values():
+                        world.incremental_reachability = True
+
+    def test_only_opted_in_players_tracked(self) -> None:
+        """Tests that the read items of blocked connections are only recorded and copied for opted-in players."""
+        multiworld = generate_test_multiworld(2)
+        multiworld.worlds[1].incremental_reachability = True
+        state = CollectionState(multiworld)
+        state.collect(Item("Sword", ItemClassification.progression, None, 1), True)
+        state.collect(Item("Sword", ItemClassification.progression, None, 2), True)
+        state.update_reachable_regions(1)
+        state.update_reachable_regions(2)
+        copy = state.copy()
+        for tracked_state in (state, copy):
+            self.assertEqual(set(tracked_state.dependent_connections), {1})
+            self.assertEqual(set(tracked_state.updated_prog_items), {1})
+
+
+class TestCopy(unittest.TestCase):
+    def test_copies_are_independent(self) -> None:
+        """Tests that changes to a state or its copy, including copies of copies, don't affect each other."""
+        multiworld = generate_test_multiworld(2)
+        state = CollectionState(multiworld)
+        state.collect(Item("Sword", ItemClassification.progression, None, 1), True)
+        first = state.copy()
+        state.collect(Item("Bow", ItemClassification.progression, None, 1), True)
+        state.locations_checked.add("Chest")
+        second = first.copy()
+        first.collect(Item("Shield", ItemClassification.progression, None, 2), True)
+        second.advancements.add("Event")
+
+        self.assertEqual(state.prog_items[1], {"Sword": 1, "Bow": 1})
+        self.assertEqual(state.prog_items[2], {})
+        self.assertEqual(state.locations_checked, {"Chest"})
+        self.assertEqual(state.advancements, set())
+        self.assertEqual(first.prog_items, {1: {"Sword": 1}, 2: {"Shield": 1}})
+        self.assertEqual(first.locations_checked, set())
+        self.assertEqual(first.advancements, set())
+        self.assertEqual(second.prog_items, {1: {"Sword": 1}, 2: {}})
+        self.assertEqual(second.advancements, {"Event"})
+
+    def test_looked_up_containers_are_not_shared(self) -> None:
+        """Tests that containers looked up in a state or its copy after copying can be changed without affecting the
+        other one."""
+        multiworld = generate_test_multiworld(1)
+        state = CollectionState(multiworld)
+        copy = state.copy()
+        state.prog_items[1]["Sword"] += 1
+        copy.prog_items[1]["Bow"] += 1
+        copy.reachable_regions[1].add(multiworld.get_region("Menu", 1))
+        self.assertEqual(state.prog_items[1], {"Sword": 1})
+        self.assertEqual(copy.prog_items[1], {"Bow": 1})
+        self.assertEqual(state.reachable_regions[1], set())
+
+    def test_unchanged_players_are_shared(self) -> None:
+        """Tests that a copy only copies the containers of players that get changed, not those it only reads."""
+        multiworld = generate_test_multiworld(2)
+        state = CollectionState(multiworld)
+        state.collect(Item("Sword", ItemClassification.progression, None, 2), True)
+        self.assertTrue(multiworld.get_region("Menu", 2).can_reach(state))
+        copy = state.copy()
+        copy.collect(Item("Bow", ItemClassification.progression, None, 1), True)
+        self.assertTrue(copy.has("Sword", 2))
+        self.assertTrue(multiworld.get_region("Menu", 2).can_reach(copy))
+
+        self.assertIsNot(copy._prog_items.current[1], state._prog_items.current[1])
+        self.assertIs(copy._prog_items.current[2], state._prog_items.current[2])
+        self.assertIs(copy._reachable_regions.current[2], state._reachable_regions.current[2])
+        self.assertIs(copy._blocked_connections.current[2], state._blocked_connections.current[2])
+
+
+@unittest.skipUnless("fork" in multiprocessing.get_all_start_methods(), "parallel sweeps require fork")
+class TestParallelSweep(unittest.TestCase):
+    def setUp(self) -> None:
+        patch = unittest.mock.patch.object(CollectionState, "parallel_sweep_min_locations", 0)
+        patch.start()
+        self.addCleanup(patch.stop)
+
+    def test_same_result_as_serial_sweep(self) -> None:
+        """Tests that a sweep using worker processes collects the same locations as a serial sweep."""
+        players = 3
+        multiworld = generate_test_multiworld(players)
+        for player in range(1, players + 1):
+            menu = multiworld.get_region("Menu", player)
+            locations = generate_locations(4, player, menu)
+            # each location requires the item of the previous location of the previous player, crossing worlds
+            for index, location in enumerate(locations):
+                location.place_locked_item(Item(f"Key {index}", ItemClassification.progression, None,
+                                                player % players + 1))
+                if index:
+                    location.access_rule = lambda state, required=f"Key {index - 1}", p=player: state.has(required, p)
+        # the last location of player 1 is never reachable
+        multiworld.get_location("player1_location3", 1).access_rule = lambda state: False
+
+        serial_state = CollectionState(multiworld)
+        serial_state.sweep_for_advancements()
+        multiworld.sweep_processes = 2
+        parallel_state = CollectionState(multiworld)
+        self.assertTrue(parallel_state._use_parallel_sweep([(1, []), (2, [])]))
+        parallel_state.sweep_for_advancements()
+
+        self.assertEqual(len(serial_state.advancements), players * 4 - 1)
+        self.assertEqual(parallel_state.advancements, serial_state.advancements)
+        self.assertEqual(parallel_state.prog_items, serial_state.prog_items)
+
+    def test_filled_multiworld(self) -> None:
+        """Tests that a parallel sweep through a filled multiworld collects the same items as a serial sweep, and that
+        the game can be beaten through a parallel sweep yielding after every iteration."""
+        multiworld = setup_multiworld([AutoWorldRegister.world_types["Castlevania 64"]] * 3, seed=1)
+        distribute_items_restrictive(multiworld)
+        call_all(multiworld, "post_fill")
+        serial_state = CollectionState(multiworld)
+        serial_state.sweep_for_advancements()
+        multiworld.sweep_processes = 2
+        parallel_state = CollectionState(multiworld)
+        self.assertTrue(parallel_state._use_parallel_sweep(
+            [(player, multiworld.get_locations(player)) for player in multiworld.player_ids]))
+        parallel_state.sweep_for_advancements()
+
+        self.assertEqual(parallel_state.advancements, serial_state.advancements)
+        self.assertEqual(parallel_state.prog_items, serial_state.prog_items)
+        self.assertTrue(multiworld.can_beat_game(CollectionState(multiworld)))
@@ -0,0 +1,57 @@
+# Tests for NetUtils.encode and NetUtils.decode
+import collections
+import unittest
+
+from NetUtils import (ClientStatus, Hint, HintStatus, NetworkItem, NetworkPlayer, NetworkSlot, SlotType, _decode,
+                      _encode_scanned, decode, encode)
+from Utils import Version
+
+sample_messages = [
+    {"cmd": "ReceivedItems", "index": 0, "items": [NetworkItem(1, 2, 3, 4), NetworkItem(5, -2, 0)]},
+    {"cmd": "Connected", "players": [NetworkPlayer(0, 1, "Alias \"ä\"", "Name")],
+     "slot_info": {1: NetworkSlot("Name", "Game", SlotType.player),
+                   2: NetworkSlot("Group", "Game", SlotType.group, [1, 3])}},
+    {"cmd": "SetReply", "key": "_read_hints_0_1", "value": {Hint(1, 2, 3, 4, False, "", 1, HintStatus.HINT_PRIORITY)}},
+    {"cmd": "Bounced", "data": collections.defaultdict(int, {"status": ClientStatus.CLIENT_GOAL}),
+     "tags": ("DeathLink",), "nested": [[{"a": None, "b": True, "c": 1.5}], frozenset({7})]},
+    {1: "int key", 2.5: "float key", True: "bool key", None: "null key"},
+    NetworkItem(1, 2, 3, SlotType.group),
+    NetworkSlot("Name", "Game", SlotType.group, (NetworkItem(1, 2, 3, 4),)),
+    [float("nan"), float("inf"), -float("inf"), -0.0, 1e300, "\n\t☃"],
+]
+
+
+class TestEncode(unittest.TestCase):
+    def test_same_as_scanned(self) -> None:
+        for message in sample_messages:
+            with self.subTest(message=message):
+                self.assertEqual(_encode_scanned(message), encode(message))
+
+    def test_unsupported(self) -> None:
+        for message in ({(1, 2): 3}, [object()]):
+            with self.subTest(message=message):
+                with self.assertRaises(TypeError):
+                    _encode_scanned(message)
+                with self.assertRaises(TypeError):
+                    encode(message)
+
+
+class TestDecode(unittest.TestCase):
+    def test_typed_tuples(self) -> None:
+        message = [{"cmd": "ReceivedItems", "index": 0, "items": [NetworkItem(1, 2, 3, 4)]}]
+        self.assertEqual(message, decode(encode(message)))
+        self.assertIs(NetworkItem, type(decode(encode(message))[0]["items"][0]))
+
+    def test_extra_and_missing_fields(self) -> None:
+        self.assertEqual(NetworkItem(1, 2, 3, 0), decode('{"item":1,"location":2,"player":3,"class":"NetworkItem"}'))
+        self.assertEqual(NetworkItem(1, 2, 3, 0),
+                         decode('{"item":1,"location":2,"player":3,"extra":4,"class":"NetworkItem"}'))
+
+    def test_escaped_class(self) -> None:
+        version = '[{"cmd":"Connect","version":{"major":0,"minor":6,"build":2,"\\u0063lass":"Version"}}]'
+        self.assertEqual(Version(0, 6, 2), decode(version)[0]["version"])
+
+    def test_same_as_hooked(self) -> None:
+        for message in ('[{"cmd":"LocationChecks","locations":[1,2,3]}]', '{"text":"\\u2603"}', "[]"):
+            with self.subTest(message=message):
+                self.assertEqual(_decode(message), decode(message))
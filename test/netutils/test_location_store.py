@@ -241,6 +241,44 @@ class Base:
             self.assertEqual(len(store[1]), 1)
             self.assertEqual(len(store[2]), 0)
 
+        def test_find_item_copies(self) -> None:
+            store = self.type({
+                1: {1: (5, 2, 1), 2: (6, 2, 0), 3: (5, 2, 0)},
+                2: {2: (5, 2, 0), 1: (5, 1, 0)},
+                3: {1: (5, 3, 0)},
+            })
+            self.assertEqual(list(store.find_item({2}, 5)),
+                             [(1, 1, 5, 2, 1), (1, 3, 5, 2, 0), (2, 2, 5, 2, 0)])
+            self.assertEqual(sorted(store.find_item({1, 2, 3}, 5)),
+                             [(1, 1, 5, 2, 1), (1, 3, 5, 2, 0), (2, 1, 5, 1, 0), (2, 2, 5, 2, 0), (3, 1, 5, 3, 0)])
+            self.assertEqual(list(store.find_item({2}, 7)), [])
+            self.assertEqual(store.get_for_player(2), {1: {1, 2, 3}, 2: {2}})
+
+        def test_receiver_index(self) -> None:
+            # many entries per receiver, so that finding an item searches a range of several items
+            data: RawLocations = {
+                sender: {location: (location % 7 * 10, location % 4 + 1, 0) for location in range(1, 41)}
+                for sender in range(1, 6)
+            }
+            store = self.type(data)
+            entries = [(sender, location, item, receiver, flags)
+                       for sender, locations in data.items()
+                       for location, (item, receiver, flags) in locations.items()]
+            for receiver in range(7):
+                with self.subTest(receiver=receiver):
+                    expected: typing.Dict[int, typing.Set[int]] = {}
+                    for sender, location, _, entry_receiver, _ in entries:
+                        if entry_receiver == receiver:
+                            expected.setdefault(sender, set()).add(location)
+                    self.assertEqual(store.get_for_player(receiver), expected)
+                    # items before, between, after and at the bounds of the items of the receiver
+                    for item in (-1, 0, 5, 10, 30, 60, 61, 70):
+                        self.assertEqual(sorted(store.find_item({receiver}, item)),
+                                         sorted(entry for entry in entries
+                                                if entry[3] == receiver and entry[2] == item))
+            self.assertEqual(sorted(store.find_item({1, 3, 5}, 20)),
+                             sorted(entry for entry in entries if entry[3] in (1, 3) and entry[2] == 20))
+
 
 class TestPurePythonLocationStore(Base.TestLocationStore):
     """Run base method tests for pure python implementation."""
@@ -298,3 +336,19 @@ class TestSpeedupsLocationStoreConstructor(Base.TestLocationStoreConstructor):
             self.type({
                 1: {1: None},
             })
+
+
+@unittest.skipIf(LocationStore is _LocationStore and not ci, "_speedups not available")
+class TestLocationStoreImplementations(unittest.TestCase):
+    """Compare the results of the pure python and cython implementations."""
+    def test_find_item_order(self) -> None:
+        data: RawLocations = {
+            3: {2: (5, 1, 0), 1: (5, 2, 0)},
+            1: {3: (5, 2, 0), 1: (5, 1, 0), 2: (6, 2, 0)},
+            2: {2: (5, 3, 0), 1: (5, 2, 0)},
+        }
+        python_store = _LocationStore(data)
+        speedups_store = LocationStore(data)
+        for slots in ({1}, {2}, {1, 2}, {3, 1}, {1, 2, 3}):
+            with self.subTest(slots=slots):
+                self.assertEqual(list(speedups_store.find_item(slots, 5)), list(python_store.find_item(slots, 5)))
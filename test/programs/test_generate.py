@@ -1,6 +1,8 @@
 # Tests for Generate.py (ArchipelagoGenerate.exe)
 
+import json
 import unittest
+import unittest.mock
 import os
 import os.path
 import sys
@@ -72,6 +74,60 @@ class TestGenerateMain(unittest.TestCase):
 
         self.assertOutput(self.output_tempdir.name)
 
+    def test_generate_profile(self):
+        sys.argv = [sys.argv[0], '--seed', '0',
+                    '--player_files_path', str(self.abs_input_dir),
+                    '--outputpath', self.output_tempdir.name,
+                    '--profile']
+        print(f'Testing Generate.py {sys.argv} in {os.getcwd()}')
+        Main.main(*Generate.main())
+
+        self.assertOutput(self.output_tempdir.name)
+        profile_files = list(Path(self.output_tempdir.name).glob('*_profile.json'))
+        self.assertEqual(1, len(profile_files))
+        with open(profile_files[0]) as f:
+            profile = json.load(f)
+        span_names = {event["name"] for event in profile["traceEvents"]}
+        self.assertIn("Main.main", span_names)
+        self.assertIn("create_regions", span_names)
+        self.assertIn("create_regions", profile["otherData"]["summary"]["stage"])
+
+    def test_generate_profile_failed(self):
+        """Tests that the profile of a generation is written when a world fails, with the failed calls marked."""
+        from worlds.AutoWorld import World
+        sys.argv = [sys.argv[0], '--seed', '0',
+                    '--player_files_path', str(self.abs_input_dir),
+                    '--outputpath', self.output_tempdir.name,
+                    '--profile']
+        def post_fill(world: World) -> None:
+            raise RuntimeError("post_fill failed")
+
+        with unittest.mock.patch.object(World, "post_fill", post_fill):
+            with self.assertRaisesRegex(RuntimeError, "post_fill failed"):
+                Main.main(*Generate.main())
+
+        profile_files = list(Path(self.output_tempdir.name).glob('*_profile.json'))
+        self.assertEqual(1, len(profile_files))
+        with open(profile_files[0]) as f:
+            profile = json.load(f)
+        failed_spans = {event["name"] for event in profile["traceEvents"] if event.get("args", {}).get("failed")}
+        self.assertIn("Main.main", failed_spans)
+        self.assertIn("post_fill", failed_spans)  # stage
+        self.assertIn(post_fill.__qualname__, failed_spans)  # world
+
+    def test_spheres_analysed_once(self):
+        """Tests that the outputs share one analysis of the spheres, which a spoiler without playthrough skips."""
+        import BaseClasses
+        for extra_args, analyses in (([], 1), (['--spoiler_only', '--spoiler', '1'], 0)):
+            with self.subTest(args=extra_args), TemporaryDirectory(prefix='AP_out_') as output_dir:
+                sys.argv = [sys.argv[0], '--seed', '0',
+                            '--player_files_path', str(self.abs_input_dir),
+                            '--outputpath', output_dir, *extra_args]
+                with unittest.mock.patch.object(BaseClasses, "SphereAnalysis",
+                                                wraps=BaseClasses.SphereAnalysis) as sphere_analysis:
+                    Main.main(*Generate.main())
+                self.assertEqual(analyses, sphere_analysis.call_count)
+
     def test_generate_yaml(self):
         # override host.yaml
         from settings import get_settings
@@ -108,6 +164,8 @@ class TestGenerateWeights(TestGenerateMain):
     # don't need to run these tests
     test_generate_absolute = None
     test_generate_relative = None
+    test_generate_profile = None
+    test_generate_profile_failed = None
 
     def test_generate_yaml(self):
         from settings import get_settings
@@ -1,5 +1,28 @@
+import asyncio
+import collections
+import copy
+import os
+import typing
 import unittest
-from MultiServer import Context, ServerCommandProcessor
+import zlib
+from tempfile import TemporaryDirectory
+
+from typing_extensions import override
+
+from MultiServer import (Client, Context, LazyGameTables, ServerCommandProcessor, apply_save_journal, index_spheres,
+                         process_client_cmd, read_save_journal, register_location_checks, send_items_to,
+                         send_new_items, update_aliases)
+from NetUtils import (Endpoint, Hint, HintStatus, LocationStore, NetworkItem, NetworkPlayer, NetworkSlot, SlotType,
+                      decode, encode)
+from Utils import restricted_loads
+
+if typing.TYPE_CHECKING:
+    from NetUtils import ServerConnection
+
+
+def make_client(ctx: Context) -> Client:
+    """Creates a client without a connection, for tests that replace the sending methods of ctx."""
+    return Client(typing.cast("ServerConnection", None), ctx)
 
 
 class TestResolvePlayerName(unittest.TestCase):
@@ -38,3 +61,393 @@ class TestResolvePlayerName(unittest.TestCase):
         assert p.resolve_player("ABC") == (1, 2, "abc"), "case insensitive resolves when 1 match"
         assert p.resolve_player("abcd") == (1, 3, "abCD"), "case insensitive resolves when 1 match"
         assert not p.resolve_player("aB"), "partial name shouldn't resolve to player"
+
+
+class TestNameTables(unittest.TestCase):
+    def test_lazy(self) -> None:
+        """Test that a table is only built when its game is used, but all games are known before."""
+        built: typing.List[str] = []
+
+        def build(game: str) -> str:
+            built.append(game)
+            return game.upper()
+
+        tables = LazyGameTables(build, {"Game A", "Game B"})
+        self.assertIn("Game A", tables)
+        self.assertNotIn("Game C", tables)
+        self.assertEqual([], built)
+        self.assertEqual("GAME A", tables["Game A"])
+        self.assertEqual("GAME A", tables["Game A"])
+        self.assertEqual(["Game A"], built)
+        self.assertEqual({"Game A"}, set(tables))
+
+    def test_name_tables(self) -> None:
+        """Test that the name tables of a game include its groups and the Archipelago names."""
+        ctx = Context("", 0, "", "", 0, 0, False)
+        game = next(game for game in ctx.gamespackage if game != "Archipelago")
+        self.assertEqual("Nothing", ctx.item_names[game][-1])
+        self.assertEqual("Cheat Console", ctx.location_names[game][-1])
+        self.assertEqual("Unknown item (ID:-9)", ctx.item_names[game][-9])
+        self.assertEqual({"Archipelago", game}, set(ctx.item_names))
+        self.assertIn("Everything", ctx.all_item_and_group_names[game])
+        self.assertIn("Everywhere", ctx.all_location_and_group_names[game])
+        self.assertNotIn("Not A Game", ctx.all_location_and_group_names)
+        self.assertEqual({game}, set(ctx.all_item_and_group_names))
+
+
+class TestSpheres(unittest.TestCase):
+    def test_get_sphere(self) -> None:
+        ctx = Context("", 0, "", "", 0, 0, False)
+        self.assertEqual(-1, ctx.get_sphere(1, 10))
+
+        ctx.spheres = [{1: {10}, 2: {20}}, {1: {11, 12}}, {2: {21}}]
+        ctx.location_spheres = index_spheres(ctx.spheres)
+        self.assertEqual({1: {10: 0, 11: 1, 12: 1}, 2: {20: 0, 21: 2}}, ctx.location_spheres)
+        self.assertEqual(1, ctx.get_sphere(1, 12))
+        self.assertEqual(2, ctx.get_sphere(2, 21))
+        with self.assertRaises(KeyError):
+            ctx.get_sphere(1, 20)
+        with self.assertRaises(KeyError):
+            ctx.get_sphere(3, 10)
+
+
+class TestSendNewItems(unittest.IsolatedAsyncioTestCase):
+    @override
+    def setUp(self) -> None:
+        self.ctx = Context("", 0, "", "", 0, 0, False)
+        self.sent: typing.List[typing.Tuple[Endpoint, typing.List[typing.Dict[str, typing.Any]]]] = []
+
+        async def send_msgs(endpoint: Endpoint, msgs: typing.Iterable[typing.Dict[str, typing.Any]]) -> bool:
+            self.sent.append((endpoint, list(msgs)))
+            return True
+
+        async def broadcast_send_encoded_msgs(endpoints: typing.Iterable[Endpoint], msg: str) -> bool:
+            for endpoint in endpoints:
+                self.sent.append((endpoint, decode(msg)))
+            return True
+
+        self.ctx.send_msgs = send_msgs
+        self.ctx.broadcast_send_encoded_msgs = broadcast_send_encoded_msgs
+        self.receiver = make_client(self.ctx)
+        self.other = make_client(self.ctx)
+        self.ctx.clients = {0: {1: [self.receiver], 2: [self.other]}}
+
+    async def test_batched(self) -> None:
+        """Test that items sent within one event loop tick reach only their receiver, in one ReceivedItems."""
+        for location in range(3):
+            send_items_to(self.ctx, 0, 1, NetworkItem(location, location, 2, 0))
+            send_new_items(self.ctx)
+        await asyncio.sleep(0)  # flush
+        await asyncio.sleep(0)  # send
+
+        self.assertEqual(1, len(self.sent))
+        client, msgs = self.sent[0]
+        self.assertIs(self.receiver, client)
+        self.assertEqual("ReceivedItems", msgs[0]["cmd"])
+        self.assertEqual([0, 1, 2], [item.item for item in msgs[0]["items"]])
+        self.assertEqual(3, self.receiver.send_index)
+        self.assertEqual(0, self.other.send_index)
+        self.assertFalse(self.ctx.new_item_slots)
+
+    async def test_own_items_before_room_update(self) -> None:
+        """Test that a slot receives the items of its own checks before the RoomUpdate of the checks."""
+        self.ctx.locations = LocationStore({1: {10: (5, 1, 0), 11: (6, 2, 0)}, 2: {}})
+        self.ctx.player_names = {(0, 1): "Player1", (0, 2): "Player2"}
+        self.ctx.slot_info = {slot: NetworkSlot(f"Player{slot}", "Archipelago", SlotType.player) for slot in (1, 2)}
+        self.receiver.remote_items = True
+        register_location_checks(self.ctx, 0, 1, {10, 11})
+        await asyncio.sleep(0)  # flush
+        await asyncio.sleep(0)  # send
+
+        self.assertEqual([(self.receiver, "ReceivedItems"), (self.receiver, "RoomUpdate"),
+                          (self.other, "ReceivedItems")],
+                         [(client, msgs[0]["cmd"]) for client, msgs in self.sent if msgs[0]["cmd"] != "PrintJSON"])
+
+
+class TestLocationHints(unittest.IsolatedAsyncioTestCase):
+    def make_context(self) -> Context:
+        ctx = Context("", 0, "", "", 0, 0, False)
+        ctx.locations = LocationStore({1: {10: (5, 2, 0), 11: (6, 2, 0)}, 2: {20: (7, 1, 0)}})
+        ctx.player_names = {(0, 1): "Player1", (0, 2): "Player2"}
+        ctx.slot_info = {slot: NetworkSlot(f"Player{slot}", "Archipelago", SlotType.player) for slot in (1, 2)}
+        ctx.clients = {0: {1: [], 2: []}}
+        return ctx
+
+    def assert_hints_consistent(self, ctx: Context) -> None:
+        """Asserts that all hints are up to date with their location checks and indexed by location_hints."""
+        indexed = {key: hints for key, hints in ctx.location_hints.items() if hints}
+        expected: typing.Dict[typing.Tuple[int, int, int], typing.Set[Hint]] = collections.defaultdict(set)
+        for (team, _), hints in ctx.hints.items():
+            for hint in hints:
+                self.assertEqual(hint.location in ctx.location_checks[team, hint.finding_player], hint.found)
+                expected[team, hint.finding_player, hint.location].add(hint)
+        self.assertEqual(expected, indexed)
+
+    def test_recheck_location_hints(self) -> None:
+        """Test that checking a location updates its hints for both players and nothing else."""
+        ctx = Context("", 0, "", "", 0, 0, False)
+        hint = Hint(2, 1, 10, 100, False)
+        other_hint = Hint(1, 1, 11, 101, False)
+        ctx.hints[0, 1] = {hint, other_hint}
+        ctx.hints[0, 2] = {hint}
+        ctx.index_hints()
+        self.assertIs(hint, ctx.get_hint(0, 1, 10))
+
+        ctx.location_checks[0, 1] = {10, 11}
+        changed: typing.Set[typing.Tuple[int, int]] = set()
+        ctx.recheck_location_hints(0, 1, {10}, changed)
+
+        found_hint = hint._replace(found=True, status=HintStatus.HINT_FOUND)
+        self.assertEqual({(0, 1), (0, 2)}, changed)
+        self.assertEqual({found_hint, other_hint}, ctx.hints[0, 1])
+        self.assertIn(found_hint, ctx.hints[0, 2])
+        self.assertNotIn(hint, ctx.hints[0, 2])
+        self.assertEqual(found_hint, ctx.get_hint(0, 1, 10))
+        self.assertEqual(other_hint, ctx.get_hint(0, 1, 11), "only the hints of rechecked locations should change")
+
+    async def test_consistent(self) -> None:
+        """Test that hints and their index stay up to date through new hints, checks, hint updates and loads."""
+        ctx = self.make_context()
+        ctx.notify_hints(0, [Hint(2, 1, 10, 5, False), Hint(1, 2, 20, 7, False), Hint(2, 1, 11, 6, False)])
+        self.assert_hints_consistent(ctx)
+
+        register_location_checks(ctx, 0, 1, {10})
+        self.assert_hints_consistent(ctx)
+        hint = ctx.get_hint(0, 1, 10)
+        assert hint
+        self.assertTrue(hint.found)
+
+        client = make_client(ctx)
+        client.auth = True
+        client.team, client.slot = 0, 1
+        await process_client_cmd(ctx, client, {"cmd": "UpdateHint", "player": 2, "location": 20,
+                                               "status": HintStatus.HINT_PRIORITY})
+        self.assert_hints_consistent(ctx)
+        hint = ctx.get_hint(0, 2, 20)
+        assert hint
+        self.assertEqual(HintStatus.HINT_PRIORITY, hint.status)
+
+        # a save whose hints are older than its location checks
+        savedata = copy.deepcopy(ctx.get_save())
+        savedata["location_checks"][0, 1].add(11)
+        loaded = self.make_context()
+        loaded.set_save(savedata)
+        self.assert_hints_consistent(loaded)
+        hint = loaded.get_hint(0, 1, 11)
+        assert hint
+        self.assertTrue(hint.found)
+
+
+class TestEncodedPayloads(unittest.IsolatedAsyncioTestCase):
+    async def test_data_package(self) -> None:
+        """Test that spliced DataPackage messages decode the same as encoding the whole message."""
+        ctx = Context("", 0, "", "", 0, 0, False)
+        sent: typing.List[str] = []
+
+        async def send_encoded_msgs(endpoint: Endpoint, msg: str) -> bool:
+            sent.append(msg)
+            return True
+
+        ctx.send_encoded_msgs = send_encoded_msgs
+        client = make_client(ctx)
+        await process_client_cmd(ctx, client, {"cmd": "GetDataPackage", "games": ["Archipelago", "Not A Game"]})
+        await process_client_cmd(ctx, client, {"cmd": "GetDataPackage"})
+
+        games = {"Archipelago": ctx.gamespackage["Archipelago"]}
+        self.assertEqual(decode(encode([{"cmd": "DataPackage", "data": {"games": games}}])), decode(sent[0]))
+        self.assertEqual(decode(encode([{"cmd": "DataPackage", "data": {"games": ctx.gamespackage}}])),
+                         decode(sent[1]))
+        checksum = ctx.gamespackage["Archipelago"].get("checksum")
+        assert checksum
+        self.assertIn(checksum, ctx.encoded_game_packages)
+        self.assertNotIn(checksum, Context("", 0, "", "", 0, 0, False).encoded_game_packages,
+                         "encoded data packages should only be shared by contexts hosting the same seed")
+
+    def test_aliases(self) -> None:
+        """Test that the encoded players are updated when an alias changes."""
+        ctx = Context("", 0, "", "", 0, 0, False)
+        ctx.player_names = {(0, 1): "Player1", (0, 2): "Player2"}
+        ctx.clients = {0: {1: [], 2: []}}
+        self.assertEqual([NetworkPlayer(0, 1, "Player1", "Player1"), NetworkPlayer(0, 2, "Player2", "Player2")],
+                         decode(ctx.get_encoded_players()))
+
+        ctx.name_aliases[0, 2] = "Alias"
+        update_aliases(ctx, 0)
+        self.assertEqual(NetworkPlayer(0, 2, "Alias (Player2)", "Player2"), decode(ctx.get_encoded_players())[1])
+
+
+class TestBounce(unittest.IsolatedAsyncioTestCase):
+    @override
+    def setUp(self) -> None:
+        self.ctx = Context("", 0, "", "", 0, 0, False)
+        self.ctx.games = {1: "Game A", 2: "Game B", 3: "Game A"}
+        self.ctx.player_names = {(team, slot): f"Player{slot}" for team in (0, 1) for slot in self.ctx.games}
+        self.ctx.clients = {team: {slot: [] for slot in self.ctx.games} for team in (0, 1)}
+        self.bounced: typing.List[typing.Set[Endpoint]] = []
+
+        async def broadcast_send_encoded_msgs(endpoints: typing.Iterable[Endpoint], msg: str) -> bool:
+            self.bounced.append(set(endpoints))
+            return True
+
+        self.ctx.broadcast_send_encoded_msgs = broadcast_send_encoded_msgs
+
+    def connect(self, team: int, slot: int, tags: typing.List[str]) -> Client:
+        client = make_client(self.ctx)
+        client.auth = True
+        client.team, client.slot, client.tags = team, slot, tags
+        self.ctx.endpoints.append(client)
+        self.ctx.clients[team][slot].append(client)
+        self.ctx.index_client(client)
+        return client
+
+    async def bounce(self, client: Client, **targets: typing.List[typing.Any]) -> typing.Set[Endpoint]:
+        self.bounced.clear()
+        await process_client_cmd(self.ctx, client, {"cmd": "Bounce", "data": {}, **targets})
+        return self.bounced[0] if self.bounced else set()
+
+    async def test_targets(self) -> None:
+        """Test that bounces reach the clients of the sender's team with any of the tags, games or slots."""
+        death_link = self.connect(0, 1, ["DeathLink"])
+        game_b = self.connect(0, 2, [])
+        tracker = self.connect(0, 3, ["Tracker", "DeathLink"])
+        other_team = self.connect(1, 1, ["DeathLink"])
+
+        self.assertEqual({death_link, tracker}, await self.bounce(death_link, tags=["DeathLink"]))
+        self.assertEqual({other_team}, await self.bounce(other_team, tags=["DeathLink"]))
+        self.assertEqual({death_link, tracker}, await self.bounce(game_b, games=["Game A"]))
+        self.assertEqual({game_b, tracker}, await self.bounce(death_link, slots=[2], tags=["Tracker"]))
+        self.assertEqual(set(), await self.bounce(death_link, tags=["Unused"], slots=[4]))
+
+    async def test_changes(self) -> None:
+        """Test that the indexes follow tag changes and disconnects."""
+        client = self.connect(0, 1, ["DeathLink"])
+        other = self.connect(0, 2, ["DeathLink"])
+
+        await process_client_cmd(self.ctx, client, {"cmd": "ConnectUpdate", "tags": ["Tracker"]})
+        self.assertEqual({other}, await self.bounce(other, tags=["DeathLink"]))
+        self.assertEqual({client}, await self.bounce(other, tags=["Tracker"]))
+
+        await self.ctx.disconnect(other)
+        self.assertEqual(set(), await self.bounce(client, tags=["DeathLink"], games=["Game B"]))
+        self.assertNotIn((0, "DeathLink"), self.ctx.team_tag_clients)
+
+
+class TestSetReply(unittest.IsolatedAsyncioTestCase):
+    @override
+    def setUp(self) -> None:
+        self.ctx = Context("", 0, "", "", 0, 0, False)
+        self.replies: typing.List[typing.Tuple[typing.Set[Client], typing.Dict[str, typing.Any]]] = []
+
+        def broadcast(endpoints: typing.Iterable[Client], msgs: typing.List[typing.Dict[str, typing.Any]]) -> None:
+            self.replies.append((set(endpoints), copy.copy(msgs[0])))
+
+        self.ctx.broadcast = broadcast
+        self.setter = make_client(self.ctx)
+        self.subscriber = make_client(self.ctx)
+        for client in (self.setter, self.subscriber):
+            client.auth = True
+            client.team, client.slot = 0, 1
+        self.ctx.stored_data_notification_clients["counter"].add(self.subscriber)
+
+    async def add(self, value: int, **args: typing.Any) -> None:
+        await process_client_cmd(self.ctx, self.setter, {"cmd": "Set", "key": "counter", "default": 0,
+                                                         "operations": [{"operation": "add", "value": value}], **args})
+
+    async def test_immediate(self) -> None:
+        await self.add(1, want_reply=True)
+        await self.add(2)
+        self.assertEqual([({self.setter, self.subscriber}, 0, 1), ({self.subscriber}, 1, 3)],
+                         [(targets, reply["original_value"], reply["value"]) for targets, reply in self.replies])
+
+    async def test_coalesced(self) -> None:
+        """Test that Sets within the delay send one SetReply to subscribers, but don't delay requested replies."""
+        self.ctx.set_reply_delay = 10
+        await self.add(1)
+        await self.add(2, want_reply=True)
+        await self.add(3)
+        self.assertEqual([({self.setter}, 1, 3)],
+                         [(targets, reply["original_value"], reply["value"]) for targets, reply in self.replies])
+
+        await asyncio.sleep(0.05)
+        self.assertEqual(({self.subscriber}, 0, 6), (self.replies[-1][0], self.replies[-1][1]["original_value"],
+                                                     self.replies[-1][1]["value"]))
+        self.assertEqual(2, len(self.replies))
+        self.assertEqual(3, self.ctx.stored_data_sets["counter"])
+        self.assertEqual(2, self.ctx.stored_data_replies["counter"])
+
+
+class TestSaveJournal(unittest.TestCase):
+    @override
+    def setUp(self) -> None:
+        self.tempdir = TemporaryDirectory()
+        self.save_filename = os.path.join(self.tempdir.name, "test.apsave")
+        self.ctx = Context("", 0, "", "", 0, 0, False)
+        self.ctx.save_filename = self.save_filename
+        self.ctx.saving = True
+
+    @override
+    def tearDown(self) -> None:
+        self.tempdir.cleanup()
+
+    def save(self, snapshot: bool = False) -> bool:
+        """Saves immediately, as a new snapshot if requested or else as a journal entry if it is due."""
+        if snapshot:
+            self.ctx.save_journal_entries = self.ctx.save_journal_length
+        return self.ctx.save(now=True)
+
+    def load(self) -> typing.Dict[str, typing.Any]:
+        with open(self.save_filename, "rb") as f:
+            savedata: typing.Dict[str, typing.Any] = restricted_loads(zlib.decompress(f.read()))
+        apply_save_journal(savedata, read_save_journal(self.ctx.save_journal_filename))
+        return savedata
+
+    def change(self, location: int) -> None:
+        send_items_to(self.ctx, 0, 1, NetworkItem(location, location, 2, 0))
+        self.ctx.location_checks[0, 2].add(location)
+        self.ctx.unsaved_location_checks[0, 2].add(location)
+        self.ctx.stored_data[f"key{location}"] = location
+        self.ctx.unsaved_stored_data.add(f"key{location}")
+        self.ctx.hints[0, 1] = {Hint(1, 2, location, location, True)}
+        self.ctx.on_changed_hints(0, 1)
+
+    def test_journal(self) -> None:
+        """Test that a snapshot with its journal loads as the whole save, and that the journal is compacted."""
+        self.change(1)
+        self.assertTrue(self.save())
+        self.assertEqual(0, os.path.getsize(self.ctx.save_journal_filename))
+        for location in range(2, 5):
+            self.change(location)
+            self.assertTrue(self.save())
+        self.assertGreater(os.path.getsize(self.ctx.save_journal_filename), 0)
+        self.assertEqual(self.ctx.get_save(), self.load())
+
+        self.change(5)
+        self.assertTrue(self.save(snapshot=True))
+        self.assertEqual(0, os.path.getsize(self.ctx.save_journal_filename))
+        self.assertEqual(self.ctx.get_save(), self.load())
+
+    def test_cut_off_entry(self) -> None:
+        """Test that an entry cut off while being written is ignored."""
+        self.change(1)
+        self.save()
+        self.change(2)
+        self.save()
+        saved = copy.deepcopy(self.ctx.get_save())
+        self.change(3)
+        self.save()
+        with open(self.ctx.save_journal_filename, "r+b") as f:
+            f.truncate(os.path.getsize(self.ctx.save_journal_filename) - 1)
+        self.assertEqual(saved, self.load())
+
+    def test_old_generation(self) -> None:
+        """Test that entries of an older snapshot are skipped, as they are part of the newer snapshot."""
+        self.change(1)
+        self.save()
+        self.change(2)
+        self.save()
+        with open(self.ctx.save_journal_filename, "rb") as f:
+            old_journal = f.read()
+        self.save(snapshot=True)
+        with open(self.ctx.save_journal_filename, "wb") as f:
+            f.write(old_journal)
+        self.assertEqual(self.ctx.get_save(), self.load())
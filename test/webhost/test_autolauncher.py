@@ -0,0 +1,141 @@
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+from . import TestBase
+
+
+class TestAutohost(TestBase):
+    def test_rooms_to_host(self) -> None:
+        """Verify that only rooms that were active since the given time and are within their timeout are found."""
+        from pony.orm import db_session
+        from WebHostLib.autolauncher import get_rooms_to_host
+        from WebHostLib.models import Room, Seed
+
+        now = datetime.utcnow()
+        with db_session:
+            seed = Seed(multidata=b"", owner=uuid4())
+            active = Room(seed=seed, owner=seed.owner, last_activity=now)
+            timed_out = Room(seed=seed, owner=seed.owner, last_activity=now - timedelta(minutes=2), timeout=60)
+            Room(seed=seed, owner=seed.owner, last_activity=now - timedelta(minutes=10))
+            rooms = get_rooms_to_host(now - timedelta(minutes=5))
+            self.assertIn(active.id, rooms)
+            self.assertNotIn(timed_out.id, rooms)
+            self.assertEqual(1, len(rooms))
+            seed.delete()
+
+    def test_assign_room(self) -> None:
+        """Verify that rooms are started on the hoster with the fewest rooms, and only once."""
+        from WebHostLib.autolauncher import MultiworldInstance, assign_room
+
+        hosters = [MultiworldInstance(self.app.config, hoster) for hoster in range(2)]
+        hosters[0].room_ids.add(uuid4())
+        first, second = uuid4(), uuid4()
+        assign_room(hosters, first)
+        self.assertIn(first, hosters[1].room_ids)
+        assign_room(hosters, first)
+        assign_room(hosters, second)
+        self.assertEqual(2, len(hosters[0].room_ids))
+        self.assertEqual(1, len(hosters[1].room_ids))
+
+    def test_request_hosting(self) -> None:
+        """Verify that requesting a room stores the request and wakes up the autohost of the machine."""
+        import os
+        from pony.orm import db_session
+        from WebHostLib.autolauncher import _open_wake_socket, _wake_port_file, request_hosting
+        from WebHostLib.models import Room, Seed
+
+        os.makedirs(os.path.dirname(_wake_port_file), exist_ok=True)
+        with _open_wake_socket() as wake_socket:
+            with db_session:
+                seed = Seed(multidata=b"", owner=uuid4())
+                room = Room(seed=seed, owner=seed.owner)
+                request_hosting(room)
+            wake_socket.settimeout(10)
+            self.assertTrue(wake_socket.recv(1))
+        self.assertFalse(os.path.exists(_wake_port_file))
+        with db_session:
+            room = Room.get(id=room.id)
+            self.assertEqual(1, len(room.start_requests))
+            room.seed.delete()
+
+    def test_restart_dead_hoster(self) -> None:
+        """Verify that the rooms of a hoster whose process died are returned to be started again."""
+        import multiprocessing
+        from WebHostLib.autolauncher import MultiworldInstance
+
+        hoster = MultiworldInstance(self.app.config, 0)
+        room_id = uuid4()
+        hoster.start_room(room_id)
+        rooms_to_start = hoster.rooms_to_start
+        hoster.process = multiprocessing.Process(target=int)
+        hoster.process.start()
+        hoster.process.join()
+        started = []
+        hoster.start = lambda: started.append(True)
+        self.assertEqual([room_id], hoster.collect_shut_down_rooms())
+        self.assertEqual(set(), hoster.room_ids)
+        self.assertEqual([True], started)
+        self.assertIsNot(rooms_to_start, hoster.rooms_to_start)
+
+
+class TestGeneratorPool(TestBase):
+    def test_recycle_workers(self) -> None:
+        """Verify that workers are replaced once they exceed the RSS limit, and that results and errors arrive."""
+        import os
+        import threading
+        from WebHostLib.autolauncher import GeneratorPool
+
+        results = []
+        done = threading.Semaphore(0)
+
+        def callback(result) -> None:
+            results.append(result)
+            done.release()
+
+        with GeneratorPool(1, rss_limit=0) as pool:
+            for _ in range(2):
+                pool.apply_async(os.getpid, callback=callback, error_callback=callback)
+            pool.apply_async(int, ("not a number",), callback=callback, error_callback=callback)
+            for _ in range(3):
+                self.assertTrue(done.acquire(timeout=60))
+        self.assertNotEqual(results[0], results[1])
+        self.assertIsInstance(results[2], ValueError)
+
+    def test_lost_job(self) -> None:
+        """Verify that the job of a worker that dies fails, and that the pool keeps working with a new worker."""
+        import os
+        import threading
+        from WebHostLib.autolauncher import GeneratorCrashed, GeneratorPool
+
+        results = []
+        done = threading.Semaphore(0)
+
+        def callback(result) -> None:
+            results.append(result)
+            done.release()
+
+        with GeneratorPool(1) as pool:
+            pool.apply_async(os._exit, (3,), callback=callback, error_callback=callback)
+            pool.apply_async(os.getpid, callback=callback, error_callback=callback)
+            for _ in range(2):
+                self.assertTrue(done.acquire(timeout=60))
+        self.assertIsInstance(results[0], GeneratorCrashed)
+        self.assertIsInstance(results[1], int)
+        self.assertFalse(pool.jobs)
+
+    def test_lost_generation_fails(self) -> None:
+        """Verify that a generation whose process died is marked as failed, instead of staying started."""
+        import json
+        from pony.orm import db_session
+        from WebHostLib.autolauncher import GeneratorCrashed, handle_generation_failure
+        from WebHostLib.models import Generation, STATE_ERROR, STATE_STARTED
+
+        with db_session:
+            generation_id = Generation(owner=uuid4(), options=b"", state=STATE_STARTED).id
+        with self.assertLogs(level="ERROR"):
+            handle_generation_failure(GeneratorCrashed("Generator process exited with code -9"), sid=generation_id)
+        with db_session:
+            generation = Generation.get(id=generation_id)
+            self.assertEqual(STATE_ERROR, generation.state)
+            self.assertIn("exited with code -9", json.loads(generation.meta)["error"])
+            generation.delete()
@@ -0,0 +1,82 @@
+import asyncio
+import logging
+from pathlib import Path
+from uuid import uuid4
+
+from . import TestBase
+
+
+class TestSharedSeed(TestBase):
+    def test_rooms_share_seed(self) -> None:
+        """Verify that rooms of the same seed share its parsed data, which is freed when the last room unloads."""
+        from pony.orm import db_session
+        from WebHostLib.customserver import WebHostContext, _shared_seeds, get_static_server_data
+        from WebHostLib.models import Room, Seed
+
+        with (Path(__file__).parent / "data" / "One_Archipelago.archipelago").open("rb") as f:
+            multidata = f.read()
+        with db_session:
+            seed = Seed(multidata=multidata, owner=uuid4())
+            room_ids = [Room(seed=seed, owner=seed.owner).id for _ in range(2)]
+            seed_id = seed.id
+
+        async def load_rooms():
+            contexts = []
+            for room_id in room_ids:
+                ctx = WebHostContext(get_static_server_data(), logging.getLogger("TestSharedSeed"))
+                ctx.load(room_id)
+                contexts.append(ctx)
+            return contexts
+
+        first, second = asyncio.run(load_rooms())
+        try:
+            self.assertIs(first.locations, second.locations)
+            self.assertIs(first.slot_data, second.slot_data)
+            self.assertIs(first.encoded_game_packages, second.encoded_game_packages)
+            self.assertIsNot(first.location_checks, second.location_checks)
+            self.assertEqual(2, _shared_seeds[seed_id].rooms)
+            first.unload()
+            self.assertIn(seed_id, _shared_seeds)
+            second.unload()
+            self.assertNotIn(seed_id, _shared_seeds)
+        finally:
+            with db_session:
+                Seed.get(id=seed_id).delete()
+
+
+class TestTrackerState(TestBase):
+    def test_published_at_snapshots(self) -> None:
+        """Verify that the tracker state is only published with save snapshots, not with every journal entry."""
+        from pony.orm import db_session, select
+        from WebHostLib.customserver import WebHostContext, get_static_server_data
+        from WebHostLib.models import Room, SaveJournalEntry, Seed
+
+        with (Path(__file__).parent / "data" / "One_Archipelago.archipelago").open("rb") as f:
+            multidata = f.read()
+        with db_session:
+            seed = Seed(multidata=multidata, owner=uuid4())
+            room_id = Room(seed=seed, owner=seed.owner).id
+            seed_id = seed.id
+
+        async def load_room() -> WebHostContext:
+            ctx = WebHostContext(get_static_server_data(), logging.getLogger("TestTrackerState"))
+            ctx.load(room_id)
+            return ctx
+
+        ctx = asyncio.run(load_room())
+        try:
+            ctx._save()
+            with db_session:
+                room = Room.get(id=room_id)
+                self.assertEqual(ctx.save_generation, room.tracker_state.version)
+                published = room.tracker_state.data
+            ctx.location_checks[0, 1].add(1)
+            ctx._save()
+            with db_session:
+                room = Room.get(id=room_id)
+                self.assertEqual(published, room.tracker_state.data)
+                self.assertEqual(1, select(entry for entry in SaveJournalEntry if entry.room == room).count())
+        finally:
+            ctx.unload()
+            with db_session:
+                Seed.get(id=seed_id).delete()
@@ -191,3 +191,29 @@ class TestHostFakeRoom(TestBase):
         with db_session:
             commands = select(command for command in Command if command.room.id == self.room_id)  # type: ignore
             self.assertNotIn("/help", (command.commandtext for command in commands))
+
+    def test_command_dispatcher(self) -> None:
+        """Verify that commands of registered rooms are run on their room's event loop and deleted."""
+        import asyncio
+        import logging
+        from pony.orm import db_session, select
+        from MultiServer import Context
+        from WebHostLib.customserver import DBCommandDispatcher
+        from WebHostLib.models import Command, Room
+
+        loop = asyncio.new_event_loop()
+        ctx = Context("", 0, "", "", 0, 0, False, logger=logging.getLogger("TestCommandDispatcher"))
+        ctx.room_id = self.room_id
+        ctx.main_loop = loop
+        dispatcher = DBCommandDispatcher()
+        dispatcher.register(ctx)
+        with db_session:
+            Command(room=Room.get(id=self.room_id), commandtext="/help")
+        try:
+            with self.assertLogs("TestCommandDispatcher"):
+                dispatcher.dispatch()
+                loop.run_until_complete(asyncio.sleep(0))
+        finally:
+            loop.close()
+        with db_session:
+            self.assertFalse(select(command for command in Command if command.room.id == self.room_id).exists())
@@ -103,3 +103,81 @@ class TestTracker(TestBase):
                 self.assertEqual(response.status_code, 200)
             with self.client.open(url_for("api.tracker_slot_data", tracker=self.tracker_uuid)) as response:
                 self.assertEqual(response.status_code, 200)
+
+    def test_sphere_tracker(self) -> None:
+        """Verify that the sphere tracker renders for the room."""
+        with self.app.test_request_context():
+            response = self.client.get(url_for("get_multiworld_sphere_tracker", tracker=self.tracker_uuid))
+            self.assertEqual(response.status_code, 200)
+
+    def test_published_tracker_state(self) -> None:
+        """Verify that trackers read the newest state published by the room's server instead of the save."""
+        from pony.orm import db_session
+        from WebHostLib.models import Room, TrackerState
+        from WebHostLib.tracker import TrackerData
+
+        with db_session:
+            room = Room.get(id=self.room_id)
+            self.assertEqual(set(), TrackerData(room).get_player_checked_locations(0, 1))
+            TrackerState(room=room, version=1, data=pickle.dumps({"location_checks": {(0, 1): {1}}}))
+        with db_session:
+            self.assertEqual({1}, TrackerData(Room.get(id=self.room_id)).get_player_checked_locations(0, 1))
+        with db_session:
+            room = Room.get(id=self.room_id)
+            room.tracker_state.version = 2
+            room.tracker_state.data = pickle.dumps({"location_checks": {(0, 1): {1, 2}}})
+        with db_session:
+            self.assertEqual({1, 2}, TrackerData(Room.get(id=self.room_id)).get_player_checked_locations(0, 1))
+
+    def test_shared_seed_data(self) -> None:
+        """Verify that the multidata of a seed is decoded once and shared by its trackers."""
+        from pony.orm import db_session
+        from WebHostLib.models import Room
+        from WebHostLib.tracker import TrackerData
+
+        with db_session:
+            room = Room.get(id=self.room_id)
+            first, second = TrackerData(room), TrackerData(room)
+            self.assertIs(first._multidata, second._multidata)
+            self.assertIs(first.item_id_to_name, second.item_id_to_name)
+            self.assertIs(first.get_location_spheres(), second.get_location_spheres())
+
+    def test_tracker_state_journal(self) -> None:
+        """Verify that trackers apply the save journal written since the published state, without modifying it."""
+        from pony.orm import db_session, select
+        from NetUtils import NetworkItem
+        from WebHostLib.tracker_state import tracker_save_states
+        from WebHostLib.models import Room, SaveJournalEntry, TrackerState
+        from WebHostLib.tracker import TrackerData
+
+        def write_journal_entry(save_generation: int, location: int) -> None:
+            delta = {"save_generation": save_generation, "hints": {}, "stored_data": {},
+                     "received_items": {(0, 1, True): (location - 1, [NetworkItem(location, location, 1, 0)])},
+                     "location_checks": {(0, 1): {location}},
+                     **{key: {} for key in tracker_save_states}}
+            with db_session:
+                SaveJournalEntry(room=Room.get(id=self.room_id), data=pickle.dumps(delta))
+
+        with db_session:
+            TrackerState(room=Room.get(id=self.room_id), version=1,
+                         data=pickle.dumps({"location_checks": {(0, 1): {1}}}))
+        write_journal_entry(1, 1)
+        with db_session:
+            first = TrackerData(Room.get(id=self.room_id))
+            self.assertEqual({1}, first.get_player_checked_locations(0, 1))
+        write_journal_entry(1, 2)
+        write_journal_entry(0, 3)  # of an older snapshot
+        with db_session:
+            second = TrackerData(Room.get(id=self.room_id))
+            self.assertEqual({1, 2}, second.get_player_checked_locations(0, 1))
+            self.assertEqual([1, 2], [item.item for item in second.get_player_received_items(0, 1)])
+            self.assertEqual({1}, first.get_player_checked_locations(0, 1))
+            self.assertEqual(1, len(first.get_player_received_items(0, 1)))
+
+        with db_session:
+            room = Room.get(id=self.room_id)
+            select(entry for entry in SaveJournalEntry if entry.room == room).delete(bulk=True)
+            room.tracker_state.version = 2
+            room.tracker_state.data = pickle.dumps({"location_checks": {(0, 1): {4}}})
+        with db_session:
+            self.assertEqual({4}, TrackerData(Room.get(id=self.room_id)).get_player_checked_locations(0, 1))
@@ -13,6 +13,7 @@ from typing import (Any, Callable, ClassVar, Dict, FrozenSet, Iterable, List, Ma
 from Options import item_and_loc_options, ItemsAccessibility, OptionGroup, PerGameCommonOptions
 from BaseClasses import CollectionState
 from Utils import Version
+from profiling import profile_span
 
 if TYPE_CHECKING:
     from BaseClasses import MultiWorld, Item, Location, Tutorial, Region, Entrance
@@ -164,8 +165,13 @@ class WebWorldRegister(type):
 
 def _timed_call(method: Callable[..., Any], *args: Any,
                 multiworld: Optional["MultiWorld"] = None, player: Optional[int] = None) -> Any:
+    span = profile_span(multiworld, method.__qualname__, "world")
+    if player and span.profile:
+        span.args.update(player=player, player_name=multiworld.player_name[player],
+                         game=multiworld.worlds[player].game)
     start = time.perf_counter()
-    ret = method(*args)
+    with span:
+        ret = method(*args)
     taken = time.perf_counter() - start
     if taken > 1.0:
         if player and multiworld:
@@ -193,19 +199,20 @@ def call_single(multiworld: "MultiWorld", method_name: str, player: int, *args:
 
 def call_all(multiworld: "MultiWorld", method_name: str, *args: Any) -> None:
     world_types: Set[AutoWorldRegister] = set()
-    for player in multiworld.player_ids:
-        prev_item_count = len(multiworld.itempool)
-        world_types.add(multiworld.worlds[player].__class__)
-        call_single(multiworld, method_name, player, *args)
-        if __debug__:
-            new_items = multiworld.itempool[prev_item_count:]
-            for i, item in enumerate(new_items):
-                for other in new_items[i+1:]:
-                    assert item is not other, (
-                        f"Duplicate item reference of \"{item.name}\" in \"{multiworld.worlds[player].game}\" "
-                        f"of player \"{multiworld.player_name[player]}\". Please make a copy instead.")
-
-    call_stage(multiworld, method_name, *args)
+    with profile_span(multiworld, method_name, "stage"):
+        for player in multiworld.player_ids:
+            prev_item_count = len(multiworld.itempool)
+            world_types.add(multiworld.worlds[player].__class__)
+            call_single(multiworld, method_name, player, *args)
+            if __debug__:
+                new_items = multiworld.itempool[prev_item_count:]
+                for i, item in enumerate(new_items):
+                    for other in new_items[i+1:]:
+                        assert item is not other, (
+                            f"Duplicate item reference of \"{item.name}\" in \"{multiworld.worlds[player].game}\" "
+                            f"of player \"{multiworld.player_name[player]}\". Please make a copy instead.")
+
+        call_stage(multiworld, method_name, *args)
 
 
 def call_stage(multiworld: "MultiWorld", method_name: str, *args: Any) -> None:
@@ -213,7 +220,7 @@ def call_stage(multiworld: "MultiWorld", method_name: str, *args: Any) -> None:
     for world_type in sorted(world_types, key=lambda world: world.__name__):
         stage_callable = getattr(world_type, f"stage_{method_name}", None)
         if stage_callable:
-            _timed_call(stage_callable, multiworld, *args)
+            _timed_call(stage_callable, multiworld, *args, multiworld=multiworld)
 
 
 class WebWorld(metaclass=WebWorldRegister):
@@ -318,6 +325,13 @@ class World(metaclass=AutoWorldRegister):
     If False, everything is rechecked at every step, which is slower computationally, 
     but may be desirable in complex/dynamic worlds."""
 
+    incremental_reachability: bool = False
+    """If True and explicit_indirect_conditions is also True, a blocked Entrance is only retested once an item name its
+    access rule read while failing has changed, instead of retesting every blocked Entrance whenever an item is
+    collected. Entrances whose rule read items of other players, or failed without reading any item, are retested on
+    every update. Only enable this if Entrance access rules depend on no other state than prog_items and regions
+    registered through MultiWorld.register_indirect_condition()."""
+
     multiworld: "MultiWorld"
     """autoset on creation. The MultiWorld object for the currently generating multiworld."""
     player: int
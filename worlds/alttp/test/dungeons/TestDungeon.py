@@ -48,9 +48,7 @@ class TestDungeon(LTTPTestBase):
                 for region_name in self.starting_regions:
                     region = self.multiworld.get_region(region_name, 1)
                     state.reachable_regions[1].add(region)
-                    for exit in region.exits:
-                        if exit.connected_region is not None:
-                            state.blocked_connections[1].add(exit)
+                    state.block_connections(1, (exit for exit in region.exits if exit.connected_region is not None))
 
                 for item in items:
                     item.classification = ItemClassification.progression